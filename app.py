@@ -1,24 +1,92 @@
-import json
-import tempfile
-from pathlib import Path
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
 
 import pandas as pd
 import streamlit as st
 
+from drug_mentions.cache import ResultCache, content_key
+from drug_mentions.graph import DEFAULT_MAX_NODES
 from drug_mentions.pipeline.loader import DataLoader
 from drug_mentions.pipeline.transformer import DataTransformer
-from drug_mentions.pipeline.writer import DataWriter
 from utils.d3_viewer import d3_viewer
 
+# Parsed inputs and results are kept across reruns and sessions, up to this size
+CACHE_MAX_BYTES = 512 << 20
+
 st.set_page_config(layout="wide")
 st.title("Drug mentions finder with data viz!")
 
 col_left, col_right = st.columns([1, 1])
 
 
-def save_uploaded_file(uploaded_file, save_path: Path):
-    with open(save_path, "wb") as f:
-        f.write(uploaded_file.getvalue())
+@st.cache_resource
+def get_cache() -> ResultCache:
+    return ResultCache(CACHE_MAX_BYTES)
+
+
+def parse_input(name: str, data: bytes) -> list:
+    """Parse one uploaded CSV (drugs, pubmed or clinical_trials) on its own."""
+    loader = DataLoader(buffers={f"{name}.csv": data})
+    if name == "drugs":
+        return loader.load_drugs()
+    if name == "pubmed":
+        return loader.load_pubmed()
+    return loader.load_clinical_trials()
+
+
+def run_pipeline(drugs_list: list, all_publications: list) -> dict:
+    """
+    Transform the parsed inputs into the output mapping, the same dictionary
+    as the JSON written by DataWriter, without going through a file.
+    """
+    transformer = DataTransformer()
+    return transformer.find_drug_mentions(drugs_list, all_publications)
+
+
+def results_size(results: dict) -> int:
+    """Approximate size of the results, from the length of their strings."""
+    return sum(
+        len(drug)
+        + sum(
+            len(value)
+            for mentions in entry["mentions"].values()
+            for mention in mentions
+            for value in mention.values()
+        )
+        for drug, entry in results.items()
+    )
+
+
+def process(uploads: dict) -> dict:
+    """
+    Return the results for the uploaded files, from the cache when the same
+    contents were processed before. Each file is parsed once per content, so
+    changing one file reuses the parsed version of the others.
+    """
+    cache = get_cache()
+    data = {name: uploaded.getvalue() for name, uploaded in uploads.items()}
+    digests = {name: hashlib.sha256(value).hexdigest() for name, value in data.items()}
+
+    def compute_results() -> dict:
+        def parse(name: str) -> list:
+            return cache.get_or_compute(
+                content_key("input", name, digests[name]),
+                lambda: parse_input(name, data[name]),
+                # The size of the upload stands for the size of the parsed rows
+                size=lambda _: len(data[name]),
+            )
+
+        with ThreadPoolExecutor() as pool:
+            drugs_list, pubmed, clinical_trials = pool.map(
+                parse, ["drugs", "pubmed", "clinical_trials"]
+            )
+        return run_pipeline(drugs_list, pubmed + clinical_trials)
+
+    return cache.get_or_compute(
+        content_key("results", sorted(digests.items())),
+        compute_results,
+        size=results_size,
+    )
 
 
 with col_left:
@@ -35,43 +103,28 @@ if process_button:
     if clinical_file is None or drugs_file is None or pubmed_file is None:
         st.warning("Please upload all three CSV files before processing.")
     else:
-        # Create a temporary directory for the pipeline input/output
-        with tempfile.TemporaryDirectory() as tmpdirname:
-            tmp_dir = Path(tmpdirname)
-            input_dir = tmp_dir / "input"
-            output_dir = tmp_dir / "output"
-            input_dir.mkdir(parents=True, exist_ok=True)
-            output_dir.mkdir(parents=True, exist_ok=True)
-
-            # Save the uploaded files in the "input" folder with expected filenames
-            save_uploaded_file(clinical_file, input_dir / "clinical_trials.csv")
-            save_uploaded_file(drugs_file, input_dir / "drugs.csv")
-            save_uploaded_file(pubmed_file, input_dir / "pubmed.csv")
-            # Note: If you also use pubmed.json, add similar logic here.
-
-            # Run the pipeline:
-            # 1. Load data using DataLoader
-            loader = DataLoader(str(input_dir))
-            drugs_list = loader.load_drugs()
-            pubmed_publications = loader.load_pubmed()
-            clinical_publications = loader.load_clinical_trials()
-            all_publications = pubmed_publications + clinical_publications
-
-            # 2. Transform data to generate mentions mapping
-            transformer = DataTransformer()
-            mentions_dict = transformer.find_drug_mentions(drugs_list, all_publications)
-
-            # 3. Write output JSON using DataWriter
-            output_file = output_dir / "drug_mentions.json"
-            writer = DataWriter()
-            writer.write_json(mentions_dict, output_file)
-
-            # Read the output JSON back as a dictionary
-            with open(output_file, "r") as f:
-                results_dict = json.load(f)
-
-            # Visualize using the vis-network viewer
-            d3_viewer(results_dict, height=800)
-
-            st.subheader("Raw JSON")
-            st.json(results_dict)
+        # Kept in the session so that the graph options below can rerun the app
+        st.session_state["results"] = process(
+            {
+                "clinical_trials": clinical_file,
+                "drugs": drugs_file,
+                "pubmed": pubmed_file,
+            }
+        )
+
+if "results" in st.session_state:
+    results_dict = st.session_state["results"]
+
+    # Publications are shown as counts, unless their drug is expanded
+    expand = st.multiselect("Show the publications of", sorted(results_dict))
+    max_nodes = st.slider("Maximum number of nodes", 50, 2000, DEFAULT_MAX_NODES)
+    d3_viewer(results_dict, height=800, max_nodes=max_nodes, expand=expand)
+
+    stats = get_cache().stats()
+    st.caption(
+        f"Cache: {stats['entries']} entries, {stats['bytes'] >> 20} MiB, "
+        f"{stats['hits']} hits, {stats['misses']} misses"
+    )
+
+    st.subheader("Raw JSON")
+    st.json(results_dict)
@@ -0,0 +1,116 @@
+"""
+Latency benchmark of the MentionIndex query service.
+
+Usage:
+    python benchmarks/bench_query.py --drugs 10000 --publications 1000000
+
+Builds the index from synthetic drug mentions, then times random queries by
+drug, source, journal and date range, through the Python API and through the
+HTTP endpoint. Exits with status 1 when a p99 is above its target.
+"""
+
+import argparse
+import random
+import sys
+import threading
+import time
+from http.client import HTTPConnection
+from urllib.parse import urlencode
+
+from bench_transformer import generate, timed
+
+from drug_mentions.pipeline.transformer import DataTransformer, PublicationSet
+from drug_mentions.query import MentionIndex, make_server
+
+
+def percentile(samples, fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def random_queries(rng, drugs, journals, n: int):
+    """(endpoint, params) pairs mixing the query shapes the service supports."""
+    queries = []
+    for _ in range(n):
+        year = rng.choice([2019, 2020])
+        shape = rng.randrange(4)
+        if shape == 0:
+            queries.append(("publications", {"drug": rng.choice(drugs)}))
+        elif shape == 1:
+            queries.append(
+                (
+                    "publications",
+                    {"source": "clinical_trial", "year": year, "limit": 100},
+                )
+            )
+        elif shape == 2:
+            queries.append(("drugs", {"journal": rng.choice(journals), "year": year}))
+        else:
+            queries.append(("journals", {"drug": rng.choice(drugs), "year": year}))
+    return queries
+
+
+def report(label: str, samples, target_ms: float) -> bool:
+    p50 = percentile(samples, 0.50) * 1000
+    p99 = percentile(samples, 0.99) * 1000
+    ok = p99 <= target_ms
+    print(
+        f"{label:<10} p50 {p50:8.3f}ms  p99 {p99:8.3f}ms  "
+        f"(target {target_ms}ms: {'ok' if ok else 'MISSED'})"
+    )
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--drugs", type=int, default=10_000)
+    parser.add_argument("--publications", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=10_000)
+    parser.add_argument("--api-p99-ms", type=float, default=1.0)
+    parser.add_argument("--http-p99-ms", type=float, default=10.0)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    print(f"Generating {args.drugs} drugs x {args.publications} publications...")
+    drugs, pubmed, clinical_trials = generate(args.drugs, args.publications, args.seed)
+    prepared = PublicationSet.from_sources(
+        pubmed=pubmed, clinical_trials=clinical_trials
+    )
+    hits = list(DataTransformer.iter_hits(drugs, prepared.ordered))
+    index, _ = timed("MentionIndex.from_hits", MentionIndex.from_hits, drugs, hits)
+    print(f"{len(index)} publication mentions indexed")
+
+    rng = random.Random(args.seed)
+    names = [drug.drug for drug in drugs]
+    journals = sorted({pub.journal for pub in prepared.ordered})
+    queries = random_queries(rng, names, journals, args.queries)
+
+    api = []
+    for endpoint, params in queries:
+        start = time.perf_counter()
+        getattr(index, endpoint)(**params)
+        api.append(time.perf_counter() - start)
+
+    server = make_server(index, port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    connection = HTTPConnection("127.0.0.1", server.server_port)
+    http = []
+    try:
+        for endpoint, params in queries:
+            start = time.perf_counter()
+            connection.request("GET", f"/{endpoint}?{urlencode(params)}")
+            response = connection.getresponse()
+            response.read()
+            http.append(time.perf_counter() - start)
+    finally:
+        connection.close()
+        server.shutdown()
+        server.server_close()
+
+    ok = report("api", api, args.api_p99_ms)
+    ok = report("http", http, args.http_p99_ms) and ok
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
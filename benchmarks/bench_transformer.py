@@ -0,0 +1,152 @@
+"""
+Benchmark of DataTransformer.find_drug_mentions against the original
+per-drug implementation.
+
+Usage:
+    python benchmarks/bench_transformer.py --drugs 10000 --publications 1000000
+
+The original implementation is O(drugs x publications), so it is only timed on
+a sample of publications (--legacy-sample) and extrapolated linearly.
+"""
+
+import argparse
+import random
+import string
+import time
+from datetime import datetime, timedelta
+
+from drug_mentions.models.schema import Drug, Publication
+from drug_mentions.pipeline.transformer import DataTransformer, PublicationSet
+
+
+def legacy_find_drug_mentions(drugs, publications):
+    """The per-drug implementation the transformer used to have."""
+    mentions = {}
+    for drug in drugs:
+        drug_mentions = {
+            "mentions": {
+                "pubmed": [
+                    {
+                        "id": pub.id,
+                        "title": pub.title,
+                        "date": pub.date.strftime("%Y-%m-%d"),
+                        "source": "pubmed",
+                    }
+                    for pub in publications
+                    if hasattr(pub, "source")
+                    and pub.source == "pubmed"
+                    and drug.drug.lower() in pub.title.lower()
+                ],
+                "clinical_trials": [
+                    {
+                        "id": pub.id,
+                        "title": pub.title,
+                        "date": pub.date.strftime("%Y-%m-%d"),
+                        "source": "clinical_trial",
+                    }
+                    for pub in publications
+                    if hasattr(pub, "source")
+                    and pub.source == "clinical_trial"
+                    and drug.drug.lower() in pub.title.lower()
+                ],
+                "journals": [
+                    {"name": pub.journal, "date": pub.date.strftime("%Y-%m-%d")}
+                    for pub in publications
+                    if drug.drug.lower() in pub.title.lower()
+                    and pub.journal is not None
+                ],
+            }
+        }
+        if any(len(m) > 0 for m in drug_mentions["mentions"].values()):
+            mentions[drug.drug] = drug_mentions
+    return mentions
+
+
+def random_word(rng: random.Random) -> str:
+    return "".join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 10)))
+
+
+def generate(n_drugs: int, n_publications: int, seed: int = 42):
+    """Generate deterministic synthetic drugs and publications."""
+    rng = random.Random(seed)
+    drugs = [
+        Drug(atccode=f"A{i:05d}", drug=random_word(rng).upper() + "INE")
+        for i in range(n_drugs)
+    ]
+    vocabulary = [random_word(rng) for _ in range(5000)]
+    journals = [f"Journal of {random_word(rng)}" for _ in range(200)]
+    start = datetime(2019, 1, 1)
+
+    pubmed, clinical_trials = [], []
+    for i in range(n_publications):
+        words = rng.choices(vocabulary, k=rng.randint(6, 14))
+        # Roughly one publication in five mentions a drug
+        if rng.random() < 0.2:
+            words.insert(rng.randrange(len(words)), rng.choice(drugs).drug.title())
+        is_trial = rng.random() < 0.3
+        pub = Publication.construct(
+            id=f"NCT{i:08d}" if is_trial else str(i),
+            title=" ".join(words).capitalize(),
+            date=start + timedelta(days=rng.randrange(730)),
+            journal=rng.choice(journals),
+            source="clinical_trial" if is_trial else "pubmed",
+        )
+        (clinical_trials if is_trial else pubmed).append(pub)
+    return drugs, pubmed, clinical_trials
+
+
+def timed(label: str, func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<45} {elapsed:10.2f}s")
+    return result, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--drugs", type=int, default=10_000)
+    parser.add_argument("--publications", type=int, default=1_000_000)
+    parser.add_argument("--legacy-sample", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    print(f"Generating {args.drugs} drugs x {args.publications} publications...")
+    drugs, pubmed, clinical_trials = generate(args.drugs, args.publications, args.seed)
+    all_publications = pubmed + clinical_trials
+
+    sample = all_publications[: args.legacy_sample]
+    _, legacy_sample = timed(
+        f"legacy on {len(sample)} publications",
+        legacy_find_drug_mentions,
+        drugs,
+        sample,
+    )
+    legacy = legacy_sample * len(all_publications) / max(len(sample), 1)
+    print(f"{'legacy (extrapolated)':<45} {legacy:10.2f}s")
+
+    _, from_list = timed(
+        "find_drug_mentions(list)",
+        DataTransformer.find_drug_mentions,
+        drugs,
+        all_publications,
+    )
+    prepared, prepare = timed(
+        "PublicationSet.from_sources",
+        PublicationSet.from_sources,
+        pubmed=pubmed,
+        clinical_trials=clinical_trials,
+    )
+    _, from_set = timed(
+        "find_drug_mentions(PublicationSet)",
+        DataTransformer.find_drug_mentions,
+        drugs,
+        prepared,
+    )
+
+    print(f"speedup vs legacy (list input):     {legacy / from_list:10.1f}x")
+    print(f"speedup vs legacy (prepared input): {legacy / (prepare + from_set):10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
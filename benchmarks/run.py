@@ -0,0 +1,246 @@
+"""
+Benchmark suite of the load, match and write stages on synthetic inputs.
+
+Usage:
+    python benchmarks/run.py --scales 1k,100k --formats csv,json,parquet
+    python benchmarks/run.py --scales 1M --compare benchmarks/results/<sha>.json
+
+For each scale, the synthetic datasets (see synthetic.py) are generated once
+into --data-dir and reused by later runs. Every benchmark is repeated
+--repeat times and its minimum and median wall times are kept. Results are
+saved to benchmarks/results/<commit>.json (with the commit, Python version and
+machine), so that runs on two commits can be compared with --compare, which
+exits with status 1 when a benchmark is slower than --threshold.
+"""
+
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List
+
+from synthetic import FORMATS, parse_count, write_dataset
+
+from drug_mentions.pipeline.loader import DataLoader
+from drug_mentions.pipeline.transformer import (
+    MATCH_MODES,
+    DataTransformer,
+    PublicationSet,
+)
+from drug_mentions.pipeline.writer import WRITE_FORMATS, DataWriter
+
+BENCHMARKS_DIR = Path(__file__).parent
+WRITE_TARGETS = WRITE_FORMATS + ("parquet",)
+
+
+def git_commit() -> Dict[str, object]:
+    def git(*args) -> str:
+        return subprocess.run(
+            ["git", *args], cwd=BENCHMARKS_DIR, capture_output=True, text=True
+        ).stdout.strip()
+
+    return {
+        "sha": git("rev-parse", "HEAD") or "unknown",
+        "dirty": bool(git("status", "--porcelain", "--untracked-files=no")),
+    }
+
+
+def measure(func: Callable[[], object], repeat: int) -> Dict[str, float]:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return {"min": min(timings), "median": statistics.median(timings)}
+
+
+def dataset(data_dir: Path, fmt: str, rows: int, drugs: int, seed: int) -> Path:
+    """Generate (once) and return the dataset directory."""
+    path = data_dir / f"{rows}-{drugs}-{seed}" / fmt
+    marker = path / ".complete"
+    if not marker.exists():
+        print(f"  generating {fmt} dataset with {rows} publications...")
+        write_dataset(path, fmt, rows, drugs, seed)
+        marker.touch()
+    return path
+
+
+def run_scale(args: argparse.Namespace, rows: int) -> List[dict]:
+    results = []
+
+    def record(name: str, func: Callable[[], object], items: int) -> None:
+        timing = measure(func, args.repeat)
+        results.append({"benchmark": name, "rows": rows, "items": items, **timing})
+        rate = items / timing["min"] if timing["min"] else float("inf")
+        print(f"  {name:<32} {timing['min']:9.3f}s  {rate:14,.0f} items/s")
+
+    loaded = None
+    for fmt in args.formats:
+        path = dataset(args.data_dir, fmt, rows, args.drugs, args.seed)
+        loader = DataLoader(path)
+
+        def load_objects():
+            return (
+                loader.load_drugs(),
+                loader.load_pubmed(),
+                loader.load_clinical_trials(),
+            )
+
+        record(f"load.{fmt}", load_objects, rows)
+        record(f"load.{fmt}.columnar", loader.load_publications_frame, rows)
+        if loaded is None:
+            loaded = load_objects()
+
+    drugs, pubmed, clinical_trials = loaded
+    prepared = PublicationSet.from_sources(
+        pubmed=pubmed, clinical_trials=clinical_trials
+    )
+    record(
+        "transform.prepare",
+        lambda: PublicationSet.from_sources(
+            pubmed=pubmed, clinical_trials=clinical_trials
+        ),
+        rows,
+    )
+    for mode in MATCH_MODES:
+        record(
+            f"transform.match.{mode}",
+            lambda: sum(
+                1 for _ in DataTransformer.iter_hits(drugs, prepared.ordered, mode)
+            ),
+            rows,
+        )
+
+    hits = list(DataTransformer.iter_hits(drugs, prepared.ordered))
+    mentions = DataTransformer.build_mentions(drugs, hits)
+    edges = list(DataTransformer.iter_edges(drugs, hits))
+    with tempfile.TemporaryDirectory() as tmp:
+        for target in args.writes:
+            if target == "parquet":
+                output = Path(tmp) / "drug_mentions.parquet"
+                record(
+                    "write.parquet",
+                    lambda: DataWriter.write_parquet(edges, output),
+                    len(edges),
+                )
+            else:
+                output = Path(tmp) / "drug_mentions.json"
+                record(
+                    f"write.{target}",
+                    lambda: DataWriter.write_json(mentions, output, target),
+                    len(mentions),
+                )
+    return results
+
+
+def compare(
+    results: List[dict], baseline_path: Path, threshold: float, min_seconds: float
+) -> bool:
+    """
+    Print the change of every benchmark against a saved run. Returns False
+    when one got slower than ``threshold``; benchmarks faster than
+    ``min_seconds`` are too noisy to count as regressions.
+    """
+    baseline = json.loads(baseline_path.read_text())
+    previous = {(r["benchmark"], r["rows"]): r for r in baseline["results"]}
+    sha = baseline["commit"]["sha"][:10]
+    print(f"\nComparison with {sha} (regression threshold {threshold:.0%})")
+    ok = True
+    for result in results:
+        before = previous.get((result["benchmark"], result["rows"]))
+        if before is None:
+            continue
+        change = result["min"] / before["min"] - 1
+        flag = ""
+        if change > threshold and result["min"] >= min_seconds:
+            flag = "  REGRESSION"
+            ok = False
+        print(
+            f"  {result['benchmark']:<32} {result['rows']:>10} rows "
+            f"{before['min']:9.3f}s -> {result['min']:9.3f}s {change:+7.1%}{flag}"
+        )
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--scales",
+        type=lambda value: [parse_count(v) for v in value.split(",")],
+        default=[parse_count("10k")],
+        help="comma-separated numbers of publications, e.g. 1k,100k,10M",
+    )
+    parser.add_argument(
+        "--formats",
+        type=lambda value: value.split(","),
+        default=list(FORMATS),
+        help=f"input formats to load, among {','.join(FORMATS)}",
+    )
+    parser.add_argument(
+        "--writes",
+        type=lambda value: value.split(","),
+        default=list(WRITE_TARGETS),
+        help=f"output formats to write, among {','.join(WRITE_TARGETS)}",
+    )
+    parser.add_argument("--drugs", type=parse_count, default=1_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--data-dir", type=Path, default=BENCHMARKS_DIR / ".data")
+    parser.add_argument("--results-dir", type=Path, default=BENCHMARKS_DIR / "results")
+    parser.add_argument("--compare", type=Path, default=None)
+    parser.add_argument("--threshold", type=float, default=0.10)
+    parser.add_argument("--min-seconds", type=float, default=0.05)
+    args = parser.parse_args()
+
+    unknown = set(args.formats) - set(FORMATS) | set(args.writes) - set(WRITE_TARGETS)
+    if unknown:
+        parser.error(f"unknown formats: {sorted(unknown)}")
+
+    results = []
+    for rows in args.scales:
+        print(f"{rows} publications, {args.drugs} drugs")
+        results.extend(run_scale(args, rows))
+
+    commit = git_commit()
+    run = {
+        "commit": commit,
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": {
+            "platform": platform.platform(),
+            "processor": platform.processor() or platform.machine(),
+        },
+        "parameters": {
+            "drugs": args.drugs,
+            "repeat": args.repeat,
+            "seed": args.seed,
+        },
+        "results": results,
+    }
+    args.results_dir.mkdir(parents=True, exist_ok=True)
+    name = commit["sha"][:10] + ("-dirty" if commit["dirty"] else "")
+    output = args.results_dir / f"{name}.json"
+    if output.exists():
+        # Keep the other scales/benchmarks already measured on this commit
+        measured = {(r["benchmark"], r["rows"]) for r in results}
+        previous = json.loads(output.read_text())["results"]
+        run["results"] = [
+            r for r in previous if (r["benchmark"], r["rows"]) not in measured
+        ] + results
+    output.write_text(json.dumps(run, indent=2) + "\n")
+    print(f"Results written to {output}")
+
+    if args.compare and not compare(
+        results, args.compare, args.threshold, args.min_seconds
+    ):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
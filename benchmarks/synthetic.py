@@ -0,0 +1,184 @@
+"""
+Deterministic synthetic inputs for the benchmarks.
+
+Writes drugs, pubmed and clinical_trials files in the layout DataLoader reads,
+in one of the supported formats:
+
+    csv      drugs.csv, pubmed.csv, clinical_trials.csv
+    json     drugs.csv, pubmed.json (array), clinical_trials.csv
+    ndjson   drugs.csv, pubmed.json (one record per line), clinical_trials.csv
+    parquet  drugs.parquet, pubmed.parquet, clinical_trials.parquet
+
+Rows are generated and written in chunks, so 10M-row files fit in memory.
+The same (scale, drugs, seed) always gives the same files.
+
+Usage:
+    python benchmarks/synthetic.py --publications 1M --format csv out/
+"""
+
+import argparse
+import csv
+import json
+import random
+import string
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Iterator, List
+
+FORMATS = ("csv", "json", "ndjson", "parquet")
+CHUNK_SIZE = 100_000
+# Most rows use the first format, like the real inputs
+DATE_FORMATS = ["%d/%m/%Y", "%Y-%m-%d", "%d %B %Y"]
+DATE_WEIGHTS = [0.8, 0.15, 0.05]
+PUBLICATION_FIELDS = ["id", "title", "date", "journal"]
+TRIAL_FIELDS = ["id", "scientific_title", "date", "journal"]
+
+
+def parse_count(value: str) -> int:
+    """Parse row counts such as 1000, 1k, 250K or 10M."""
+    value = value.strip().lower().replace("_", "")
+    multiplier = {"k": 1_000, "m": 1_000_000}.get(value[-1:], 1)
+    if multiplier > 1:
+        value = value[:-1]
+    return int(float(value) * multiplier)
+
+
+def random_word(rng: random.Random) -> str:
+    return "".join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 10)))
+
+
+class SyntheticData:
+    """Drug names, vocabulary and journals shared by every generated file."""
+
+    def __init__(self, n_drugs: int, seed: int = 42):
+        self.seed = seed
+        rng = random.Random(seed)
+        names = set()
+        while len(names) < n_drugs:
+            names.add(random_word(rng).upper() + "INE")
+        self.drugs = sorted(names)
+        self.vocabulary = [random_word(rng) for _ in range(5000)]
+        self.journals = [f"Journal of {random_word(rng)}" for _ in range(500)]
+
+    def drug_rows(self) -> List[dict]:
+        return [
+            {"atccode": f"A{i:06d}", "drug": name} for i, name in enumerate(self.drugs)
+        ]
+
+    def publication_rows(
+        self, count: int, source: str, chunk_size: int = CHUNK_SIZE
+    ) -> Iterator[List[dict]]:
+        """Chunks of publication rows; about one in five mentions a drug."""
+        rng = random.Random(f"{self.seed}-{source}")
+        start = date(2019, 1, 1)
+        title_field = "scientific_title" if source == "clinical_trials" else "title"
+        for offset in range(0, count, chunk_size):
+            rows = []
+            for i in range(offset, min(count, offset + chunk_size)):
+                words = rng.choices(self.vocabulary, k=rng.randint(6, 14))
+                if rng.random() < 0.2:
+                    words.insert(
+                        rng.randrange(len(words)), rng.choice(self.drugs).title()
+                    )
+                day = start + timedelta(days=rng.randrange(730))
+                fmt = rng.choices(DATE_FORMATS, DATE_WEIGHTS)[0]
+                rows.append(
+                    {
+                        "id": f"NCT{i:08d}" if source == "clinical_trials" else str(i),
+                        title_field: " ".join(words).capitalize(),
+                        "date": day.strftime(fmt),
+                        "journal": rng.choice(self.journals),
+                    }
+                )
+            yield rows
+
+
+def _write_csv(path: Path, fields: List[str], chunks: Iterator[List[dict]]) -> None:
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=fields)
+        writer.writeheader()
+        for rows in chunks:
+            writer.writerows(rows)
+
+
+def _write_json(path: Path, chunks: Iterator[List[dict]], ndjson: bool) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        if ndjson:
+            for rows in chunks:
+                f.writelines(json.dumps(row) + "\n" for row in rows)
+            return
+        f.write("[\n")
+        first = True
+        for rows in chunks:
+            for row in rows:
+                f.write(("" if first else ",\n") + "  " + json.dumps(row))
+                first = False
+        f.write("\n]\n")
+
+
+def _write_parquet(path: Path, fields: List[str], chunks: Iterator[List[dict]]) -> None:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([(field, pa.string()) for field in fields])
+    with pq.ParquetWriter(path, schema) as writer:
+        for rows in chunks:
+            writer.write_table(pa.Table.from_pylist(rows, schema=schema))
+
+
+def write_dataset(
+    output_dir: Path,
+    fmt: str,
+    n_publications: int,
+    n_drugs: int = 1_000,
+    seed: int = 42,
+    trial_share: float = 0.3,
+) -> Path:
+    """
+    Write a dataset of ``n_publications`` rows (pubmed + clinical trials) in
+    ``fmt`` to ``output_dir`` and return it.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format: {fmt} (expected one of {FORMATS})")
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    data = SyntheticData(n_drugs, seed)
+    n_trials = int(n_publications * trial_share)
+    n_pubmed = n_publications - n_trials
+
+    drugs = iter([data.drug_rows()])
+    pubmed = data.publication_rows(n_pubmed, "pubmed")
+    trials = data.publication_rows(n_trials, "clinical_trials")
+    if fmt == "parquet":
+        _write_parquet(output_dir / "drugs.parquet", ["atccode", "drug"], drugs)
+        _write_parquet(output_dir / "pubmed.parquet", PUBLICATION_FIELDS, pubmed)
+        _write_parquet(output_dir / "clinical_trials.parquet", TRIAL_FIELDS, trials)
+        return output_dir
+
+    _write_csv(output_dir / "drugs.csv", ["atccode", "drug"], drugs)
+    if fmt == "csv":
+        _write_csv(output_dir / "pubmed.csv", PUBLICATION_FIELDS, pubmed)
+    else:
+        _write_json(output_dir / "pubmed.json", pubmed, ndjson=fmt == "ndjson")
+    _write_csv(output_dir / "clinical_trials.csv", TRIAL_FIELDS, trials)
+    return output_dir
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("output_dir", type=Path)
+    parser.add_argument("--publications", type=parse_count, default=parse_count("100k"))
+    parser.add_argument("--drugs", type=parse_count, default=1_000)
+    parser.add_argument("--format", choices=FORMATS, default="csv")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    write_dataset(
+        args.output_dir, args.format, args.publications, args.drugs, args.seed
+    )
+    print(
+        f"Wrote {args.publications} publications ({args.format}) to {args.output_dir}"
+    )
+
+
+if __name__ == "__main__":
+    main()
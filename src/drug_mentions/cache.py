@@ -0,0 +1,136 @@
+"""
+Content-addressed, in-memory LRU cache of pipeline inputs and results.
+
+Entries are keyed on content hashes (see content_key) that include
+pipeline_version(), so editing the pipeline code invalidates them. The cache
+holds at most ``max_bytes``, by the sizes given when storing entries, and
+evicts the least recently used ones first. It is safe to share between
+threads, e.g. the sessions of a Streamlit app.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Hashable, Optional, Tuple
+
+DEFAULT_MAX_BYTES = 256 << 20
+_MISSING = object()
+
+
+@lru_cache(maxsize=1)
+def pipeline_version() -> str:
+    """sha256 of the drug_mentions sources, computed once per process."""
+    digest = hashlib.sha256()
+    package_dir = Path(__file__).parent
+    for path in sorted(package_dir.rglob("*.py")):
+        digest.update(path.relative_to(package_dir).as_posix().encode("utf-8"))
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def content_key(kind: str, *parts: Any) -> str:
+    """
+    Key of an entry of type ``kind`` computed from ``parts``: bytes are
+    hashed as is, other values by their repr. Includes the pipeline version.
+    """
+    digest = hashlib.sha256(pipeline_version().encode("ascii"))
+    for part in (kind, *parts):
+        data = part if isinstance(part, bytes) else repr(part).encode("utf-8")
+        digest.update(len(data).to_bytes(8, "little"))
+        digest.update(data)
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """An LRU mapping from keys to values, capped to ``max_bytes``."""
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        if max_bytes < 0:
+            raise ValueError(f"max_bytes must not be negative, got {max_bytes}")
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Hashable, Tuple[Any, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._key_locks: dict = {}
+        self.size = 0
+        self.hits = self.misses = self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the value of ``key`` (marking it as recently used) or ``default``."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: Hashable, value: Any, size: int) -> None:
+        """
+        Store ``value`` as ``key``, evicting the least recently used entries
+        to stay within max_bytes. Values larger than max_bytes are not kept.
+        """
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size -= previous[1]
+            if size > self.max_bytes:
+                return
+            self._entries[key] = (value, size)
+            self.size += size
+            while self.size > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.size -= evicted_size
+                self.evictions += 1
+
+    def get_or_compute(
+        self,
+        key: Hashable,
+        compute: Callable[[], Any],
+        size: Callable[[Any], int],
+    ) -> Any:
+        """
+        Return the value of ``key``, computing and storing it on a miss.
+        Concurrent callers of the same key wait for a single computation.
+        """
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            with self._lock:
+                entry: Optional[tuple] = self._entries.get(key)
+            if entry is not None:
+                return entry[0]
+            try:
+                value = compute()
+                self.put(key, value, size(value))
+            finally:
+                with self._lock:
+                    self._key_locks.pop(key, None)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.size,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
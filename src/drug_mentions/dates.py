@@ -0,0 +1,83 @@
+from datetime import datetime
+from typing import Any, Dict, Iterable, Optional
+
+try:
+    from dateutil import parser as dateutil_parser
+except ImportError:  # pragma: no cover - dateutil ships with pandas
+    dateutil_parser = None
+
+DATE_FORMATS = [
+    "%Y-%m-%d",
+    "%d/%m/%Y",
+    "%d %B %Y",
+    "%d %b %Y",
+    "%B %d, %Y",
+    "%b %d, %Y",
+]
+
+
+class DateParser:
+    """
+    Date parser that detects the format of a column once and caches results.
+
+    The first format that parses a value is remembered and tried first for the
+    next values, so a column written in a single format costs one strptime per
+    value. Parsed values are cached by their raw string, since the same dates
+    repeat a lot in our inputs. Use one parser per column/file.
+    """
+
+    def __init__(self, formats: Iterable[str] = DATE_FORMATS, cache_size: int = 65536):
+        self.formats = list(formats)
+        self.format: Optional[str] = None
+        self.cache_size = cache_size
+        self._cache: Dict[str, datetime] = {}
+
+    def parse(self, value: Any) -> datetime:
+        """
+        Parse a date string (datetimes are returned as is).
+        Raises ValueError if the date cannot be parsed.
+        """
+        if isinstance(value, datetime):
+            return value
+        if not isinstance(value, str):
+            raise ValueError(f"Expected string date, got {type(value)}: {value}")
+
+        parsed = self._cache.get(value)
+        if parsed is None:
+            parsed = self._parse(value.strip())
+            if len(self._cache) >= self.cache_size:
+                self._cache.clear()
+            self._cache[value] = parsed
+        return parsed
+
+    def _parse(self, text: str) -> datetime:
+        if self.format is not None:
+            try:
+                return datetime.strptime(text, self.format)
+            except ValueError:
+                pass
+
+        for fmt in self.formats:
+            if fmt == self.format:
+                continue
+            try:
+                parsed = datetime.strptime(text, fmt)
+            except ValueError:
+                continue
+            self.format = fmt
+            return parsed
+
+        if dateutil_parser is not None:
+            try:
+                return dateutil_parser.parse(text)
+            except (ValueError, OverflowError):
+                pass
+        raise ValueError(f"Unknown date format: {text}")
+
+
+_shared_parser = DateParser()
+
+
+def parse_date(value: Any) -> datetime:
+    """Parse a date with the process-wide cached DateParser."""
+    return _shared_parser.parse(value)
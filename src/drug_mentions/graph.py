@@ -0,0 +1,188 @@
+"""
+Node/link graph of the drug mentions output, for the network viewer.
+
+build_graph deduplicates the graph on the Python side: one node per drug, per
+journal (shared by the drugs it mentions) and per publication. Publications
+are collapsed into one count node per drug and source unless the drug is
+expanded. Nodes are added by level of detail, each level taking at most half
+of the nodes left in ``max_nodes`` (the last one takes all of them):
+
+1. drugs, most mentioned first, with their count nodes;
+2. the publications of the expanded drugs, taken out of their count nodes;
+3. journals, most mentioned first.
+
+The payload is compact: columns of node fields and of links by node index,
+with what did not fit counted in ``omitted``.
+"""
+
+from collections import Counter
+from typing import Dict, Iterable, List, Tuple
+
+DEFAULT_MAX_NODES = 500
+DEFAULT_MAX_LINKS = 2000
+# Labels longer than this are cut, full titles are not needed to browse
+MAX_LABEL_LENGTH = 80
+
+GROUPS = ("drug", "pubmed", "clinical_trials", "journal")
+_GROUP_INDEX = {group: index for index, group in enumerate(GROUPS)}
+
+
+def _label(text: str) -> str:
+    text = " ".join(str(text).split())
+    if len(text) <= MAX_LABEL_LENGTH:
+        return text
+    return text[: MAX_LABEL_LENGTH - 1] + "…"
+
+
+class _Graph:
+    """Columns of nodes and links under construction, up to ``limit`` nodes."""
+
+    def __init__(self, max_nodes: int):
+        self.max_nodes = self.limit = max_nodes
+        self.label: List[str] = []
+        self.group: List[int] = []
+        self.count: List[int] = []
+        self.links: Dict[Tuple[int, int], int] = {}
+        self.index: Dict[tuple, int] = {}
+
+    def level(self, last: bool = False) -> None:
+        """Start a level of detail, allowed half of the nodes left (or all)."""
+        left = self.max_nodes - len(self.label)
+        self.limit = self.max_nodes if last else len(self.label) + (left + 1) // 2
+
+    def fits(self, nodes: int = 1) -> bool:
+        return len(self.label) + nodes <= self.limit
+
+    def add_node(self, key: tuple, label: str, group: str, count: int) -> int:
+        self.index[key] = len(self.label)
+        self.label.append(_label(label))
+        self.group.append(_GROUP_INDEX.get(group, _GROUP_INDEX["pubmed"]))
+        self.count.append(count)
+        return self.index[key]
+
+    def link(self, source: int, target: int, weight: int) -> None:
+        self.links[source, target] = self.links.get((source, target), 0) + weight
+
+
+def build_graph(
+    results: dict,
+    max_nodes: int = DEFAULT_MAX_NODES,
+    expand: Iterable[str] = (),
+    max_links: int = DEFAULT_MAX_LINKS,
+) -> dict:
+    """
+    Build the graph of ``results`` (the mapping written as drug_mentions.json)
+    with at most ``max_nodes`` nodes and ``max_links`` links, listing the
+    publications of the drugs in ``expand`` (see the module docstring).
+    """
+    if max_nodes < 0 or max_links < 0:
+        raise ValueError("max_nodes and max_links must not be negative")
+    expand = set(expand)
+    publications: Dict[str, Dict[str, Dict[str, str]]] = {}
+    journals: Dict[str, Counter] = {}
+    for drug, entry in results.items():
+        by_source = publications[drug] = {}
+        journals[drug] = Counter()
+        for source, mentions in entry.get("mentions", {}).items():
+            if source == "journals":
+                journals[drug].update(journal["name"] for journal in mentions)
+            elif mentions:
+                # Repeated mentions of a publication count once
+                by_source[source] = {
+                    str(pub.get("id") or pub.get("title")): pub.get("title", "")
+                    for pub in mentions
+                }
+
+    def mentions(drug: str) -> int:
+        # Journal mentions come from the same publications, not counted twice
+        return sum(map(len, publications[drug].values()))
+
+    drugs = sorted(results, key=lambda drug: (-mentions(drug), drug))
+    graph = _Graph(max_nodes)
+    omitted = Counter()
+
+    # 1. drugs and their count nodes
+    graph.level(last=not expand and not any(journals.values()))
+    shown = []
+    for drug in drugs:
+        if not graph.fits(1 + len(publications[drug])):
+            omitted["drugs"] = len(drugs) - len(shown)
+            break
+        shown.append(drug)
+        drug_node = graph.add_node(("drug", drug), drug, "drug", mentions(drug))
+        for source, pubs in publications[drug].items():
+            node = graph.add_node(
+                ("count", drug, source), f"{len(pubs)} {source}", source, len(pubs)
+            )
+            graph.link(drug_node, node, len(pubs))
+
+    # 2. publications of the expanded drugs, shared between them
+    graph.level(last=not any(journals[drug] for drug in shown))
+    for drug in shown:
+        if drug not in expand:
+            continue
+        drug_node = graph.index["drug", drug]
+        for source, pubs in publications[drug].items():
+            remaining = len(pubs)
+            for pub_id, title in pubs.items():
+                key = ("publication", source, pub_id)
+                if key not in graph.index:
+                    if not graph.fits():
+                        break
+                    graph.add_node(key, title, source, 1)
+                graph.link(drug_node, graph.index[key], 1)
+                remaining -= 1
+            if remaining == len(pubs):
+                continue
+            count_node = graph.index["count", drug, source]
+            graph.count[count_node] = remaining
+            graph.label[count_node] = _label(f"{remaining} more {source}")
+            graph.links[drug_node, count_node] = remaining
+
+    # 3. journals, shared by the drugs
+    graph.level(last=True)
+    totals = Counter()
+    for drug in shown:
+        totals.update(journals[drug])
+    for name, total in sorted(totals.items(), key=lambda item: (-item[1], item[0])):
+        if not graph.fits():
+            omitted["journals"] += 1
+            continue
+        node = graph.add_node(("journal", name), name, "journal", total)
+        for drug in shown:
+            if journals[drug][name]:
+                graph.link(graph.index["drug", drug], node, journals[drug][name])
+
+    # Count nodes emptied by the expansion are dropped, then the lightest
+    # links beyond max_links
+    emptied = {
+        node
+        for key, node in graph.index.items()
+        if key[0] == "count" and not graph.count[node]
+    }
+    keep = [node for node in range(len(graph.label)) if node not in emptied]
+    renumber = {node: new for new, node in enumerate(keep)}
+    links = sorted(
+        (
+            (renumber[source], renumber[target], weight)
+            for (source, target), weight in graph.links.items()
+            if source in renumber and target in renumber
+        ),
+        key=lambda link: -link[2],
+    )
+    omitted["links"] = max(len(links) - max_links, 0)
+    links = sorted(links[:max_links])
+    return {
+        "groups": list(GROUPS),
+        "nodes": {
+            "label": [graph.label[node] for node in keep],
+            "group": [graph.group[node] for node in keep],
+            "count": [graph.count[node] for node in keep],
+        },
+        "links": {
+            "source": [link[0] for link in links],
+            "target": [link[1] for link in links],
+            "weight": [link[2] for link in links],
+        },
+        "omitted": {key: omitted[key] for key in ("drugs", "journals", "links")},
+    }
@@ -0,0 +1,119 @@
+"""
+Publication id normalization and interning.
+
+Ids arrive as ints (pubmed.json), numeric strings or floats (pubmed.csv, whose
+id column turns to float as soon as one id is missing) and NCT strings
+(clinical_trials.csv). normalize_id gives them a single string form, once, at
+load time; IdTable then maps each distinct id to a compact integer code so
+that joins and indexes work on ints, and strings are only looked up when
+results are written.
+"""
+
+import math
+import re
+from array import array
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List
+
+import numpy as np
+import pandas as pd
+
+# Decimal numbers with a fraction or an exponent, not plain digits (kept as is)
+_FLOAT_ID = re.compile(r"[+-]?(\d+\.\d*|\.\d+|\d+(?=[eE]))([eE][+-]?\d+)?")
+
+
+def normalize_id(value: Any) -> str:
+    """
+    Return the canonical string form of a publication id: 11, 11.0, "11",
+    "11.0" and " 11 " all give "11". Missing values read by pandas (NaN) give "", like
+    an empty id; None is rejected as a missing id.
+    """
+    if isinstance(value, str):
+        value = value.strip()
+        # "11.0" as read from a CSV as text (e.g. by the mmap reader) is the
+        # id pandas reads as the float 11.0
+        if _FLOAT_ID.fullmatch(value):
+            number = Decimal(value)
+            if number == number.to_integral_value():
+                return str(int(number))
+        return value
+    if value is None:
+        raise ValueError("missing value for 'id'")
+    if isinstance(value, bool):
+        raise ValueError(f"invalid value for 'id': {value!r}")
+    if isinstance(value, (float, Decimal)):
+        if value != value:  # NaN
+            return ""
+        if math.isfinite(value) and value == int(value):
+            return str(int(value))
+        return str(value)
+    if isinstance(value, (int, np.integer)):
+        return str(int(value))
+    if isinstance(value, np.floating):
+        return normalize_id(float(value))
+    raise ValueError(f"invalid value for 'id': {value!r}")
+
+
+def normalize_id_column(values: pd.Series) -> pd.Series:
+    """normalize_id over a column, computed once per distinct value."""
+    codes, uniques = pd.factorize(values, use_na_sentinel=False)
+    normalized = np.array(
+        ["" if value is None else normalize_id(value) for value in uniques],
+        dtype=object,
+    )
+    return pd.Series(normalized[codes], index=values.index, dtype=object)
+
+
+class IdTable:
+    """
+    Interns publication ids into dense integer codes (0, 1, 2...), in order of
+    first appearance, with the reverse lookup table.
+
+    Ids are normalized before interning, so 11 and "11" share a code.
+    """
+
+    def __init__(self, ids: Iterable[Any] = ()):
+        self._codes: Dict[str, int] = {}
+        self._ids: List[str] = []
+        for value in ids:
+            self.intern(value)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __getitem__(self, code: int) -> str:
+        return self._ids[code]
+
+    def __contains__(self, value: Any) -> bool:
+        return normalize_id(value) in self._codes
+
+    def intern(self, value: Any) -> int:
+        """Return the code of ``value``, adding it to the table if new."""
+        if isinstance(value, str):
+            # The table only holds normalized ids, so a hit needs no normalizing
+            code = self._codes.get(value)
+            if code is not None:
+                return code
+        value = normalize_id(value)
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self._ids)
+            self._ids.append(value)
+        return code
+
+    def encode(self, values: Iterable[Any]) -> array:
+        """Intern every value; returns their codes as a compact int array."""
+        return array("l", map(self.intern, values))
+
+    def encode_column(self, values: pd.Series) -> np.ndarray:
+        """Intern a column, once per distinct value; returns an int64 array."""
+        codes, uniques = pd.factorize(values, use_na_sentinel=False)
+        table = np.array(
+            [self.intern("" if value is None else value) for value in uniques],
+            dtype=np.int64,
+        )
+        return table[codes] if len(table) else np.zeros(0, dtype=np.int64)
+
+    def decode(self, codes: Iterable[int]) -> List[str]:
+        """Materialize the id strings of ``codes``."""
+        return [self._ids[code] for code in codes]
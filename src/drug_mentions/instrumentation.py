@@ -0,0 +1,325 @@
+"""
+Per-stage timing and memory instrumentation.
+
+Code marks its hot paths with ``stage("name")`` blocks (or wraps lazy
+iterables with ``timed_iter``). Nothing is measured until an Instrumentation is
+activated: the module-level helpers then forward to it, otherwise they return a
+shared no-op stage, which costs one function call.
+
+Stages with the same name are aggregated (calls, wall time, rows). Stages may
+nest; ``self_seconds`` is the wall time not spent in nested stages. Stages run
+in worker processes are not collected.
+"""
+
+import json
+import sys
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - not available on Windows
+    resource = None
+
+METRIC_PREFIX = "drug_mentions"
+
+
+def peak_rss_bytes() -> Optional[int]:
+    """High-water mark of the process resident set size, if known."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class _NullStage:
+    """Stage handed out when instrumentation is off."""
+
+    def __enter__(self) -> "_NullStage":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        pass
+
+    def add_rows(self, rows: int) -> None:
+        pass
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Frame:
+    __slots__ = ("name", "start", "child_seconds", "rows", "alloc_start", "alloc_peak")
+
+    def __init__(self, name: str, alloc_start: int):
+        self.name = name
+        self.start = time.perf_counter()
+        self.child_seconds = 0.0
+        self.rows = 0
+        self.alloc_start = alloc_start
+        self.alloc_peak = alloc_start
+
+
+class _Totals:
+    """Measurements of a stage execution, summed over the frames it spanned."""
+
+    __slots__ = ("seconds", "self_seconds", "rows", "alloc", "alloc_peak")
+
+    def __init__(self):
+        self.seconds = self.self_seconds = 0.0
+        self.rows = self.alloc = self.alloc_peak = 0
+
+    def add(self, frame: _Frame, seconds: float, alloc: int, alloc_peak: int) -> None:
+        self.seconds += seconds
+        self.self_seconds += seconds - frame.child_seconds
+        self.rows += frame.rows
+        self.alloc += alloc
+        self.alloc_peak = max(self.alloc_peak, alloc_peak)
+
+
+class _Stage:
+    """Context manager measuring one execution of a stage."""
+
+    def __init__(self, instrumentation: "Instrumentation", name: str, rows: int):
+        self._instrumentation = instrumentation
+        self._name = name
+        self._rows = rows
+        self._frame = None
+
+    def __enter__(self) -> "_Stage":
+        self._frame = self._instrumentation._enter(self._name)
+        self._frame.rows = self._rows
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._instrumentation._exit(self._frame)
+
+    def add_rows(self, rows: int) -> None:
+        self._frame.rows += rows
+
+
+class Instrumentation:
+    """
+    Collects per-stage wall time, rows, rows/sec and peak RSS, plus allocation
+    deltas (net and peak, through tracemalloc) when ``trace_alloc`` is set.
+    tracemalloc slows allocation-heavy code down noticeably, so it is opt-in.
+    """
+
+    def __init__(self, trace_alloc: bool = False):
+        self.trace_alloc = trace_alloc
+        self._started_tracemalloc = False
+        if trace_alloc and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        self._start = time.perf_counter()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._stages: Dict[str, dict] = {}
+
+    def close(self) -> None:
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    def stage(self, name: str, rows: int = 0) -> _Stage:
+        """Measure a ``with`` block as stage ``name``; rows can be added with add_rows."""
+        return _Stage(self, name, rows)
+
+    def timed_iter(self, name: str, iterable: Iterable) -> Iterator:
+        """
+        Yield the items of ``iterable``, measuring the time spent producing them
+        as one execution of stage ``name`` (one row per item). For generators
+        consumed by another stage, e.g. matches streamed into the writer.
+        """
+        iterator = iter(iterable)
+        total = _Totals()
+        try:
+            while True:
+                frame = self._enter(name)
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    total.add(frame, *self._pop(frame))
+                    return
+                frame.rows = 1
+                total.add(frame, *self._pop(frame))
+                yield item
+        finally:
+            self._record(name, total)
+
+    def _stack(self) -> List[_Frame]:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _enter(self, name: str) -> _Frame:
+        alloc_start = 0
+        if self.trace_alloc:
+            alloc_start = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        frame = _Frame(name, alloc_start)
+        self._stack().append(frame)
+        return frame
+
+    def _pop(self, frame: _Frame) -> Tuple[float, int, int]:
+        """Close ``frame``: returns its wall time, net and peak allocations."""
+        seconds = time.perf_counter() - frame.start
+        stack = self._stack()
+        if stack and stack[-1] is frame:
+            stack.pop()
+        else:
+            stack.remove(frame)
+        alloc = alloc_peak = 0
+        if self.trace_alloc:
+            current, peak = tracemalloc.get_traced_memory()
+            # Nested stages reset the peak, they hand theirs up
+            frame.alloc_peak = max(frame.alloc_peak, peak)
+            alloc = current - frame.alloc_start
+            alloc_peak = frame.alloc_peak - frame.alloc_start
+        if stack:
+            parent = stack[-1]
+            parent.child_seconds += seconds
+            parent.alloc_peak = max(parent.alloc_peak, frame.alloc_peak)
+        return seconds, alloc, alloc_peak
+
+    def _exit(self, frame: _Frame) -> None:
+        total = _Totals()
+        total.add(frame, *self._pop(frame))
+        self._record(frame.name, total)
+
+    def _record(self, name: str, total: "_Totals") -> None:
+        rss = peak_rss_bytes()
+        with self._lock:
+            stats = self._stages.get(name)
+            if stats is None:
+                stats = self._stages[name] = {
+                    "stage": name,
+                    "calls": 0,
+                    "seconds": 0.0,
+                    "self_seconds": 0.0,
+                    "rows": 0,
+                    "alloc_bytes": 0,
+                    "alloc_peak_bytes": 0,
+                    "peak_rss_bytes": None,
+                }
+            stats["calls"] += 1
+            stats["seconds"] += total.seconds
+            stats["self_seconds"] += total.self_seconds
+            stats["rows"] += total.rows
+            stats["alloc_bytes"] += total.alloc
+            stats["alloc_peak_bytes"] = max(stats["alloc_peak_bytes"], total.alloc_peak)
+            stats["peak_rss_bytes"] = rss
+
+    def report(self) -> dict:
+        """The run report: one entry per stage, in order of first use."""
+        with self._lock:
+            stages = [dict(stats) for stats in self._stages.values()]
+        for stats in stages:
+            seconds = stats["seconds"]
+            stats["rows_per_second"] = stats["rows"] / seconds if seconds else None
+            if not self.trace_alloc:
+                del stats["alloc_bytes"], stats["alloc_peak_bytes"]
+        return {
+            "total_seconds": time.perf_counter() - self._start,
+            "peak_rss_bytes": peak_rss_bytes(),
+            "trace_alloc": self.trace_alloc,
+            "stages": stages,
+        }
+
+    def write_json(self, output_path: Path) -> None:
+        """Write the run report as JSON."""
+        output_path = Path(output_path)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(output_path, "w", encoding="utf-8") as f:
+            json.dump(self.report(), f, indent=2)
+
+    def write_openmetrics(self, output_path: Path) -> None:
+        """Write the run report in the OpenMetrics text format (gauges)."""
+        report = self.report()
+        metrics = [
+            ("stage_seconds", "seconds", "Wall time per stage", "seconds"),
+            (
+                "stage_self_seconds",
+                "seconds",
+                "Wall time outside nested stages",
+                "self_seconds",
+            ),
+            ("stage_calls", None, "Executions per stage", "calls"),
+            ("stage_rows", None, "Rows processed per stage", "rows"),
+            ("stage_rows_per_second", None, "Throughput per stage", "rows_per_second"),
+            (
+                "stage_peak_rss_bytes",
+                "bytes",
+                "Peak RSS at the end of the stage",
+                "peak_rss_bytes",
+            ),
+        ]
+        if self.trace_alloc:
+            metrics += [
+                ("stage_alloc_bytes", "bytes", "Net traced allocations", "alloc_bytes"),
+                (
+                    "stage_alloc_peak_bytes",
+                    "bytes",
+                    "Peak traced allocations",
+                    "alloc_peak_bytes",
+                ),
+            ]
+
+        lines = []
+        for metric, unit, help_text, key in metrics:
+            name = f"{METRIC_PREFIX}_{metric}"
+            lines.append(f"# TYPE {name} gauge")
+            if unit:
+                lines.append(f"# UNIT {name} {unit}")
+            lines.append(f"# HELP {name} {help_text}.")
+            for stats in report["stages"]:
+                if stats[key] is not None:
+                    lines.append(f'{name}{{stage="{stats["stage"]}"}} {stats[key]}')
+        for metric, unit, key in (
+            ("run_seconds", "seconds", "total_seconds"),
+            ("peak_rss_bytes", "bytes", "peak_rss_bytes"),
+        ):
+            if report[key] is not None:
+                name = f"{METRIC_PREFIX}_{metric}"
+                lines += [
+                    f"# TYPE {name} gauge",
+                    f"# UNIT {name} {unit}",
+                    f"{name} {report[key]}",
+                ]
+        lines.append("# EOF")
+
+        output_path = Path(output_path)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        output_path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+_active: Optional[Instrumentation] = None
+
+
+def activate(instrumentation: Optional[Instrumentation]) -> None:
+    """Send the module-level stage/timed_iter calls to ``instrumentation`` (None: off)."""
+    global _active
+    _active = instrumentation
+
+
+def active() -> Optional[Instrumentation]:
+    return _active
+
+
+def stage(name: str, rows: int = 0):
+    """Measure a ``with`` block with the active Instrumentation, if any."""
+    if _active is None:
+        return _NULL_STAGE
+    return _active.stage(name, rows)
+
+
+def timed_iter(name: str, iterable: Iterable) -> Iterable:
+    """Measure the production of ``iterable`` with the active Instrumentation, if any."""
+    if _active is None:
+        return iterable
+    return _active.timed_iter(name, iterable)
@@ -1,48 +1,442 @@
+import argparse
+import tempfile
+from contextlib import ExitStack
+from itertools import chain
 from pathlib import Path
 
-from drug_mentions.pipeline.loader import DataLoader
-from drug_mentions.pipeline.transformer import DataTransformer
-from drug_mentions.pipeline.writer import DataWriter
+from drug_mentions.instrumentation import Instrumentation, activate, timed_iter
+from drug_mentions.pipeline.aggregates import JournalIndex
+from drug_mentions.pipeline.incremental import (
+    StateStore,
+    fingerprint_file,
+    fingerprint_files,
+    iter_hits_incremental,
+)
+from drug_mentions.pipeline.loader import LOAD_EXECUTORS, RECORD_TYPES, DataLoader
+from drug_mentions.pipeline.runner import BACKENDS
+from drug_mentions.pipeline.stages import run_local
+from drug_mentions.pipeline.transformer import (
+    DEFAULT_SHARD_SIZE,
+    JOURNAL_DEDUP_MODES,
+    MATCH_MODES,
+    DataTransformer,
+    PublicationSet,
+)
+from drug_mentions.pipeline.writer import WRITE_FORMATS, DataWriter
+from drug_mentions.query import MentionIndex, serve
 
+JOURNAL_INDEX_FILE = "journal_index.json"
 
-def main():
-    print("Drug Mention Finder")
+
+def positive_int(value: str) -> int:
+    """argparse type for counts that must be at least 1."""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected an integer, got {value!r}")
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="drug-mentions", description="Drug Mention Finder"
+    )
+    parser.add_argument(
+        "--match-mode",
+        choices=MATCH_MODES,
+        default="substring",
+        help="substring: case-insensitive substring match (default), "
+        "token: whole-word match through an inverted token index",
+    )
+    parser.add_argument(
+        "--journal-dedup",
+        choices=JOURNAL_DEDUP_MODES,
+        default="none",
+        help="drop repeated entries from each drug's journals list: none "
+        "(default, one entry per mention), journal (one per journal) or "
+        "journal_date (one per journal and date)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=positive_int,
+        default=1,
+        help="number of processes used to match drugs (default: 1, serial)",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="read publications incrementally in bounded memory "
+        "instead of loading them all up front",
+    )
+    parser.add_argument(
+        "--columnar",
+        action="store_true",
+        help="load publications into a columnar table (vectorized parsing) "
+        "instead of one pydantic object per row",
+    )
+    parser.add_argument(
+        "--records",
+        choices=RECORD_TYPES,
+        default="pydantic",
+        help="record type built by the loaders: pydantic models (default), "
+        "lightweight __slots__ records validated in bulk, or __slots__ records "
+        "read from memory-mapped CSV/JSON files, decoding titles on use",
+    )
+    parser.add_argument(
+        "--load-executor",
+        choices=LOAD_EXECUTORS,
+        default="serial",
+        help="read the input files one after the other (default), or "
+        "concurrently with threads or processes, printing the time per file",
+    )
+    parser.add_argument(
+        "--skip-invalid-json",
+        action="store_true",
+        help="skip invalid records in pubmed.json (reported with their line) "
+        "instead of failing",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="reuse the matches of the previous run and only match new or "
+        "changed publications and new drugs",
+    )
+    parser.add_argument(
+        "--state",
+        type=Path,
+        default=None,
+        help="state file used by --incremental "
+        "(default: drug_mentions.state.sqlite next to the output)",
+    )
+    parser.add_argument(
+        "--backend",
+        choices=BACKENDS,
+        default=None,
+        help="run the staged pipeline (inputs staged as Parquet shards, "
+        "matched shard by shard) on this backend, with up to --workers "
+        "workers; dask runs a local Dask cluster",
+    )
+    parser.add_argument(
+        "--staging-dir",
+        type=Path,
+        default=None,
+        help="directory kept for the staged files of --backend "
+        "(default: a temporary directory, removed after the run)",
+    )
+    parser.add_argument(
+        "--report",
+        type=Path,
+        default=None,
+        help="write a JSON run report with the wall time, rows/sec and peak "
+        "RSS of each load/transform/write stage",
+    )
+    parser.add_argument(
+        "--openmetrics",
+        type=Path,
+        default=None,
+        help="write the same per-stage metrics in the OpenMetrics text format",
+    )
+    parser.add_argument(
+        "--trace-alloc",
+        action="store_true",
+        help="add per-stage allocation deltas to the report (tracemalloc, "
+        "slows the run down)",
+    )
+    parser.add_argument(
+        "--format",
+        choices=WRITE_FORMATS + ("parquet",),
+        default="pretty",
+        help="output layout: indented JSON (default), compact JSON, "
+        "NDJSON with one drug per line, or a Parquet drug/publication edge table",
+    )
+    parser.add_argument(
+        "--shard-size",
+        type=int,
+        default=DEFAULT_SHARD_SIZE,
+        help=f"publications per shard with --backend (default: {DEFAULT_SHARD_SIZE})",
+    )
+    commands = parser.add_subparsers(dest="command")
+    top_journals = commands.add_parser(
+        "top-journals",
+        help="print the journals mentioning the most distinct drugs, "
+        f"from the {JOURNAL_INDEX_FILE} written by the last run",
+    )
+    top_journals.add_argument(
+        "-k",
+        type=int,
+        default=1,
+        help="number of journals to print (default: 1)",
+    )
+    serve = commands.add_parser(
+        "serve",
+        help="answer drug/journal/source/date queries over the last output "
+        "from a local HTTP endpoint",
+    )
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args(argv)
+    if args.backend is not None and (
+        args.incremental
+        or args.stream
+        or args.columnar
+        or args.records != "pydantic"
+        or args.load_executor != "serial"
+    ):
+        parser.error(
+            "--backend cannot be combined with --incremental, --stream, "
+            "--columnar, --records or --load-executor: the staged pipeline "
+            "loads the inputs itself, into Parquet shards"
+        )
+    if args.load_executor != "serial" and (args.stream or args.columnar):
+        parser.error(
+            "--load-executor thread|process cannot be combined with --stream or "
+            "--columnar, which read the inputs one after the other"
+        )
+    return args
+
+
+def print_top_journals(index_file: Path, k: int) -> None:
+    if not index_file.exists():
+        raise FileNotFoundError(
+            f"{index_file} not found, run drug-mentions to build it first"
+        )
+    for entry in JournalIndex.load(index_file).top(k):
+        print(
+            f"{entry['journal']}: {entry['distinct_drugs']} distinct drugs "
+            f"({', '.join(entry['drugs'])})"
+        )
+
+
+def run_staged(
+    args: argparse.Namespace, data_dir: Path, output_file: Path, index_file: Path
+) -> None:
+    """Run the staged pipeline (see pipeline.stages) on args.backend."""
+    print(f"Running the staged pipeline ({args.backend} backend)...")
+    with ExitStack() as stack:
+        staging_dir = args.staging_dir or stack.enter_context(
+            tempfile.TemporaryDirectory(prefix="drug_mentions-")
+        )
+        result = run_local(
+            data_dir,
+            staging_dir,
+            output_file,
+            backend=args.backend,
+            max_workers=args.workers if args.workers > 1 else None,
+            shard_size=args.shard_size,
+            skip_invalid_json=args.skip_invalid_json,
+            match_mode=args.match_mode,
+            output_format=args.format,
+            journal_dedup=args.journal_dedup,
+            index_file=index_file,
+        )
+    if args.format == "parquet":
+        print(f"Found {result['count']} drug mentions")
+    else:
+        print(f"Found mentions for {result['count']} drugs")
+    print(f"Results written to {output_file}")
+    print(f"Journal index written to {index_file}")
+
+
+def write_reports(instrumentation: Instrumentation, args: argparse.Namespace) -> None:
+    if args.report:
+        instrumentation.write_json(args.report)
+        print(f"Run report written to {args.report}")
+    if args.openmetrics:
+        instrumentation.write_openmetrics(args.openmetrics)
+        print(f"Metrics written to {args.openmetrics}")
+
+
+def main(argv=None):
+    args = parse_args(argv)
     # Set up paths
     base_dir = Path(__file__).parent.parent
     data_dir = base_dir / "data" / "input"
     output_dir = base_dir / "data" / "output"
-    output_file = output_dir / "drug_mentions.json"
+    suffix = ".parquet" if args.format == "parquet" else ".json"
+    output_file = output_dir / f"drug_mentions{suffix}"
+    index_file = output_dir / JOURNAL_INDEX_FILE
+    if args.command == "top-journals":
+        print_top_journals(index_file, args.k)
+        return
+    if args.command == "serve":
+        print(f"Loading {output_file}...")
+        serve(
+            MentionIndex.load(output_file),
+            args.host,
+            args.port,
+            on_start=lambda url: print(f"Serving drug mention queries on {url}"),
+        )
+        return
+
+    print("Drug Mention Finder")
+
+    state = None
+    if args.incremental:
+        state = StateStore(args.state or output_dir / "drug_mentions.state.sqlite")
+        fingerprints = fingerprint_files(
+            data_dir / name
+            for name in (
+                "drugs.csv",
+                "drugs.parquet",
+                "pubmed.csv",
+                "pubmed.json",
+                "pubmed.parquet",
+                "clinical_trials.csv",
+                "clinical_trials.parquet",
+            )
+        )
+        if (
+            output_file.exists()
+            and index_file.exists()
+            and state.get_meta("output_format") == args.format
+            and state.get_meta("journal_dedup") == args.journal_dedup
+            # A run that skipped (or failed on) invalid records differs
+            and state.get_meta("records") == args.records
+            and state.get_meta("skip_invalid_json") == str(args.skip_invalid_json)
+            # Another run may have rewritten the outputs since
+            and state.get_meta("output_fingerprint") == fingerprint_file(output_file)
+            and state.get_meta("index_fingerprint") == fingerprint_file(index_file)
+            and state.inputs_unchanged(fingerprints, args.match_mode)
+        ):
+            print(f"Inputs unchanged, keeping {output_file}")
+            state.close()
+            return
+
+    instrumentation = None
+    if args.report or args.openmetrics:
+        instrumentation = Instrumentation(trace_alloc=args.trace_alloc)
+        activate(instrumentation)
 
     try:
+        if args.backend is not None:
+            run_staged(args, data_dir, output_file, index_file)
+            if instrumentation is not None:
+                write_reports(instrumentation, args)
+            return
+
         # Init loader
-        loader = DataLoader(data_dir)
+        loader = DataLoader(
+            data_dir,
+            record_type=args.records,
+            skip_invalid_json=args.skip_invalid_json,
+        )
 
         # Load data
-        print("Loading drugs...")
-        drugs = loader.load_drugs()
-        print(f"Loaded {len(drugs)} drugs")
+        if args.load_executor != "serial":
+            print(f"Loading all inputs ({args.load_executor} executor)...")
+            inputs = loader.load_all(executor=args.load_executor)
+            print(inputs.report())
+            drugs = inputs.drugs
+            print(f"Loaded {len(drugs)} drugs")
+        else:
+            inputs = None
+            print("Loading drugs...")
+            drugs = loader.load_drugs()
+            print(f"Loaded {len(drugs)} drugs")
 
-        print("Loading publications...")
-        pubmed_pubs = loader.load_pubmed()
-        clinical_trials = loader.load_clinical_trials()
-        all_publications = pubmed_pubs + clinical_trials
-        print(f"Loaded {len(all_publications)} publications")
+        if args.stream:
+            print("Streaming publications...")
+            all_publications = timed_iter(
+                "load.publications",
+                chain(loader.iter_pubmed(), loader.iter_clinical_trials()),
+            )
+        elif args.columnar:
+            print("Loading publications...")
+            all_publications = loader.load_publications_frame()
+            print(f"Loaded {len(all_publications)} publications")
+        else:
+            print("Loading publications...")
+            all_publications = PublicationSet.from_sources(
+                pubmed=inputs.pubmed if inputs else loader.load_pubmed(),
+                clinical_trials=(
+                    inputs.clinical_trials if inputs else loader.load_clinical_trials()
+                ),
+            )
+            print(
+                f"Loaded {len(all_publications)} publications "
+                f"({len(all_publications.pubmed)} pubmed, "
+                f"{len(all_publications.clinical_trials)} clinical trials)"
+            )
 
         # Transform data
         print("Finding drug mentions...")
         transformer = DataTransformer()
-        mentions = transformer.find_drug_mentions(drugs, all_publications)
-        print(f"Found mentions for {len(mentions)} drugs")
+        if state is not None:
+            hits, stats = iter_hits_incremental(
+                drugs,
+                all_publications,
+                state,
+                match_mode=args.match_mode,
+                workers=args.workers,
+            )
+            print(
+                f"Matched {stats.new_publications} new publications and "
+                f"{stats.new_drugs} new drugs "
+                f"({stats.removed_publications} publications and "
+                f"{stats.removed_drugs} drugs removed)"
+            )
+        else:
+            # Streamed into the writer
+            hits = transformer.iter_hits(
+                drugs,
+                transformer.prepare(all_publications),
+                match_mode=args.match_mode,
+                workers=args.workers,
+            )
+
+        # Journal aggregates are collected as the hits go to the writer
+        journal_index = JournalIndex()
+        hits = journal_index.observe(drugs, hits)
 
         # Write results
         print("Writing results...")
         writer = DataWriter()
-        writer.write_json(mentions, output_file)
+        if args.format == "parquet":
+            count = writer.write_parquet(
+                transformer.iter_edges(drugs, hits), output_file
+            )
+            print(f"Found {count} drug mentions")
+        else:
+            count = writer.write_json(
+                transformer.iter_mentions(drugs, hits, args.journal_dedup),
+                output_file,
+                output_format=args.format,
+            )
+            print(f"Found mentions for {count} drugs")
         print(f"Results written to {output_file}")
+        if loader.json_errors:
+            # Only known once the (possibly streamed) input was fully read
+            print(f"Skipped {len(loader.json_errors)} invalid JSON records:")
+            for error in loader.json_errors[:5]:
+                print(f"  {error}")
+        writer.write_json(journal_index.to_dict(), index_file)
+        print(f"Journal index written to {index_file}")
+
+        if state is not None:
+            # Only record the inputs once the output matches them
+            state.set_file_fingerprints(fingerprints)
+            state.set_meta("output_format", args.format)
+            state.set_meta("journal_dedup", args.journal_dedup)
+            state.set_meta("records", args.records)
+            state.set_meta("skip_invalid_json", str(args.skip_invalid_json))
+            state.set_meta("output_fingerprint", fingerprint_file(output_file))
+            state.set_meta("index_fingerprint", fingerprint_file(index_file))
+            state.commit()
+
+        if instrumentation is not None:
+            write_reports(instrumentation, args)
 
     except Exception as e:
         print(f"Error: {str(e)}")
         raise
+    finally:
+        if state is not None:
+            state.close()
+        if instrumentation is not None:
+            activate(None)
+            instrumentation.close()
 
 
 if __name__ == "__main__":
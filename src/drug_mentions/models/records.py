@@ -0,0 +1,164 @@
+"""
+Lightweight __slots__ records mirroring the pydantic schema.
+
+Drug and Publication (schema.py) remain the public schema. These records skip
+the per-instance dict and per-field validation of pydantic; rows are checked
+in bulk by validate_drugs / validate_publications instead.
+
+Publications read from memory-mapped files keep their title as a MappedText,
+decoded only when the title is used.
+"""
+
+from dataclasses import dataclass
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Callable, Iterable, List, NamedTuple, Optional, Tuple, Union
+
+from drug_mentions.dates import DateParser
+from drug_mentions.ids import normalize_id
+from drug_mentions.models.schema import Drug, Publication
+
+
+class RowError(NamedTuple):
+    """A row rejected by validation: input file, 0-based record index and reason."""
+
+    file: str
+    row: int
+    message: str
+
+    def __str__(self) -> str:
+        return f"{self.file} (record {self.row}): {self.message}"
+
+
+class MappedText:
+    """
+    A text field left in a memory-mapped input file (see pipeline/mapped.py):
+    only its byte offset and length are kept, and it is decoded on str().
+    """
+
+    __slots__ = ("source", "offset", "length", "unescape")
+
+    def __init__(
+        self,
+        source: Any,
+        offset: int,
+        length: int,
+        unescape: Optional[Callable[[str], str]] = None,
+    ):
+        self.source = source
+        self.offset = offset
+        self.length = length
+        self.unescape = unescape
+
+    def __str__(self) -> str:
+        text = self.source.text(self.offset, self.length)
+        return text if self.unescape is None else self.unescape(text)
+
+    def __repr__(self) -> str:
+        return f"MappedText({str(self)!r})"
+
+    def __reduce__(self):
+        # The map cannot be pickled: other processes receive a plain str
+        return str, (str(self),)
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, (str, MappedText)):
+            return str(self) == str(other)
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash(str(self))
+
+    def lower(self) -> str:
+        return str(self).lower()
+
+
+@dataclass(frozen=True, slots=True)
+class DrugRecord:
+    atccode: str
+    drug: str
+
+    def to_model(self) -> Drug:
+        return Drug(atccode=self.atccode, drug=self.drug)
+
+
+@dataclass(frozen=True, slots=True)
+class PublicationRecord:
+    id: str
+    # MappedText when read with DataLoader(record_type="mmap")
+    title: Union[str, MappedText]
+    date: datetime
+    journal: str
+    source: str = "pubmed"
+
+    def to_model(self) -> Publication:
+        return Publication(
+            id=self.id,
+            title=str(self.title),
+            date=self.date,
+            journal=self.journal,
+            source=self.source,
+        )
+
+
+def _to_str(row: dict, field: str) -> str:
+    """Coerce a field the way pydantic str fields do (e.g. 9 -> "9")."""
+    value = row.get(field)
+    if isinstance(value, str):
+        return value
+    if value is None:
+        raise ValueError(f"missing value for '{field}'")
+    if isinstance(value, (int, float, Decimal)):
+        return str(value)
+    raise ValueError(f"invalid value for '{field}': {value!r}")
+
+
+def _to_text(row: dict, field: str) -> Any:
+    """Like _to_str, but keeps MappedText fields undecoded."""
+    value = row.get(field)
+    if isinstance(value, MappedText):
+        return value
+    return _to_str(row, field)
+
+
+def validate_drugs(
+    rows: Iterable[dict], file: str = "", start: int = 0
+) -> Tuple[List[DrugRecord], List[RowError]]:
+    """Build DrugRecords from raw rows, collecting one RowError per invalid row."""
+    records, errors = [], []
+    for index, row in enumerate(rows, start=start):
+        try:
+            records.append(
+                DrugRecord(atccode=_to_str(row, "atccode"), drug=_to_str(row, "drug"))
+            )
+        except ValueError as e:
+            errors.append(RowError(file, index, str(e)))
+    return records, errors
+
+
+def validate_publications(
+    rows: Iterable[dict], file: str = "", start: int = 0
+) -> Tuple[List[PublicationRecord], List[RowError]]:
+    """
+    Build PublicationRecords from raw rows, collecting one RowError per invalid
+    row. Applies the same rules as Publication: scientific_title is used when
+    title is missing, and the date format is detected once for all rows.
+    """
+    parser = DateParser()
+    records, errors = [], []
+    for index, row in enumerate(rows, start=start):
+        if "title" not in row and "scientific_title" in row:
+            row = {**row, "title": row["scientific_title"]}
+        try:
+            records.append(
+                PublicationRecord(
+                    id=normalize_id(row.get("id")),
+                    title=_to_text(row, "title"),
+                    date=parser.parse(row.get("date")),
+                    journal=_to_str(row, "journal"),
+                    source=_to_str(row, "source") if "source" in row else "pubmed",
+                )
+            )
+        except ValueError as e:
+            errors.append(RowError(file, index, str(e)))
+    return records, errors
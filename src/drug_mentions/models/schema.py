@@ -3,6 +3,9 @@ from typing import Any
 
 from pydantic import BaseModel, root_validator, validator
 
+from drug_mentions.dates import parse_date
+from drug_mentions.ids import normalize_id
+
 
 class Drug(BaseModel):
     atccode: str
@@ -22,30 +25,13 @@ class Publication(BaseModel):
             values["title"] = values["scientific_title"]
         return values
 
+    @validator("id", pre=True)
+    def normalize_id_field(cls, value: Any) -> str:
+        return normalize_id(value)
+
     @validator("date", pre=True)
     def parse_date_field(cls, value: Any) -> datetime:
-        if isinstance(value, datetime):
-            return value
-        formats = [
-            "%Y-%m-%d",  # different date formats
-            "%d/%m/%Y",
-            "%d %B %Y",
-            "%d %b %Y",
-            "%B %d, %Y",
-            "%b %d, %Y",
-        ]
-        for fmt in formats:
-            try:
-                return datetime.strptime(value, fmt)
-            except Exception:
-                continue
-        # Fall back to dateutil if available
-        try:
-            from dateutil import parser
-
-            return parser.parse(value)
-        except Exception as e:
-            raise ValueError(f"Invalid date format: {value}") from e
+        return parse_date(value)
 
 
 class DrugMention(BaseModel):
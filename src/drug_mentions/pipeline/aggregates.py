@@ -0,0 +1,86 @@
+import json
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Set, Tuple
+
+from drug_mentions.models.schema import Drug
+from drug_mentions.pipeline.transformer import PreparedPublication
+
+
+class JournalIndex:
+    """
+    Journal -> distinct drugs aggregate, built during the transform pass.
+
+    It answers "which journal mentions the most distinct drugs" without
+    rescanning the drug mentions output. Saved as JSON next to the output,
+    with the journals already ranked.
+    """
+
+    def __init__(self):
+        self._drugs: Dict[str, Set[str]] = {}
+        self._ranking: List[Tuple[str, int]] = None
+
+    def add(self, journal: str, drug: str) -> None:
+        name = journal.strip() if journal is not None else ""
+        if name:
+            self._drugs.setdefault(name, set()).add(drug)
+            self._ranking = None
+
+    def observe(
+        self,
+        drugs: List[Drug],
+        hits: Iterable[Tuple[PreparedPublication, Set[int]]],
+    ) -> Iterator[Tuple[PreparedPublication, Set[int]]]:
+        """Pass (publication, drug indexes) pairs through, recording journals."""
+        for pub, drug_indexes in hits:
+            for index in drug_indexes:
+                self.add(pub.journal, drugs[index].drug)
+            yield pub, drug_indexes
+
+    @classmethod
+    def from_mentions(cls, mentions: Dict[str, dict]) -> "JournalIndex":
+        """Build the index from a drug mentions mapping (the JSON output)."""
+        index = cls()
+        for drug, details in mentions.items():
+            for journal in details.get("mentions", {}).get("journals", []):
+                index.add(journal.get("name"), drug)
+        return index
+
+    def ranking(self) -> List[Tuple[str, int]]:
+        """Journals by number of distinct drugs, most first (ties by name)."""
+        if self._ranking is None:
+            self._ranking = sorted(
+                ((name, len(drugs)) for name, drugs in self._drugs.items()),
+                key=lambda item: (-item[1], item[0]),
+            )
+        return self._ranking
+
+    def top(self, k: int = 1) -> List[dict]:
+        """The k journals mentioning the most distinct drugs."""
+        return [
+            {"journal": name, "distinct_drugs": count, "drugs": self.drugs(name)}
+            for name, count in self.ranking()[:k]
+        ]
+
+    def drugs(self, journal: str) -> List[str]:
+        return sorted(self._drugs.get(journal, ()))
+
+    def to_dict(self) -> dict:
+        return {
+            "ranking": [
+                {"journal": name, "distinct_drugs": count, "drugs": self.drugs(name)}
+                for name, count in self.ranking()
+            ]
+        }
+
+    @classmethod
+    def load(cls, path: Path) -> "JournalIndex":
+        """Load an index saved with DataWriter.write_json(index.to_dict(), path)."""
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        index = cls()
+        for entry in data["ranking"]:
+            index._drugs[entry["journal"]] = set(entry["drugs"])
+        index._ranking = [
+            (entry["journal"], entry["distinct_drugs"]) for entry in data["ranking"]
+        ]
+        return index
@@ -0,0 +1,61 @@
+from typing import Iterator, List
+
+import numpy as np
+import pandas as pd
+
+from drug_mentions.ids import IdTable
+from drug_mentions.models.records import RowError
+from drug_mentions.models.schema import Publication
+
+PUBLICATION_COLUMNS = ["id", "title", "date", "journal", "source"]
+
+
+def require_pyarrow():
+    """Import pyarrow, which is only needed for Parquet/Arrow I/O."""
+    try:
+        import pyarrow
+        import pyarrow.parquet  # noqa: F401
+    except ImportError as e:
+        raise ImportError(
+            "Parquet support requires pyarrow "
+            "(poetry install -E parquet, or pip install pyarrow)"
+        ) from e
+    return pyarrow
+
+
+class PublicationFrame:
+    """
+    Publications kept as a columnar table (id, title, date, journal, source).
+
+    Publication objects are only built on demand, when iterating the frame.
+    Rows rejected while building the table are listed in ``errors``.
+    """
+
+    def __init__(self, df: pd.DataFrame, errors: List[RowError] = None):
+        self.df = df[PUBLICATION_COLUMNS].reset_index(drop=True)
+        self.errors = list(errors or [])
+
+    def __len__(self) -> int:
+        return len(self.df)
+
+    def __iter__(self) -> Iterator[Publication]:
+        for record in self.df.to_dict("records"):
+            yield Publication(**record)
+
+    def id_codes(self, ids: IdTable) -> np.ndarray:
+        """The ids of the rows, interned in ``ids``."""
+        return ids.encode_column(self.df["id"])
+
+    def to_publications(self) -> List[Publication]:
+        """Build the Publication objects for every row."""
+        return list(self)
+
+    @classmethod
+    def concat(cls, frames: List["PublicationFrame"]) -> "PublicationFrame":
+        """Stack frames in order, keeping all their errors."""
+        if not frames:
+            return cls(pd.DataFrame(columns=PUBLICATION_COLUMNS))
+        return cls(
+            pd.concat([frame.df for frame in frames], ignore_index=True),
+            [error for frame in frames for error in frame.errors],
+        )
@@ -0,0 +1,271 @@
+import hashlib
+import sqlite3
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple, Union
+
+from drug_mentions.instrumentation import stage
+from drug_mentions.models.schema import Drug, Publication
+from drug_mentions.pipeline.columnar import PublicationFrame
+from drug_mentions.pipeline.transformer import (
+    DEFAULT_SHARD_SIZE,
+    DataTransformer,
+    PreparedPublication,
+    PublicationSet,
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS files (name TEXT PRIMARY KEY, fingerprint TEXT);
+CREATE TABLE IF NOT EXISTS publications (key TEXT PRIMARY KEY);
+CREATE TABLE IF NOT EXISTS drugs (drug TEXT PRIMARY KEY);
+CREATE TABLE IF NOT EXISTS matches (pub_key TEXT, drug TEXT, PRIMARY KEY (pub_key, drug));
+CREATE INDEX IF NOT EXISTS matches_by_drug ON matches (drug);
+"""
+
+
+def fingerprint_file(path: Path) -> str:
+    """sha256 of a file's content."""
+    with open(path, "rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+def fingerprint_files(paths: Iterable[Path]) -> Dict[str, str]:
+    """Fingerprint the input files that exist, keyed by file name."""
+    return {path.name: fingerprint_file(path) for path in paths if path.exists()}
+
+
+def publication_keys(publications: List[PreparedPublication]) -> List[str]:
+    """
+    Content key of each publication. A modified publication gets a new key;
+    exact duplicates are told apart by their occurrence number.
+    """
+    seen = Counter()
+    keys = []
+    for pub in publications:
+        digest = hashlib.sha1(
+            "\x1f".join(
+                str(field)
+                for field in (pub.source, pub.id, pub.title, pub.date, pub.journal)
+            ).encode("utf-8")
+        ).hexdigest()
+        seen[digest] += 1
+        keys.append(f"{digest}:{seen[digest]}")
+    return keys
+
+
+@dataclass
+class IncrementalStats:
+    new_publications: int = 0
+    removed_publications: int = 0
+    new_drugs: int = 0
+    removed_drugs: int = 0
+    full_rebuild: bool = False
+
+
+class StateStore:
+    """
+    SQLite snapshot of the previous run: input file fingerprints, the keys of
+    the publications and drugs that were matched, and their matches.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(self.path)
+        self.conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self) -> "StateStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def get_meta(self, key: str) -> Optional[str]:
+        row = self.conn.execute(
+            "SELECT value FROM meta WHERE key = ?", (key,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key: str, value: str) -> None:
+        self.conn.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)", (key, value))
+
+    def file_fingerprints(self) -> Dict[str, str]:
+        return dict(self.conn.execute("SELECT name, fingerprint FROM files"))
+
+    def set_file_fingerprints(self, fingerprints: Dict[str, str]) -> None:
+        self.conn.execute("DELETE FROM files")
+        self.conn.executemany("INSERT INTO files VALUES (?, ?)", fingerprints.items())
+
+    def inputs_unchanged(self, fingerprints: Dict[str, str], match_mode: str) -> bool:
+        """True when the files and match mode are those of the last run."""
+        return (
+            self.get_meta("match_mode") == match_mode
+            and self.file_fingerprints() == fingerprints
+        )
+
+    def clear(self) -> None:
+        for table in ("files", "publications", "drugs", "matches"):
+            self.conn.execute(f"DELETE FROM {table}")
+
+    def publication_keys(self) -> Set[str]:
+        return {row[0] for row in self.conn.execute("SELECT key FROM publications")}
+
+    def drug_names(self) -> Set[str]:
+        return {row[0] for row in self.conn.execute("SELECT drug FROM drugs")}
+
+    def matches(self) -> Dict[str, Set[str]]:
+        """Drugs matched by each publication key."""
+        result: Dict[str, Set[str]] = {}
+        for pub_key, drug in self.conn.execute("SELECT pub_key, drug FROM matches"):
+            result.setdefault(pub_key, set()).add(drug)
+        return result
+
+    def remove_publications(self, keys: Iterable[str]) -> None:
+        rows = [(key,) for key in keys]
+        self.conn.executemany("DELETE FROM publications WHERE key = ?", rows)
+        self.conn.executemany("DELETE FROM matches WHERE pub_key = ?", rows)
+
+    def remove_drugs(self, names: Iterable[str]) -> None:
+        rows = [(name,) for name in names]
+        self.conn.executemany("DELETE FROM drugs WHERE drug = ?", rows)
+        self.conn.executemany("DELETE FROM matches WHERE drug = ?", rows)
+
+    def add(
+        self, pub_keys: Iterable[str], drugs: Iterable[str], matches: Iterable[tuple]
+    ) -> None:
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO publications VALUES (?)", ((k,) for k in pub_keys)
+        )
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO drugs VALUES (?)", ((d,) for d in drugs)
+        )
+        self.conn.executemany("INSERT OR IGNORE INTO matches VALUES (?, ?)", matches)
+
+    def commit(self) -> None:
+        self.conn.commit()
+
+
+def find_drug_mentions_incremental(
+    drugs: List[Drug],
+    publications: Union[Iterable[Publication], PublicationSet, PublicationFrame],
+    state: StateStore,
+    match_mode: str = "substring",
+    workers: int = 1,
+    shard_size: int = DEFAULT_SHARD_SIZE,
+    journal_dedup: str = "none",
+) -> Tuple[Dict[str, dict], IncrementalStats]:
+    """
+    Same result as DataTransformer.find_drug_mentions, reusing the matches of
+    the previous run kept in ``state`` (see iter_hits_incremental).
+    Returns (mentions, IncrementalStats).
+    """
+    hits, stats = iter_hits_incremental(
+        drugs, publications, state, match_mode, workers, shard_size
+    )
+    return DataTransformer.build_mentions(drugs, hits, journal_dedup), stats
+
+
+def iter_hits_incremental(
+    drugs: List[Drug],
+    publications: Union[Iterable[Publication], PublicationSet, PublicationFrame],
+    state: StateStore,
+    match_mode: str = "substring",
+    workers: int = 1,
+    shard_size: int = DEFAULT_SHARD_SIZE,
+) -> Tuple[List[Tuple[PreparedPublication, Set[int]]], IncrementalStats]:
+    """
+    Same (publication, drug indexes) pairs as DataTransformer.iter_hits,
+    reusing the matches of the previous run kept in ``state``.
+
+    Only added or modified publications are matched against every drug, and
+    unchanged publications only against the drugs added since the last run.
+    The state is updated in place. Returns (hits, IncrementalStats).
+    """
+    with stage("transform.incremental"):
+        return _hits_incremental(
+            drugs, publications, state, match_mode, workers, shard_size
+        )
+
+
+def _hits_incremental(
+    drugs: List[Drug],
+    publications: Union[Iterable[Publication], PublicationSet, PublicationFrame],
+    state: StateStore,
+    match_mode: str,
+    workers: int,
+    shard_size: int,
+) -> Tuple[List[Tuple[PreparedPublication, Set[int]]], IncrementalStats]:
+    prepared = list(DataTransformer.prepare(publications))
+    keys = publication_keys(prepared)
+    names = [drug.drug for drug in drugs]
+    stats = IncrementalStats()
+
+    if state.get_meta("match_mode") != match_mode:
+        state.clear()
+        state.set_meta("match_mode", match_mode)
+        stats.full_rebuild = True
+
+    known_keys = state.publication_keys()
+    known_drugs = state.drug_names()
+    current_keys = set(keys)
+    current_drugs = set(names)
+
+    removed_keys = known_keys - current_keys
+    removed_drugs = known_drugs - current_drugs
+    state.remove_publications(removed_keys)
+    state.remove_drugs(removed_drugs)
+    stats.removed_publications = len(removed_keys)
+    stats.removed_drugs = len(removed_drugs)
+
+    new_positions = [i for i, key in enumerate(keys) if key not in known_keys]
+    old_positions = [i for i, key in enumerate(keys) if key in known_keys]
+    new_drugs = [drug for drug in drugs if drug.drug not in known_drugs]
+    stats.new_publications = len(new_positions)
+    stats.new_drugs = len({drug.drug for drug in new_drugs})
+
+    matched = state.matches()
+    new_matches = []
+
+    def record(positions: List[int], subset: List[Drug]) -> None:
+        if not positions or not subset:
+            return
+        hits = DataTransformer.iter_hits(
+            subset,
+            [prepared[i] for i in positions],
+            match_mode,
+            workers=workers,
+            shard_size=shard_size,
+        )
+        for position, (_, drug_indexes) in zip(positions, hits):
+            for index in drug_indexes:
+                name = subset[index].drug
+                matched.setdefault(keys[position], set()).add(name)
+                new_matches.append((keys[position], name))
+
+    record(new_positions, drugs)
+    record(old_positions, new_drugs)
+
+    state.add((keys[i] for i in new_positions), current_drugs, new_matches)
+    state.commit()
+
+    indexes_by_name: Dict[str, List[int]] = {}
+    for index, name in enumerate(names):
+        indexes_by_name.setdefault(name, []).append(index)
+
+    hits = [
+        (
+            pub,
+            {
+                index
+                for name in matched.get(key, ())
+                for index in indexes_by_name.get(name, ())
+            },
+        )
+        for pub, key in zip(prepared, keys)
+    ]
+    return hits, stats
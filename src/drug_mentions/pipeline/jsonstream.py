@@ -0,0 +1,160 @@
+import json
+from pathlib import Path
+from typing import Any, Callable, Iterator, Optional
+
+_decoder = json.JSONDecoder()
+
+
+class JSONRecordError(ValueError):
+    """An invalid record, with its position in the file (1-based line/column)."""
+
+    def __init__(
+        self, file_path: Path, message: str, line: int, column: int, offset: int
+    ):
+        self.file_path = file_path
+        self.message = message
+        self.line = line
+        self.column = column
+        self.offset = offset
+        super().__init__(
+            f"Invalid JSON in {file_path} at line {line}, column {column} "
+            f"(char {offset}): {message}"
+        )
+
+
+def iter_json_records(
+    file_path: Path,
+    encoding: str = "utf-8-sig",
+    buffer_size: int = 1 << 20,
+    skip_invalid: bool = False,
+    on_error: Optional[Callable[[JSONRecordError], None]] = None,
+) -> Iterator[Any]:
+    """
+    Yield the records of a JSON file without loading the whole file.
+
+    Handles a top-level array (trailing commas allowed) as well as NDJSON or
+    concatenated JSON values, in a single pass. Only ``buffer_size`` characters
+    plus the record being decoded are held in memory.
+
+    An invalid record raises JSONRecordError with its line, column and
+    character offset. With skip_invalid, it is passed to ``on_error`` (if
+    given) instead, and reading resumes at the next line starting with "{".
+    """
+    # Paths, or in-memory inputs with the same open() (see loader.InputBuffer)
+    opened = (
+        file_path.open("r", encoding=encoding)
+        if hasattr(file_path, "open")
+        else open(file_path, "r", encoding=encoding)
+    )
+    with opened as f:
+        buffer = ""
+        pos = 0
+        eof = False
+        in_array = None
+        # Position of buffer[0] in the file, and of the current line start
+        base = 0
+        line = 1
+        line_start = 0
+
+        def fill() -> bool:
+            nonlocal buffer, pos, eof, base
+            chunk = f.read(buffer_size)
+            if not chunk:
+                eof = True
+                return False
+            base += pos
+            buffer = buffer[pos:] + chunk
+            pos = 0
+            return True
+
+        def advance(end: int) -> None:
+            # Move pos to end, keeping track of the line numbers
+            nonlocal pos, line, line_start
+            newlines = buffer.count("\n", pos, end)
+            if newlines:
+                line += newlines
+                line_start = base + buffer.rindex("\n", pos, end) + 1
+            pos = end
+
+        def error_at(index: int, message: str) -> JSONRecordError:
+            newlines = buffer.count("\n", pos, index)
+            error_line = line + newlines
+            start = line_start
+            if newlines:
+                start = base + buffer.rindex("\n", pos, index) + 1
+            offset = base + index
+            return JSONRecordError(
+                file_path, message, error_line, offset - start + 1, offset
+            )
+
+        def resync() -> bool:
+            # Skip to the next line that starts a record
+            while True:
+                newline = buffer.find("\n", pos)
+                if newline == -1:
+                    if eof or not fill():
+                        advance(len(buffer))
+                        return False
+                    continue
+                advance(newline + 1)
+                index = pos
+                while True:
+                    while index < len(buffer) and buffer[index] in " \t\r":
+                        index += 1
+                    if index < len(buffer) or eof:
+                        break
+                    skipped = index - pos
+                    if not fill():
+                        break
+                    index = pos + skipped
+                if index < len(buffer) and buffer[index] == "{":
+                    return True
+
+        while True:
+            # Skip whitespace and the separators between records
+            while True:
+                start = pos
+                while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+                    pos += 1
+                end, pos = pos, start
+                advance(end)
+                if pos < len(buffer) or eof or not fill():
+                    break
+
+            if pos >= len(buffer):
+                if in_array:
+                    raise error_at(pos, "Unterminated JSON array")
+                return
+
+            if in_array is None:
+                in_array = buffer[pos] == "["
+                if in_array:
+                    pos += 1
+                    continue
+
+            if in_array and buffer[pos] == "]":
+                return
+
+            try:
+                record, end = _decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError as e:
+                # The record may only be cut by the end of the buffer. A JSON
+                # string never spans lines, so an error followed by a newline
+                # is in the record itself and no more of the file is read.
+                if buffer.find("\n", e.pos) == -1 and not eof and fill():
+                    continue
+                error = error_at(e.pos, e.msg)
+                if not skip_invalid:
+                    raise error from e
+                if on_error is not None:
+                    on_error(error)
+                if not resync():
+                    return
+                continue
+
+            # A value ending exactly at the buffer end may be a truncated number
+            if end == len(buffer) and not eof and fill():
+                continue
+
+            advance(end)
+            yield record
@@ -1,136 +1,475 @@
-import json
-import re
-from datetime import datetime
+import io
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from itertools import chain, islice
 from pathlib import Path
-from typing import List
+from typing import IO, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 
+import numpy as np
 import pandas as pd
 
+from drug_mentions.dates import DATE_FORMATS, DateParser, parse_date
+from drug_mentions.ids import IdTable, normalize_id_column
+from drug_mentions.instrumentation import stage
+from drug_mentions.models.records import validate_drugs, validate_publications
 from drug_mentions.models.schema import Drug, Publication
+from drug_mentions.pipeline.columnar import (
+    PublicationFrame,
+    RowError,
+    require_pyarrow,
+)
+from drug_mentions.pipeline.jsonstream import JSONRecordError, iter_json_records
+from drug_mentions.pipeline.mapped import iter_mapped_csv, iter_mapped_json
 
+DEFAULT_CHUNKSIZE = 10_000
+RECORD_TYPES = ("pydantic", "slots", "mmap")
+LOAD_EXECUTORS = ("serial", "thread", "process")
+# Independent inputs read by DataLoader.load_all, pubmed ones in dedup order
+LOAD_SOURCES = (
+    "drugs",
+    "pubmed_csv",
+    "pubmed_json",
+    "pubmed_parquet",
+    "clinical_trials",
+)
 
-def parse_date(date_str: str) -> datetime:
+
+def parse_date_column(values: pd.Series) -> Tuple[pd.Series, pd.Series]:
     """
-    try multiple date formats and return a datetime object.
-    Raises ValueError if the date cannot be parsed.
+    Vectorized parse_date over a whole column.
+
+    Distinct values are parsed once. Each format is tried with a single
+    pd.to_datetime call on the values not parsed yet, so a column written in
+    one format is parsed in one pass; the few leftovers go through a
+    DateParser (dateutil fallback) one by one.
+    Returns the parsed column and a boolean mask of the values that failed.
     """
-    if not isinstance(date_str, str):
-        raise ValueError(f"Expected string date, got {type(date_str)}: {date_str}")
+    if pd.api.types.is_datetime64_any_dtype(values):
+        # Already typed, e.g. a Parquet date column
+        values = values.astype("datetime64[ns]")
+        return values, values.isna()
+
+    codes, uniques = pd.factorize(values)
+    uniques = pd.Series(uniques, dtype=object)
+    is_str = uniques.map(type) == str
+    stripped = uniques.where(is_str).str.strip()
+    parsed = pd.Series(pd.NaT, index=uniques.index, dtype="datetime64[ns]")
+    remaining = is_str.copy()
 
-    date_str = date_str.strip()
-    formats = ["%Y-%m-%d", "%d/%m/%Y", "%d %B %Y", "%d %b %Y", "%B %d, %Y", "%b %d, %Y"]
+    for fmt in DATE_FORMATS:
+        if not remaining.any():
+            break
+        attempt = pd.to_datetime(stripped[remaining], format=fmt, errors="coerce")
+        attempt = attempt.dropna()
+        parsed[attempt.index] = attempt
+        remaining[attempt.index] = False
 
-    for fmt in formats:
+    parser = DateParser()
+    for index in remaining[remaining].index:
         try:
-            return datetime.strptime(date_str, fmt)
+            parsed[index] = parser.parse(stripped[index])
         except ValueError:
             continue
 
+    # Missing values have code -1 and stay NaT
+    column = pd.Series(pd.NaT, index=values.index, dtype="datetime64[ns]")
+    known = codes >= 0
+    column[known] = parsed.to_numpy()[codes[known]]
+    return column, column.isna()
+
+
+class InputBuffer:
+    """
+    The in-memory content of an input file, read by DataLoader instead of a
+    file. Implements the part of the Path interface the readers use.
+    """
+
+    def __init__(self, name: str, data: Optional[bytes]):
+        self.name = name
+        self.suffix = Path(name).suffix
+        # None: no such input
+        self.data = data
+
+    def __str__(self) -> str:
+        return self.name
+
+    def exists(self) -> bool:
+        return self.data is not None
+
+    def read_bytes(self) -> bytes:
+        return self.data
+
+    def open(self, mode: str = "r", encoding: str = None) -> IO:
+        """A new stream over the content, e.g. to read it twice."""
+        stream = io.BytesIO(self.data)
+        return stream if "b" in mode else io.TextIOWrapper(stream, encoding=encoding)
+
+
+InputPath = Union[Path, InputBuffer]
+
+
+def _source(file_path: InputPath) -> Union[Path, IO]:
+    # pandas and pyarrow read paths and binary streams
+    return file_path.open("rb") if isinstance(file_path, InputBuffer) else file_path
+
+
+def _input_size(file_path: InputPath) -> int:
+    if isinstance(file_path, InputBuffer):
+        return len(file_path.data)
+    return file_path.stat().st_size
+
+
+def read_csv(file_path: InputPath) -> pd.DataFrame:
+    """Read a CSV in utf-8, falling back to latin1."""
     try:
-        from dateutil import parser
+        return pd.read_csv(_source(file_path), encoding="utf-8")
+    except UnicodeDecodeError:
+        return pd.read_csv(_source(file_path), encoding="latin1")
+
+
+def read_parquet(file_path: InputPath) -> pd.DataFrame:
+    """Read a Parquet file (requires pyarrow), with dates as datetime64."""
+    require_pyarrow()
+    import pyarrow.parquet as pq
 
-        return parser.parse(date_str)
-    except Exception:
-        raise ValueError(f"Unknown date format: {date_str}")
+    return pq.read_table(_source(file_path)).to_pandas(date_as_object=False)
 
 
-def load_csv_with_date(file_path: Path, date_column: str = "date") -> pd.DataFrame:
+def read_table(file_path: InputPath) -> pd.DataFrame:
+    """Read a CSV or Parquet file, depending on its extension."""
+    if file_path.suffix == ".parquet":
+        return read_parquet(file_path)
+    return read_csv(file_path)
+
+
+def to_publication_frame(
+    df: pd.DataFrame, source: str, file_path: Path
+) -> PublicationFrame:
+    """
+    Turn raw publication records into a PublicationFrame with vectorized steps:
+    scientific_title -> title coalescing, source tagging, string coercion of
+    id/title/journal and date parsing. Invalid rows are dropped and reported
+    as RowError entries.
+    """
+    df = df.copy()
+    if "scientific_title" in df.columns:
+        if "title" in df.columns:
+            df["title"] = df["title"].fillna(df["scientific_title"])
+        else:
+            df["title"] = df["scientific_title"]
+
+    invalid = pd.Series("", index=df.index)
+    for column in ["id", "title", "date", "journal"]:
+        if column not in df.columns:
+            raise ValueError(f"Column '{column}' not found in {file_path}")
+        # Only None is a missing value here, NaN is coerced below like the
+        # object loaders do; None only appears in object columns
+        values = df[column].to_numpy()
+        missing = pd.Series(
+            np.equal(values, None) if values.dtype == object else False,
+            index=df.index,
+        )
+        invalid[missing & (invalid == "")] = f"missing value for '{column}'"
+
+    df["id"] = normalize_id_column(df["id"])
+    for column in ["title", "journal"]:
+        # Same coercion as the pydantic str fields (e.g. 9 -> "9")
+        df[column] = df[column].astype(str)
+
+    raw_dates = df["date"]
+    with stage("load.parse_dates", rows=len(df)):
+        df["date"], bad_dates = parse_date_column(raw_dates)
+    bad_dates &= invalid == ""
+    invalid[bad_dates] = "Unknown date format: " + raw_dates[bad_dates].astype(str)
+    df["source"] = source
+
+    rejected = invalid != ""
+    errors = [
+        RowError(str(file_path), int(row), message)
+        for row, message in invalid[rejected].items()
+    ]
+    return PublicationFrame(df[~rejected], errors)
+
+
+def load_csv_with_date(file_path: InputPath, date_column: str = "date") -> pd.DataFrame:
     """
     Load a CSV and convert the specified date column using parse_date.
     Handles encoding issues and ensures proper date parsing.
     """
-    try:
-        df = pd.read_csv(file_path, encoding="utf-8")
-    except UnicodeDecodeError:
-        df = pd.read_csv(file_path, encoding="latin1")
+    df = read_csv(file_path)
 
     if date_column not in df.columns:
         raise ValueError(f"Date column '{date_column}' not found in {file_path}")
 
-    df[date_column] = df[date_column].apply(parse_date)
+    with stage("load.parse_dates", rows=len(df)):
+        df[date_column] = df[date_column].apply(DateParser().parse)
     return df
 
 
+def iter_csv_with_date(
+    file_path: InputPath, date_column: str = "date", chunksize: int = DEFAULT_CHUNKSIZE
+) -> Iterator[pd.DataFrame]:
+    """
+    Same as load_csv_with_date, but read the CSV in chunks of ``chunksize`` rows.
+    If the file turns out not to be utf-8, reading restarts in latin1 after the
+    rows already yielded.
+    """
+    rows_done = 0
+    # One parser per file: the date format is detected once
+    parser = DateParser()
+    for encoding in ("utf-8", "latin1"):
+        try:
+            with pd.read_csv(
+                _source(file_path), encoding=encoding, chunksize=chunksize
+            ) as reader:
+                for chunk in reader:
+                    if date_column not in chunk.columns:
+                        raise ValueError(
+                            f"Date column '{date_column}' not found in {file_path}"
+                        )
+                    end = chunk.index[-1] + 1 if len(chunk) else rows_done
+                    if end <= rows_done:
+                        continue
+                    chunk = chunk.loc[chunk.index >= rows_done].copy()
+                    with stage("load.parse_dates", rows=len(chunk)):
+                        chunk[date_column] = chunk[date_column].apply(parser.parse)
+                    yield chunk
+                    rows_done = end
+            return
+        except UnicodeDecodeError:
+            continue
+
+
+def iter_parquet_with_date(
+    file_path: InputPath, date_column: str = "date", chunksize: int = DEFAULT_CHUNKSIZE
+) -> Iterator[pd.DataFrame]:
+    """
+    Same as iter_csv_with_date for a Parquet file, read by record batches.
+    Typed date columns are kept as they are, string ones go through a DateParser.
+    """
+    require_pyarrow()
+    import pyarrow.parquet as pq
+
+    parquet_file = pq.ParquetFile(_source(file_path))
+    if date_column not in parquet_file.schema_arrow.names:
+        raise ValueError(f"Date column '{date_column}' not found in {file_path}")
+
+    parser = DateParser()
+    for batch in parquet_file.iter_batches(batch_size=chunksize):
+        chunk = batch.to_pandas(date_as_object=False)
+        if not pd.api.types.is_datetime64_any_dtype(chunk[date_column]):
+            with stage("load.parse_dates", rows=len(chunk)):
+                chunk[date_column] = chunk[date_column].apply(parser.parse)
+        yield chunk
+
+
+def iter_table_with_date(
+    file_path: InputPath, date_column: str = "date", chunksize: int = DEFAULT_CHUNKSIZE
+) -> Iterator[pd.DataFrame]:
+    """Read a CSV or Parquet file in chunks, depending on its extension."""
+    if file_path.suffix == ".parquet":
+        return iter_parquet_with_date(file_path, date_column, chunksize)
+    return iter_csv_with_date(file_path, date_column, chunksize)
+
+
+def _skip_earlier_ids(
+    sources: Iterable[Iterable[Publication]],
+) -> Iterator[Publication]:
+    """
+    Chain the publications of several files, skipping those whose (non-empty)
+    id was already read from an earlier file.
+    """
+    ids = IdTable()
+    # Number of the file each id code was first read from
+    first_file = array("l")
+    for number, publications in enumerate(sources):
+        for pub in publications:
+            if pub.id:
+                code = ids.intern(pub.id)
+                if code == len(first_file):
+                    first_file.append(number)
+                elif first_file[code] != number:
+                    continue
+            yield pub
+
+
+def _drop_earlier_ids(frames: List[PublicationFrame]) -> None:
+    """Drop the rows whose (non-empty) id appears in an earlier frame, in place."""
+    ids = IdTable()
+    first_frame = np.zeros(0, dtype=np.int64)
+    for number, frame in enumerate(frames):
+        codes = frame.id_codes(ids)
+        first_frame = np.concatenate(
+            [first_frame, np.full(len(ids) - len(first_frame), number)]
+        )
+        keep = (first_frame[codes] == number) | (frame.df["id"] == "").to_numpy()
+        frame.df = frame.df[keep].reset_index(drop=True)
+
+
+@dataclass
+class LoadedInputs:
+    """Everything DataLoader.load_all read, with the time spent on each source."""
+
+    drugs: List[Drug]
+    pubmed: List[Publication]
+    clinical_trials: List[Publication]
+    timings: Dict[str, float] = field(default_factory=dict)
+    rows: Dict[str, int] = field(default_factory=dict)
+
+    def report(self) -> str:
+        """One line per source, slowest first."""
+        return "\n".join(
+            f"  {name:<16} {self.rows[name]:>10} rows {seconds:8.3f}s"
+            for name, seconds in sorted(
+                self.timings.items(), key=lambda item: item[1], reverse=True
+            )
+        )
+
+
+def _load_source(
+    loader: "DataLoader", name: str
+) -> Tuple[list, float, List[JSONRecordError]]:
+    # Module level so that it can run in a worker process, which also sends
+    # back the invalid JSON records it skipped
+    skipped = len(loader.json_errors)
+    start = time.perf_counter()
+    if name == "drugs":
+        result = loader.load_drugs()
+    elif name == "clinical_trials":
+        result = loader.load_clinical_trials()
+    else:
+        result = list(getattr(loader, f"iter_{name}")())
+    return result, time.perf_counter() - start, loader.json_errors[skipped:]
+
+
 class DataLoader:
-    def __init__(self, data_dir: str):
-        """Initialize the DataLoader with the data directory path."""
-        self.data_dir = Path(data_dir)
-        if not self.data_dir.exists():
-            raise FileNotFoundError(f"Data directory not found: {self.data_dir}")
+    def __init__(
+        self,
+        data_dir: Optional[str] = None,
+        record_type: str = "pydantic",
+        skip_invalid_json: bool = False,
+        buffers: Optional[Dict[str, Union[bytes, IO[bytes]]]] = None,
+    ):
+        """
+        Initialize the DataLoader with the data directory path.
+
+        record_type selects what the loaders return: "pydantic" (Drug and
+        Publication models, validated per object), "slots" (DrugRecord and
+        PublicationRecord, validated in bulk per chunk) or "mmap" (slots
+        records read from memory-mapped CSV and JSON files, whose titles are
+        MappedText decoded on use; see pipeline/mapped.py).
+
+        By default an invalid record in pubmed.json fails the load, with its
+        line and column. With skip_invalid_json it is skipped and listed in
+        ``json_errors`` instead.
+
+        Instead of a data directory, the inputs can be given in memory as
+        ``buffers``, mapping file names (e.g. "drugs.csv", "pubmed.json") to
+        their content as bytes or binary file-like objects. Nothing is then
+        read from or written to disk.
+        """
+        if (data_dir is None) == (buffers is None):
+            raise ValueError("Expected either a data directory or input buffers")
+        self.data_dir = None
+        self.buffers = None
+        if buffers is not None:
+            self.buffers = {
+                name: InputBuffer(
+                    name, data if isinstance(data, bytes) else data.read()
+                )
+                for name, data in buffers.items()
+            }
+        else:
+            self.data_dir = Path(data_dir)
+            if not self.data_dir.exists():
+                raise FileNotFoundError(f"Data directory not found: {self.data_dir}")
+        if record_type not in RECORD_TYPES:
+            raise ValueError(
+                f"Unknown record type: {record_type} (expected one of {RECORD_TYPES})"
+            )
+        self.record_type = record_type
+        self.skip_invalid_json = skip_invalid_json
+        self.json_errors: List[JSONRecordError] = []
+
+    def _input(self, file_name: str) -> InputPath:
+        """The input file ``file_name``, from the buffers or the data directory."""
+        if self.buffers is not None:
+            return self.buffers.get(file_name) or InputBuffer(file_name, None)
+        return self.data_dir / file_name
+
+    def _find_input(self, name: str) -> InputPath:
+        """Return <name>.parquet in the data directory if present, else <name>.csv."""
+        parquet_path = self._input(f"{name}.parquet")
+        if parquet_path.exists():
+            return parquet_path
+        return self._input(f"{name}.csv")
+
+    def _iter_json(self, json_path: InputPath) -> Iterator[dict]:
+        read = iter_mapped_json if self.record_type == "mmap" else iter_json_records
+        return read(
+            json_path,
+            skip_invalid=self.skip_invalid_json,
+            on_error=self.json_errors.append,
+        )
+
+    def _iter_mapped_csv(
+        self, csv_path: InputPath, source: str, chunksize: int
+    ) -> Iterator[Publication]:
+        """Yield the publications of a CSV file read through a memory map."""
+        start = 0
+        for batch in iter_mapped_csv(csv_path, chunksize):
+            for row in batch:
+                row["source"] = source
+            yield from self._build_publications(batch, csv_path, start)
+            start += len(batch)
+
+    def _build_publications(
+        self, rows: List[dict], file_path: InputPath, start: int = 0
+    ) -> List[Publication]:
+        """Turn raw rows into the configured publication type."""
+        with stage("load.validate", rows=len(rows)):
+            if self.record_type == "pydantic":
+                return [Publication(**row) for row in rows]
+            records, errors = validate_publications(rows, str(file_path), start)
+        if errors:
+            raise ValueError("; ".join(str(error) for error in errors[:5]))
+        return records
 
     def load_drugs(self) -> List[Drug]:
         """
-        Load drugs data from CSV file.
+        Load drugs data from the CSV (or Parquet) file.
         Returns a list of Drug objects.
         """
-        file_path = self.data_dir / "drugs.csv"
+        file_path = self._find_input("drugs")
         if not file_path.exists():
             raise FileNotFoundError(f"Drugs file not found: {file_path}")
 
         try:
-            df = pd.read_csv(file_path, encoding="utf-8")
-            return [Drug(**row.to_dict()) for _, row in df.iterrows()]
-        except UnicodeDecodeError:
-            df = pd.read_csv(file_path, encoding="latin1")
-            return [Drug(**row.to_dict()) for _, row in df.iterrows()]
+            with stage("load.drugs") as timing:
+                df = read_table(file_path)
+                timing.add_rows(len(df))
+                if self.record_type == "pydantic":
+                    return [Drug(**record) for record in df.to_dict("records")]
+                records, errors = validate_drugs(df.to_dict("records"), str(file_path))
+            if errors:
+                raise ValueError("; ".join(str(error) for error in errors[:5]))
+            return records
         except Exception as e:
             raise Exception(f"Error loading drugs from {file_path}: {str(e)}")
 
-    def load_pubmed(self) -> List[Publication]:
+    def load_pubmed(self, dedup_ids: bool = True) -> List[Publication]:
         """
-        Load PubMed publications from both CSV and JSON files.
+        Load PubMed publications from the CSV, JSON and Parquet files.
         Returns a list of Publication objects with source='pubmed'.
-        """
-        publications = []
 
-        # Load pumed csv
-        csv_path = self.data_dir / "pubmed.csv"
-        if csv_path.exists():
-            try:
-                df_csv = load_csv_with_date(csv_path, date_column="date")
-                df_csv["source"] = "pubmed"  # add source information
-                publications.extend(
-                    [Publication(**row.to_dict()) for _, row in df_csv.iterrows()]
-                )
-            except Exception as e:
-                raise Exception(f"Error loading pubmed CSV from {csv_path}: {str(e)}")
-
-        # Load PubMed JSON
-        json_path = self.data_dir / "pubmed.json"
-        if json_path.exists():
-            try:
-                with open(json_path, "r", encoding="utf-8-sig") as f:
-                    content = f.read().strip()
-
-                if not content:
-                    raise ValueError("pubmed.json is empty")
-
-                # Clean JSON content (remove trailing commas)
-                content = re.sub(r",\s*\]", "]", content)
-
-                try:
-                    data = json.loads(content)
-                except json.JSONDecodeError:
-                    data = []
-                    lines = content.splitlines()
-                    for i, line in enumerate(lines, start=1):
-                        line = line.strip()
-                        if not line:
-                            continue
-                        try:
-                            data.append(json.loads(line))
-                        except json.JSONDecodeError as nd_e:
-                            raise Exception(
-                                f"Error parsing JSON on line {i} of {json_path}: {nd_e}"
-                            ) from nd_e
-
-                for item in data:
-                    item["date"] = parse_date(item["date"])
-                    item["source"] = "pubmed"  # Add source information
-                publications.extend([Publication(**item) for item in data])
-
-            except Exception as e:
-                raise Exception(f"Error loading pubmed JSON from {json_path}: {str(e)}")
+        With dedup_ids (default), a publication whose id was already read from
+        another pubmed file is skipped (see iter_pubmed).
+        """
+        with stage("load.pubmed") as timing:
+            publications = list(self.iter_pubmed(dedup_ids=dedup_ids))
+            timing.add_rows(len(publications))
 
         if not publications:
             raise ValueError(
@@ -139,18 +478,255 @@ class DataLoader:
 
         return publications
 
+    def iter_pubmed(
+        self, chunksize: int = DEFAULT_CHUNKSIZE, dedup_ids: bool = True
+    ) -> Iterator[Publication]:
+        """
+        Yield PubMed publications from the CSV (read in chunks), the JSON file
+        (decoded record by record) then the Parquet file (read by record
+        batches), in bounded memory.
+
+        With dedup_ids (default), a publication whose id was already read from
+        an earlier file is skipped, so that the first file wins. Empty ids are
+        never treated as duplicates, and repeated ids within a single file are
+        kept.
+        """
+        sources = (
+            self.iter_pubmed_csv(chunksize),
+            self.iter_pubmed_json(chunksize),
+            self.iter_pubmed_parquet(chunksize),
+        )
+        if not dedup_ids:
+            return chain.from_iterable(sources)
+        return _skip_earlier_ids(sources)
+
+    def iter_pubmed_csv(
+        self, chunksize: int = DEFAULT_CHUNKSIZE
+    ) -> Iterator[Publication]:
+        """Yield the publications of pubmed.csv (if present), read in chunks."""
+        csv_path = self._input("pubmed.csv")
+        if not csv_path.exists():
+            return
+        try:
+            if self.record_type == "mmap":
+                yield from self._iter_mapped_csv(csv_path, "pubmed", chunksize)
+                return
+            start = 0
+            for df_csv in iter_csv_with_date(
+                csv_path, date_column="date", chunksize=chunksize
+            ):
+                df_csv["source"] = "pubmed"  # add source information
+                yield from self._build_publications(
+                    df_csv.to_dict("records"), csv_path, start
+                )
+                start += len(df_csv)
+        except Exception as e:
+            raise Exception(f"Error loading pubmed CSV from {csv_path}: {str(e)}")
+
+    def iter_pubmed_json(
+        self, chunksize: int = DEFAULT_CHUNKSIZE
+    ) -> Iterator[Publication]:
+        """
+        Yield the publications of pubmed.json (if present): an array with
+        trailing commas, or NDJSON, decoded record by record.
+        """
+        json_path = self._input("pubmed.json")
+        if not json_path.exists():
+            return
+        try:
+            if _input_size(json_path) == 0:
+                raise ValueError("pubmed.json is empty")
+
+            parser = DateParser()
+            items = self._iter_json(json_path)
+            start = 0
+            while True:
+                batch = list(islice(items, chunksize))
+                if not batch:
+                    break
+                with stage("load.parse_dates", rows=len(batch)):
+                    for item in batch:
+                        item["date"] = parser.parse(item["date"])
+                        item["source"] = "pubmed"  # Add source information
+                yield from self._build_publications(batch, json_path, start)
+                start += len(batch)
+
+        except Exception as e:
+            raise Exception(f"Error loading pubmed JSON from {json_path}: {str(e)}")
+
+    def iter_pubmed_parquet(
+        self, chunksize: int = DEFAULT_CHUNKSIZE
+    ) -> Iterator[Publication]:
+        """Yield the publications of pubmed.parquet (if present), by record batches."""
+        parquet_path = self._input("pubmed.parquet")
+        if not parquet_path.exists():
+            return
+        try:
+            start = 0
+            for df in iter_parquet_with_date(
+                parquet_path, date_column="date", chunksize=chunksize
+            ):
+                df["source"] = "pubmed"
+                yield from self._build_publications(
+                    df.to_dict("records"), parquet_path, start
+                )
+                start += len(df)
+        except Exception as e:
+            raise Exception(
+                f"Error loading pubmed Parquet from {parquet_path}: {str(e)}"
+            )
+
     def load_clinical_trials(self) -> List[Publication]:
         """
-        Load clinical trials data from CSV file.
+        Load clinical trials data from the CSV (or Parquet) file.
         Returns a list of Publication objects with source='clinical_trial'.
         """
-        file_path = self.data_dir / "clinical_trials.csv"
+        with stage("load.clinical_trials") as timing:
+            publications = list(self.iter_clinical_trials())
+            timing.add_rows(len(publications))
+        return publications
+
+    def iter_clinical_trials(
+        self, chunksize: int = DEFAULT_CHUNKSIZE
+    ) -> Iterator[Publication]:
+        """
+        Yield clinical trials from the CSV (or Parquet) file, read in chunks of
+        ``chunksize`` rows.
+        """
+        file_path = self._find_input("clinical_trials")
         if not file_path.exists():
             raise FileNotFoundError(f"Clinical trials file not found: {file_path}")
 
         try:
-            df = load_csv_with_date(file_path, date_column="date")
-            df["source"] = "clinical_trial"
-            return [Publication(**row.to_dict()) for _, row in df.iterrows()]
+            if self.record_type == "mmap" and file_path.suffix == ".csv":
+                yield from self._iter_mapped_csv(file_path, "clinical_trial", chunksize)
+                return
+            start = 0
+            for df in iter_table_with_date(
+                file_path, date_column="date", chunksize=chunksize
+            ):
+                df["source"] = "clinical_trial"
+                yield from self._build_publications(
+                    df.to_dict("records"), file_path, start
+                )
+                start += len(df)
         except Exception as e:
             raise Exception(f"Error loading clinical trials from {file_path}: {str(e)}")
+
+    def load_publications_frame(
+        self, strict: bool = True, dedup_ids: bool = True
+    ) -> PublicationFrame:
+        """
+        Columnar fast path: load pubmed (CSV, JSON, Parquet) then clinical
+        trials into a single PublicationFrame without building Publication
+        objects.
+
+        Invalid rows are collected in the frame's ``errors``; with strict=True
+        (default) any of them raises, like the object loaders do. dedup_ids
+        skips pubmed ids already read from another file, as in iter_pubmed.
+        """
+        with stage("load.publications_frame") as timing:
+            frames = []
+
+            csv_path = self._input("pubmed.csv")
+            if csv_path.exists():
+                frames.append(
+                    to_publication_frame(read_csv(csv_path), "pubmed", csv_path)
+                )
+
+            json_path = self._input("pubmed.json")
+            if json_path.exists() and _input_size(json_path) > 0:
+                records = pd.DataFrame.from_records(list(self._iter_json(json_path)))
+                frames.append(to_publication_frame(records, "pubmed", json_path))
+
+            parquet_path = self._input("pubmed.parquet")
+            if parquet_path.exists():
+                frames.append(
+                    to_publication_frame(
+                        read_parquet(parquet_path), "pubmed", parquet_path
+                    )
+                )
+
+            if not frames:
+                raise ValueError(
+                    "No PubMed publications found in either CSV or JSON format"
+                )
+            if dedup_ids:
+                _drop_earlier_ids(frames)
+
+            file_path = self._find_input("clinical_trials")
+            if not file_path.exists():
+                raise FileNotFoundError(f"Clinical trials file not found: {file_path}")
+            frames.append(
+                to_publication_frame(read_table(file_path), "clinical_trial", file_path)
+            )
+
+            frame = PublicationFrame.concat(frames)
+            if strict and frame.errors:
+                details = "; ".join(str(error) for error in frame.errors[:5])
+                raise ValueError(
+                    f"{len(frame.errors)} invalid publication rows: {details}"
+                )
+            timing.add_rows(len(frame))
+            return frame
+
+    def load_all(
+        self,
+        executor: str = "thread",
+        max_workers: int = None,
+        dedup_ids: bool = True,
+    ) -> LoadedInputs:
+        """
+        Load drugs, pubmed (CSV, JSON and Parquet as separate tasks) and clinical
+        trials concurrently.
+
+        executor is "thread" (the default, overlaps file I/O), "process"
+        (parallel parsing, results are pickled back) or "serial". Returns the
+        same objects as load_drugs, load_pubmed and load_clinical_trials, in a
+        LoadedInputs with the wall time and row count of each source.
+        """
+        if executor not in LOAD_EXECUTORS:
+            raise ValueError(
+                f"Unknown executor: {executor} (expected one of {LOAD_EXECUTORS})"
+            )
+
+        with stage("load.all"):
+            if executor == "serial":
+                results = {name: _load_source(self, name) for name in LOAD_SOURCES}
+            else:
+                pool_type = (
+                    ThreadPoolExecutor if executor == "thread" else ProcessPoolExecutor
+                )
+                with pool_type(max_workers=max_workers or len(LOAD_SOURCES)) as pool:
+                    futures = {
+                        name: pool.submit(_load_source, self, name)
+                        for name in LOAD_SOURCES
+                    }
+                    results = {
+                        name: future.result() for name, future in futures.items()
+                    }
+
+        pubmed_sources = [
+            results[name][0] for name in ("pubmed_csv", "pubmed_json", "pubmed_parquet")
+        ]
+        pubmed = list(
+            _skip_earlier_ids(pubmed_sources)
+            if dedup_ids
+            else chain.from_iterable(pubmed_sources)
+        )
+        if not pubmed:
+            raise ValueError(
+                "No PubMed publications found in either CSV or JSON format"
+            )
+
+        if executor == "process":
+            for _, _, errors in results.values():
+                self.json_errors.extend(errors)
+
+        return LoadedInputs(
+            drugs=results["drugs"][0],
+            pubmed=pubmed,
+            clinical_trials=results["clinical_trials"][0],
+            timings={name: seconds for name, (_, seconds, _) in results.items()},
+            rows={name: len(rows) for name, (rows, _, _) in results.items()},
+        )
@@ -0,0 +1,482 @@
+"""
+Memory-mapped reading of the CSV and JSON inputs.
+
+The file is mapped read-only, so its pages come from the OS page cache and are
+shared by every process reading the same file. Rows are scanned in place with
+regular expressions; the title columns are not decoded but kept as MappedText
+(byte offset and length), and only turned into strings when used. The other
+fields are short and decoded eagerly. CSV fields get the types read_csv gives
+them (missing values, numbers, booleans), so that ids, journals and dates
+come out as with the other record types.
+
+Used by DataLoader(record_type="mmap").
+"""
+
+import codecs
+import json
+import math
+import mmap
+import os
+import re
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+from pandas._libs.parsers import STR_NA_VALUES
+
+from drug_mentions.models.records import MappedText
+from drug_mentions.pipeline.jsonstream import JSONRecordError
+
+# Columns kept as MappedText
+LAZY_COLUMNS = ("title", "scientific_title")
+
+# A CSV field: quoted (with "" escapes) or bare
+_CSV_FIELD = re.compile(rb'"([^"]*(?:""[^"]*)*)"|[^,"\r\n]*')
+# Fields read_csv reads as missing (NaN) by default, and as numbers or booleans
+_CSV_NA = frozenset(value.encode() for value in STR_NA_VALUES)
+_CSV_NA_LENGTH = max(map(len, _CSV_NA))
+_CSV_INT = re.compile(rb"[ \t]*[+-]?[0-9]+[ \t]*")
+_CSV_FLOAT = re.compile(
+    rb"[ \t]*[+-]?(?:(?:[0-9]+\.?[0-9]*|\.[0-9]+)(?:[eE][+-]?[0-9]+)?"
+    rb"|(?i:inf(?:inity)?))[ \t]*"
+)
+_CSV_BOOLS = {
+    b"True": True,
+    b"TRUE": True,
+    b"true": True,
+    b"False": False,
+    b"FALSE": False,
+    b"false": False,
+}
+_INT64_MIN, _INT64_MAX, _UINT64_MAX = -(1 << 63), (1 << 63) - 1, (1 << 64) - 1
+# A JSON token: string, punctuation or literal (number, true, false, null)
+_JSON_TOKEN = re.compile(
+    rb'[ \t\r\n]*(?:"([^"\\]*(?:\\.[^"\\]*)*)"|([{}\[\],:])|([-+.0-9a-zA-Z]+))',
+    re.DOTALL,
+)
+_WHITESPACE = re.compile(rb"[ \t\r\n]*")
+_SEPARATORS = re.compile(rb"[ \t\r\n,]*")
+# An object member whose value is a string
+_STRING_MEMBER = re.compile(
+    rb'"[^"\\]*"[ \t\r\n]*:[ \t\r\n]*"([^"\\]*(?:\\.[^"\\]*)*)"'
+)
+# An object without nested objects or arrays, like the pubmed.json records
+_FLAT_OBJECT = re.compile(rb'\{[^{}\[\]"]*(?:"[^"\\]*(?:\\.[^"\\]*)*"[^{}\[\]"]*)*\}')
+_DECODED_CACHE_SIZE = 65536
+_decoder = json.JSONDecoder()
+
+
+def _token_start(match: re.Match) -> int:
+    # Tokens match the whitespace before them, and strings exclude the quotes
+    start = match.start(match.lastindex)
+    return start - 1 if match.lastindex == 1 else start
+
+
+def _unescape_csv(text: str) -> str:
+    return text.replace('""', '"')
+
+
+def _unescape_json(text: str) -> str:
+    return json.loads(f'"{text}"')
+
+
+class MappedFile:
+    """
+    A read-only memory map of an input file, with its detected encoding
+    (UTF-8, with or without BOM, else latin-1 like read_csv). In-memory
+    inputs are scanned as they are.
+    """
+
+    def __init__(self, file_path: Path, fallback_encoding: Optional[str] = "latin1"):
+        self.file_path = file_path
+        if not isinstance(file_path, (str, os.PathLike)):
+            # In-memory input (see loader.InputBuffer): scanned in place
+            self.buffer: Union[mmap.mmap, bytes] = file_path.read_bytes()
+        elif os.path.getsize(file_path) == 0:
+            self.buffer = b""
+        else:
+            with open(file_path, "rb") as f:
+                # The map stays valid once the file is closed
+                self.buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.start = 3 if self.buffer[:3] == codecs.BOM_UTF8 else 0
+        self.encoding = "utf-8"
+        if fallback_encoding is not None and not self._is_utf8():
+            self.encoding = fallback_encoding
+
+    def __len__(self) -> int:
+        return len(self.buffer)
+
+    def _is_utf8(self, chunk_size: int = 1 << 20) -> bool:
+        # Decode by chunks, so the whole file is never copied
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        try:
+            for offset in range(self.start, len(self.buffer), chunk_size):
+                decoder.decode(self.buffer[offset : offset + chunk_size])
+            decoder.decode(b"", final=True)
+        except UnicodeDecodeError:
+            return False
+        return True
+
+    def text(self, offset: int, length: int) -> str:
+        return self.buffer[offset : offset + length].decode(self.encoding)
+
+    def position(self, offset: int) -> Sequence[int]:
+        """The (line, column, character offset) of byte ``offset``, 1-based."""
+        prefix = self.buffer[self.start : offset].decode(
+            self.encoding, errors="replace"
+        )
+        line_start = prefix.rfind("\n") + 1
+        return prefix.count("\n") + 1, len(prefix) - line_start + 1, len(prefix)
+
+
+class _Decoder:
+    """Decodes short fields, sharing the str of values that repeat (dates, journals)."""
+
+    def __init__(self, source: MappedFile):
+        self.source = source
+        self.cache: Dict[bytes, str] = {}
+
+    def __call__(self, start: int, end: int, unescape: Optional[Callable]) -> str:
+        raw = self.source.buffer[start:end]
+        text = self.cache.get(raw)
+        if text is None:
+            text = raw.decode(self.source.encoding)
+            if unescape is not None:
+                text = unescape(text)
+            if len(self.cache) < _DECODED_CACHE_SIZE:
+                self.cache[raw] = text
+        return text
+
+
+def _csv_typed(
+    buffer: Union[mmap.mmap, bytes], starts: List[int], stops: List[int], missing: bool
+) -> Optional[list]:
+    """
+    The values read_csv gives the (non-missing) fields of a column, at
+    ``starts``-``stops``: ints, or floats if ``missing`` fields are NaN; floats;
+    or bools. None when it reads the column as text, which is also what is
+    assumed for integers beyond 64 bits (read_csv's handling of them depends on
+    their order).
+    """
+    spans = list(zip(starts, stops))
+    if all(_CSV_INT.fullmatch(buffer, start, stop) for start, stop in spans):
+        numbers = [int(buffer[start:stop]) for start, stop in spans]
+        if not numbers or _INT64_MIN <= min(numbers) <= max(numbers) <= _INT64_MAX:
+            return [float(number) for number in numbers] if missing else numbers
+        if not missing and 0 <= min(numbers) <= max(numbers) <= _UINT64_MAX:
+            return numbers
+        return None
+    if all(_CSV_FLOAT.fullmatch(buffer, start, stop) for start, stop in spans):
+        numbers = [float(buffer[start:stop]) for start, stop in spans]
+        # Numbers too large for a float are text
+        for number, (start, stop) in zip(numbers, spans):
+            if math.isinf(number) and b"inf" not in buffer[start:stop].lower():
+                return None
+        return numbers
+    if all(
+        stop - start <= 5 and buffer[start:stop] in _CSV_BOOLS for start, stop in spans
+    ):
+        return [_CSV_BOOLS[buffer[start:stop]] for start, stop in spans]
+    return None
+
+
+def _csv_column(
+    source: MappedFile,
+    decode: _Decoder,
+    starts: List[int],
+    stops: List[int],
+    unescapes: List[Optional[Callable]],
+    lazy: bool,
+) -> list:
+    """
+    The values of the fields of one column, typed the way read_csv types
+    them: missing values are NaN, columns of numbers or booleans are converted
+    (see _csv_typed), and the others are strings, MappedText if ``lazy``.
+    """
+    buffer = source.buffer
+    missing = [
+        stop - start <= _CSV_NA_LENGTH and buffer[start:stop] in _CSV_NA
+        for start, stop in zip(starts, stops)
+    ]
+    if any(missing):
+        starts, stops, unescapes = (
+            [value for value, is_missing in zip(values, missing) if not is_missing]
+            for values in (starts, stops, unescapes)
+        )
+    else:
+        missing = None
+    values = _csv_typed(buffer, starts, stops, missing is not None)
+    if values is None and lazy:
+        values = [
+            MappedText(source, start, stop - start, unescape)
+            for start, stop, unescape in zip(starts, stops, unescapes)
+        ]
+    elif values is None:
+        values = list(map(decode, starts, stops, unescapes))
+    if missing is None:
+        return values
+    values = iter(values)
+    return [math.nan if is_missing else next(values) for is_missing in missing]
+
+
+def iter_mapped_csv(
+    file_path: Path, chunksize: int, lazy_columns: Sequence[str] = LAZY_COLUMNS
+) -> Iterator[List[dict]]:
+    """
+    Yield the rows of a CSV file as dicts keyed by the header, in lists of
+    ``chunksize`` rows, reading it through a memory map. Fields are typed per
+    chunk, like read_csv(chunksize=...) does (see _csv_column), and the string
+    fields of ``lazy_columns`` are yielded as MappedText.
+    Blank (or whitespace only) lines are skipped, as read_csv does.
+    """
+    source = MappedFile(file_path)
+    buffer = source.buffer
+    end = len(buffer)
+    decode = _Decoder(source)
+    pos = source.start
+    header: Optional[List[str]] = None
+    # (start, stop, unescape) of each field of the chunk, flat: a list of
+    # tuples would be scanned over and over by the garbage collector
+    fields: list = []
+    rows = 0
+
+    while True:
+        if rows and (rows == chunksize or pos >= end):
+            step = 3 * len(header)
+            columns = [
+                _csv_column(
+                    source,
+                    decode,
+                    fields[3 * column :: step],
+                    fields[3 * column + 1 :: step],
+                    fields[3 * column + 2 :: step],
+                    name in lazy_columns,
+                )
+                for column, name in enumerate(header)
+            ]
+            yield [dict(zip(header, values)) for values in zip(*columns)]
+            fields = []
+            rows = 0
+        if pos >= end:
+            return
+        row_start = pos
+        spans = []
+        while True:
+            match = _CSV_FIELD.match(buffer, pos)
+            if match.group(1) is not None:
+                start, stop = match.span(1)
+                quoted = buffer.find(b'""', start, stop) != -1
+                spans += (start, stop, _unescape_csv if quoted else None)
+            else:
+                spans += (match.start(), match.end(), None)
+            pos = match.end()
+            if pos < end and buffer[pos] == ord(","):
+                pos += 1
+                continue
+            if buffer[pos : pos + 2] == b"\r\n":
+                pos += 2
+            elif pos < end and buffer[pos] in b"\r\n":
+                pos += 1
+            elif pos < end:
+                line, column, _ = source.position(pos)
+                raise ValueError(
+                    f"Malformed CSV in {file_path} at line {line}, column {column}"
+                )
+            break
+
+        if len(spans) == 3 and not buffer[spans[0] : spans[1]].strip():
+            continue  # blank line
+        if header is None:
+            header = list(map(decode, spans[::3], spans[1::3], spans[2::3]))
+            continue
+        if len(spans) != 3 * len(header):
+            line, _, _ = source.position(row_start)
+            raise ValueError(
+                f"Expected {len(header)} fields in {file_path} at line {line}, "
+                f"got {len(spans) // 3}"
+            )
+        fields += spans
+        rows += 1
+
+
+class _JSONError(Exception):
+    def __init__(self, offset: int, message: str):
+        self.offset = offset
+        self.message = message
+
+
+class _JSONScanner:
+    """Parses JSON values token by token from a memory-mapped buffer."""
+
+    def __init__(self, source: MappedFile, lazy_keys: Sequence[str]):
+        self.source = source
+        self.buffer = source.buffer
+        self.decode = _Decoder(source)
+        self.lazy_keys = set(lazy_keys)
+        self.pos = source.start
+        self.quoted_keys = [(key, f'"{key}"'.encode()) for key in lazy_keys]
+
+    def token(self) -> re.Match:
+        match = _JSON_TOKEN.match(self.buffer, self.pos)
+        if match is None:
+            offset = _WHITESPACE.match(self.buffer, self.pos).end()
+            if offset >= len(self.buffer):
+                raise _JSONError(offset, "Unexpected end of file")
+            raise _JSONError(offset, "Expecting value")
+        self.pos = match.end()
+        return match
+
+    def string(
+        self, start: int, stop: int, lazy: bool = False
+    ) -> Union[str, MappedText]:
+        escaped = self.buffer.find(b"\\", start, stop) != -1
+        unescape = _unescape_json if escaped else None
+        if lazy:
+            return MappedText(self.source, start, stop - start, unescape)
+        try:
+            return self.decode(start, stop, unescape)
+        except ValueError as e:
+            raise _JSONError(start, f"Invalid string: {e}")
+
+    def value(self, match: re.Match, lazy: bool = False):
+        if match.group(1) is not None:
+            return self.string(*match.span(1), lazy)
+        punctuation = match.group(2)
+        if punctuation == b"{":
+            return self.object()
+        if punctuation == b"[":
+            return self.array()
+        if punctuation is not None:
+            raise _JSONError(match.start(2), "Expecting value")
+        try:
+            return json.loads(match.group(3))
+        except ValueError:
+            raise _JSONError(match.start(3), "Expecting value")
+
+    def record(self, start: int) -> dict:
+        """
+        Parse the object starting at ``start`` with its lazy keys as MappedText.
+        Flat objects are decoded by the json module in one call, then their
+        lazy values replaced by their spans; others are parsed token by token.
+        """
+        flat = _FLAT_OBJECT.match(self.buffer, start)
+        if flat is not None:
+            try:
+                record = _decoder.decode(flat.group().decode("utf-8"))
+            except ValueError:
+                flat = None
+        if flat is None:
+            self.pos = start + 1
+            return self.object(self.lazy_keys)
+        if isinstance(record, dict):
+            end = flat.end()
+            for key, quoted in self.quoted_keys:
+                if not isinstance(record.get(key), str):
+                    continue
+                # The quoted key can only appear as a key or as a whole value
+                index = self.buffer.find(quoted, start, end)
+                while index != -1:
+                    match = _STRING_MEMBER.match(self.buffer, index, end)
+                    if match is not None:
+                        record[key] = self.string(*match.span(1), lazy=True)
+                        break
+                    index = self.buffer.find(quoted, index + 1, end)
+        self.pos = flat.end()
+        return record
+
+    def object(self, lazy_keys: Sequence[str] = ()) -> dict:
+        result = {}
+        match = self.token()
+        if match.group(2) == b"}":
+            return result
+        while True:
+            if match.group(1) is None:
+                raise _JSONError(
+                    _token_start(match),
+                    "Expecting property name enclosed in double quotes",
+                )
+            key = self.string(*match.span(1))
+            colon = self.token()
+            if colon.group(2) != b":":
+                raise _JSONError(_token_start(colon), "Expecting ':' delimiter")
+            result[key] = self.value(self.token(), key in lazy_keys)
+            match = self.token()
+            if match.group(2) == b"}":
+                return result
+            if match.group(2) != b",":
+                raise _JSONError(_token_start(match), "Expecting ',' delimiter")
+            match = self.token()
+
+    def array(self) -> list:
+        result = []
+        match = self.token()
+        if match.group(2) == b"]":
+            return result
+        while True:
+            result.append(self.value(match))
+            match = self.token()
+            if match.group(2) == b"]":
+                return result
+            if match.group(2) != b",":
+                raise _JSONError(_token_start(match), "Expecting ',' delimiter")
+            match = self.token()
+
+    def resync(self) -> bool:
+        """Skip to the next line starting with "{"; False at the end of the file."""
+        while True:
+            newline = self.buffer.find(b"\n", self.pos)
+            if newline == -1:
+                self.pos = len(self.buffer)
+                return False
+            self.pos = _WHITESPACE.match(self.buffer, newline + 1).end()
+            if self.buffer[self.pos : self.pos + 1] == b"{":
+                return True
+
+
+def iter_mapped_json(
+    file_path: Path,
+    lazy_keys: Sequence[str] = LAZY_COLUMNS,
+    skip_invalid: bool = False,
+    on_error: Optional[Callable[[JSONRecordError], None]] = None,
+) -> Iterator[dict]:
+    """
+    Yield the records of a JSON file, like iter_json_records (array with
+    trailing commas, NDJSON or concatenated values), reading it through a
+    memory map. The values of ``lazy_keys`` in each record are yielded as
+    MappedText. Invalid records are handled as in iter_json_records.
+    """
+    scanner = _JSONScanner(MappedFile(file_path, fallback_encoding=None), lazy_keys)
+    buffer = scanner.buffer
+    in_array = None
+
+    while True:
+        try:
+            # Skip whitespace and the separators between records
+            scanner.pos = _SEPARATORS.match(buffer, scanner.pos).end()
+            if scanner.pos >= len(buffer):
+                if in_array:
+                    raise _JSONError(scanner.pos, "Unterminated JSON array")
+                return
+            char = buffer[scanner.pos : scanner.pos + 1]
+            if in_array is None:
+                in_array = char == b"["
+                if in_array:
+                    scanner.pos += 1
+                    continue
+            if in_array and char == b"]":
+                return
+            if char == b"{":
+                record = scanner.record(scanner.pos)
+            else:
+                record = scanner.value(scanner.token())
+        except _JSONError as e:
+            line, column, offset = scanner.source.position(e.offset)
+            error = JSONRecordError(file_path, e.message, line, column, offset)
+            if not skip_invalid:
+                raise error from None
+            if on_error is not None:
+                on_error(error)
+            scanner.pos = max(scanner.pos, e.offset)
+            if not scanner.resync():
+                return
+            continue
+        yield record
@@ -0,0 +1,117 @@
+import re
+from collections import deque
+from typing import Dict, Iterable, List, Set
+
+
+class DrugMatcher:
+    """
+    Aho-Corasick automaton over lowercased drug names.
+
+    The automaton is compiled once from the drug list, then each title is
+    scanned a single time to find every drug it contains. Matching keeps the
+    semantics of the original ``drug.lower() in title.lower()`` check.
+    """
+
+    def __init__(self, patterns: Iterable[str]):
+        """Compile the automaton from the given patterns (matched case-insensitively)."""
+        self.patterns: List[str] = []
+        # Patterns that are empty after lowercasing match every title
+        self._always: Set[int] = set()
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[int]] = [[]]
+
+        for index, pattern in enumerate(patterns):
+            self.patterns.append(pattern)
+            self._add(pattern.lower(), index)
+        self._build_failure_links()
+
+    def _add(self, pattern: str, index: int) -> None:
+        if not pattern:
+            self._always.add(index)
+            return
+        state = 0
+        for char in pattern:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = next_state
+        self._out[state].append(index)
+
+    def _build_failure_links(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(char, 0)
+                # Inherit the outputs of the longest proper suffix
+                self._out[next_state] = (
+                    self._out[next_state] + self._out[self._fail[next_state]]
+                )
+
+    def match(self, text: str) -> Set[int]:
+        """Return the indexes of all patterns found in ``text``."""
+        return self.match_lower(text.lower())
+
+    def match_lower(self, text: str) -> Set[int]:
+        """Same as ``match`` for a text that is already lowercased."""
+        goto = self._goto
+        fail = self._fail
+        out = self._out
+        found = set(self._always)
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if out[state]:
+                found.update(out[state])
+        return found
+
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercased word tokens."""
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class TokenIndex:
+    """
+    Inverted index from normalized token n-grams to publication positions.
+
+    Each title is tokenized once; a drug is then resolved by a dictionary
+    lookup of its own tokens, which gives whole-word matching semantics
+    (e.g. "ETHANOL" no longer matches "methanol").
+    """
+
+    def __init__(self, titles: Iterable[str], max_ngram: int = 1):
+        """Index every n-gram of up to ``max_ngram`` tokens of each title."""
+        self.max_ngram = max(1, max_ngram)
+        self._postings: Dict[str, List[int]] = {}
+
+        for position, title in enumerate(titles):
+            tokens = tokenize(title)
+            for size in range(1, self.max_ngram + 1):
+                for start in range(len(tokens) - size + 1):
+                    key = " ".join(tokens[start : start + size])
+                    postings = self._postings.setdefault(key, [])
+                    # A title may repeat an n-gram, keep its position once
+                    if not postings or postings[-1] != position:
+                        postings.append(position)
+
+    def lookup(self, phrase: str) -> List[int]:
+        """Return the positions of the titles containing ``phrase`` as whole words."""
+        tokens = tokenize(phrase)
+        if not tokens or len(tokens) > self.max_ngram:
+            return []
+        return self._postings.get(" ".join(tokens), [])
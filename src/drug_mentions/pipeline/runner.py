@@ -0,0 +1,196 @@
+"""
+A small runner for pipelines described as stages with declared inputs.
+
+A Stage names its output and maps the keyword arguments of its function to
+the names of earlier outputs or of the run parameters. A mapped stage is run
+once per item of one of its inputs, and its output is the list of results.
+Pipeline.run submits each stage, and every item of a mapped stage, to an
+executor from one of BACKENDS as soon as its inputs are available, so that a
+stage does not wait on the other stages submitted with it:
+
+- serial: in the calling thread, one task after the other;
+- thread: a thread pool, for stages that release the GIL (I/O, pandas);
+- process: a process pool, functions and values must be picklable;
+- dask: a local Dask cluster (requires dask[distributed]), or the scheduler
+  at ``address``.
+
+The stages only exchange what their functions return, so with the staged
+pipeline (see stages.PIPELINE) the same definition runs on every backend.
+"""
+
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from contextlib import contextmanager
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+)
+
+BACKENDS = ("serial", "thread", "process", "dask")
+
+
+class Stage(NamedTuple):
+    """A pipeline step: ``func(**{arg: values[name] for arg, name in inputs})``."""
+
+    name: str
+    func: Callable
+    # keyword argument -> name of the value passed to it
+    inputs: Dict[str, str]
+    # keyword argument receiving, in turn, each item of its input
+    map_over: Optional[str] = None
+
+
+class _SerialExecutor(Executor):
+    """Runs each task when it is submitted."""
+
+    def submit(self, fn, /, *args, **kwargs) -> Future:
+        future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except BaseException as e:
+            future.set_exception(e)
+        return future
+
+
+def require_dask():
+    """Import dask.distributed, which is only needed for the dask backend."""
+    try:
+        import dask.distributed
+    except ImportError as e:
+        raise ImportError(
+            "The dask backend requires dask[distributed] "
+            "(poetry install -E dask, or pip install 'dask[distributed]')"
+        ) from e
+    return dask.distributed
+
+
+@contextmanager
+def open_executor(
+    backend: str = "serial", max_workers: int = None, address: str = None
+) -> Iterator[Executor]:
+    """A concurrent.futures executor for ``backend``, shut down on exit."""
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend: {backend} (expected one of {BACKENDS})")
+    if backend == "dask":
+        distributed = require_dask()
+        cluster = None
+        if address is None:
+            cluster = distributed.LocalCluster(n_workers=max_workers, processes=True)
+        try:
+            with distributed.Client(cluster or address) as client:
+                yield client.get_executor()
+        finally:
+            if cluster is not None:
+                cluster.close()
+        return
+    if backend == "serial":
+        executor = _SerialExecutor()
+    elif backend == "thread":
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+    else:
+        executor = ProcessPoolExecutor(max_workers=max_workers)
+    with executor:
+        yield executor
+
+
+class Pipeline:
+    """Stages run by dependency order, see the module docstring."""
+
+    def __init__(self, stages: Iterable[Stage]):
+        self.stages = list(stages)
+        names = [stage.name for stage in self.stages]
+        duplicates = {name for name in names if names.count(name) > 1}
+        if duplicates:
+            raise ValueError(f"Duplicate stage names: {sorted(duplicates)}")
+        for stage in self.stages:
+            if stage.map_over is not None and stage.map_over not in stage.inputs:
+                raise ValueError(
+                    f"Stage {stage.name} maps over {stage.map_over}, "
+                    "which is not one of its inputs"
+                )
+
+    def params(self) -> set:
+        """Names of the values the stages need that no stage produces."""
+        outputs = {stage.name for stage in self.stages}
+        return {
+            name
+            for stage in self.stages
+            for name in stage.inputs.values()
+            if name not in outputs
+        }
+
+    def run(
+        self,
+        backend: str = "serial",
+        max_workers: int = None,
+        address: str = None,
+        **params: Any,
+    ) -> Dict[str, Any]:
+        """
+        Run every stage with ``params`` as the initial values, on ``backend``
+        (see BACKENDS). Returns the params and the output of every stage.
+        """
+        missing = self.params() - set(params)
+        if missing:
+            raise ValueError(f"Missing pipeline parameters: {sorted(missing)}")
+        values = dict(params)
+        pending = list(self.stages)
+        # name -> (stage, futures of its tasks) of the stages submitted
+        running: Dict[str, Tuple[Stage, List[Future]]] = {}
+        with open_executor(backend, max_workers, address) as executor:
+            while pending or running:
+                for stage in [
+                    stage
+                    for stage in pending
+                    if all(name in values for name in stage.inputs.values())
+                ]:
+                    pending.remove(stage)
+                    running[stage.name] = (stage, self._submit(executor, stage, values))
+                if not running:
+                    cycle = sorted(stage.name for stage in pending)
+                    raise ValueError(f"Stages waiting on each other: {cycle}")
+                finished = [
+                    name
+                    for name, (_, futures) in running.items()
+                    if all(future.done() for future in futures)
+                ]
+                if not finished:
+                    wait(
+                        [
+                            future
+                            for _, futures in running.values()
+                            for future in futures
+                            if not future.done()
+                        ],
+                        return_when=FIRST_COMPLETED,
+                    )
+                    continue
+                for name in finished:
+                    stage, futures = running.pop(name)
+                    results = [future.result() for future in futures]
+                    values[name] = results if stage.map_over is not None else results[0]
+        return values
+
+    @staticmethod
+    def _submit(executor: Executor, stage: Stage, values: Dict[str, Any]) -> list:
+        kwargs = {arg: values[name] for arg, name in stage.inputs.items()}
+        if stage.map_over is None:
+            return [executor.submit(stage.func, **kwargs)]
+        items = kwargs.pop(stage.map_over)
+        return [
+            executor.submit(stage.func, **kwargs, **{stage.map_over: item})
+            for item in items
+        ]
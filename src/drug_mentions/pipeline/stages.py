@@ -0,0 +1,263 @@
+"""
+The pipeline as separate stages that exchange files instead of objects.
+
+Each stage reads and writes columnar artifacts (Parquet, requires pyarrow) in
+a staging directory, and returns a small JSON-serializable manifest of them,
+so that an orchestrator such as Airflow only passes paths and row counts
+between its tasks (see utils/example_dag.py):
+
+1. stage_inputs: load the inputs once, write the drugs and the publications
+   split into shards of ``shard_size`` rows;
+2. match_shard: match one shard against the drugs, write its hits as
+   (row, drug index) pairs; shards are independent and can run in parallel;
+3. write_results: read the shards and their hits in order and write the
+   output file, the same one as the command line writes.
+
+PIPELINE declares these stages for runner.Pipeline: run_local runs it on one
+of runner.BACKENDS, and utils/example_dag.py builds its Airflow tasks from it.
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Set, Tuple, Union
+
+import pandas as pd
+
+from drug_mentions.instrumentation import stage
+from drug_mentions.models.records import DrugRecord
+from drug_mentions.pipeline.aggregates import JournalIndex
+from drug_mentions.pipeline.columnar import PublicationFrame, require_pyarrow
+from drug_mentions.pipeline.loader import DataLoader, read_parquet
+from drug_mentions.pipeline.runner import Pipeline, Stage
+from drug_mentions.pipeline.transformer import (
+    DEFAULT_SHARD_SIZE,
+    DataTransformer,
+    PreparedPublication,
+    PublicationSet,
+)
+from drug_mentions.pipeline.writer import DataWriter
+
+MANIFEST_FILE = "manifest.json"
+MANIFEST_VERSION = 1
+
+
+def _write_table(df: pd.DataFrame, path: Path) -> None:
+    """Write a DataFrame as Parquet, atomically so retried tasks can overwrite it."""
+    pa = require_pyarrow()
+    import pyarrow.parquet as pq
+
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    pq.write_table(pa.Table.from_pandas(df, preserve_index=False), tmp_path)
+    os.replace(tmp_path, path)
+
+
+def _path(manifest: dict, name: str) -> Path:
+    return Path(manifest["staging_dir"]) / name
+
+
+def stage_inputs(
+    data_dir: Union[str, Path],
+    staging_dir: Union[str, Path],
+    shard_size: int = DEFAULT_SHARD_SIZE,
+    skip_invalid_json: bool = False,
+) -> dict:
+    """
+    Load the inputs of ``data_dir`` and write them to ``staging_dir``: the
+    drugs, and the publications (pubmed then clinical trials, as loaded by
+    DataLoader.load_publications_frame) in shards of ``shard_size`` rows.
+    Returns the manifest, also written to ``staging_dir``/manifest.json for
+    inspection.
+    """
+    if shard_size < 1:
+        raise ValueError(f"shard_size must be at least 1, got {shard_size}")
+    staging_dir = Path(staging_dir).resolve()
+    staging_dir.mkdir(parents=True, exist_ok=True)
+    loader = DataLoader(data_dir, skip_invalid_json=skip_invalid_json)
+
+    drugs = pd.DataFrame(
+        [(drug.atccode, drug.drug) for drug in loader.load_drugs()],
+        columns=["atccode", "drug"],
+    )
+    _write_table(drugs, staging_dir / "drugs.parquet")
+
+    df = loader.load_publications_frame().df
+    shards = []
+    with stage("stage.publications", rows=len(df)):
+        for number, start in enumerate(range(0, len(df), shard_size)):
+            name = f"publications-{number:05d}.parquet"
+            shard = df.iloc[start : start + shard_size]
+            _write_table(shard, staging_dir / name)
+            shards.append({"path": name, "rows": len(shard)})
+
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "staging_dir": str(staging_dir),
+        "drugs": {"path": "drugs.parquet", "rows": len(drugs)},
+        "shards": shards,
+        "rows": len(df),
+    }
+    (staging_dir / MANIFEST_FILE).write_text(json.dumps(manifest, indent=2))
+    return manifest
+
+
+def _read_drugs(manifest: dict) -> List[DrugRecord]:
+    df = read_parquet(_path(manifest, manifest["drugs"]["path"]))
+    return [DrugRecord(atccode, drug) for atccode, drug in zip(df.atccode, df.drug)]
+
+
+def _read_shard(manifest: dict, shard: int) -> List[PreparedPublication]:
+    df = read_parquet(_path(manifest, manifest["shards"][shard]["path"]))
+    return PublicationSet.from_frame(PublicationFrame(df)).ordered
+
+
+def match_shard(manifest: dict, shard: int, match_mode: str = "substring") -> dict:
+    """
+    Match the publications of shard number ``shard`` against the drugs and
+    write the hits next to it. Returns the shard's hits entry, for
+    write_results.
+    """
+    drugs = _read_drugs(manifest)
+    publications = _read_shard(manifest, shard)
+    hits = DataTransformer.iter_hits(drugs, publications, match_mode)
+    pairs = [
+        (row, drug)
+        for row, (_, drug_indexes) in enumerate(hits)
+        for drug in sorted(drug_indexes)
+    ]
+    name = f"hits-{shard:05d}.parquet"
+    _write_table(
+        pd.DataFrame(pairs, columns=["row", "drug"], dtype="int32"),
+        _path(manifest, name),
+    )
+    return {"shard": shard, "path": name, "hits": len(pairs)}
+
+
+def _iter_staged_hits(
+    manifest: dict, paths: Dict[int, str]
+) -> Iterator[Tuple[PreparedPublication, Set[int]]]:
+    """(publication, drug indexes) pairs of every shard, one shard at a time."""
+    for shard in range(len(manifest["shards"])):
+        pairs = read_parquet(_path(manifest, paths[shard]))
+        if pairs.empty:
+            continue
+        publications = _read_shard(manifest, shard)
+        drug_indexes: Dict[int, Set[int]] = {}
+        for row, drug in zip(pairs["row"].tolist(), pairs["drug"].tolist()):
+            drug_indexes.setdefault(row, set()).add(drug)
+        for row, indexes in drug_indexes.items():
+            yield publications[row], indexes
+
+
+def write_results(
+    manifest: dict,
+    matched: Iterable[dict],
+    output_file: Union[str, Path],
+    output_format: str = "pretty",
+    journal_dedup: str = "none",
+    index_file: Union[str, Path, None] = None,
+) -> dict:
+    """
+    Write the output file from the hits of every shard (the entries returned
+    by match_shard, in any order): the edge table for a .parquet
+    ``output_file``, else JSON in ``output_format``. Also writes the journal
+    index to ``index_file``, if given.
+    """
+    paths = {entry["shard"]: entry["path"] for entry in matched}
+    missing = set(range(len(manifest["shards"]))) - set(paths)
+    if missing:
+        raise ValueError(f"Shards not matched: {sorted(missing)}")
+    output_file = Path(output_file)
+    drugs = _read_drugs(manifest)
+    hits = _iter_staged_hits(manifest, paths)
+    journal_index = JournalIndex()
+    if index_file is not None:
+        hits = journal_index.observe(drugs, hits)
+    if output_file.suffix == ".parquet":
+        count = DataWriter.write_parquet(
+            DataTransformer.iter_edges(drugs, hits), output_file
+        )
+    else:
+        count = DataWriter.write_json(
+            DataTransformer.iter_mentions(drugs, hits, journal_dedup),
+            output_file,
+            output_format=output_format,
+        )
+    if index_file is not None:
+        DataWriter.write_json(journal_index.to_dict(), Path(index_file))
+    return {"path": str(output_file), "count": count}
+
+
+def shard_numbers(manifest: dict) -> List[int]:
+    """The shard numbers of a manifest, to map match_shard over."""
+    return list(range(len(manifest["shards"])))
+
+
+# Parameters: data_dir, staging_dir, shard_size, skip_invalid_json, match_mode,
+# output_file, output_format, journal_dedup and index_file
+PIPELINE = Pipeline(
+    [
+        Stage(
+            "manifest",
+            stage_inputs,
+            {
+                "data_dir": "data_dir",
+                "staging_dir": "staging_dir",
+                "shard_size": "shard_size",
+                "skip_invalid_json": "skip_invalid_json",
+            },
+        ),
+        Stage("shards", shard_numbers, {"manifest": "manifest"}),
+        Stage(
+            "matched",
+            match_shard,
+            {"manifest": "manifest", "shard": "shards", "match_mode": "match_mode"},
+            map_over="shard",
+        ),
+        Stage(
+            "result",
+            write_results,
+            {
+                "manifest": "manifest",
+                "matched": "matched",
+                "output_file": "output_file",
+                "output_format": "output_format",
+                "journal_dedup": "journal_dedup",
+                "index_file": "index_file",
+            },
+        ),
+    ]
+)
+
+
+def run_local(
+    data_dir: Union[str, Path],
+    staging_dir: Union[str, Path],
+    output_file: Union[str, Path],
+    backend: str = "serial",
+    max_workers: int = None,
+    shard_size: int = DEFAULT_SHARD_SIZE,
+    skip_invalid_json: bool = False,
+    match_mode: str = "substring",
+    output_format: str = "pretty",
+    journal_dedup: str = "none",
+    index_file: Union[str, Path, None] = None,
+) -> dict:
+    """
+    Run PIPELINE like the Airflow DAG does, with match_shard mapped over the
+    shards on ``backend`` (see runner.BACKENDS). Returns write_results' entry.
+    """
+    values = PIPELINE.run(
+        backend,
+        max_workers,
+        data_dir=data_dir,
+        staging_dir=staging_dir,
+        shard_size=shard_size,
+        skip_invalid_json=skip_invalid_json,
+        match_mode=match_mode,
+        output_file=output_file,
+        output_format=output_format,
+        journal_dedup=journal_dedup,
+        index_file=index_file,
+    )
+    return values["result"]
@@ -1,55 +1,428 @@
-from typing import Dict, List
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Set, Tuple, Union
 
+from drug_mentions.instrumentation import stage, timed_iter
 from drug_mentions.models.schema import Drug, DrugMention, Publication
+from drug_mentions.pipeline.columnar import PublicationFrame
+from drug_mentions.pipeline.matcher import DrugMatcher, TokenIndex, tokenize
+
+MATCH_MODES = ("substring", "token")
+# none: one journals entry per mention, journal: one per journal name,
+# journal_date: one per (journal name, date)
+JOURNAL_DEDUP_MODES = ("none", "journal", "journal_date")
+# Columns of the normalized drug -> publication edge table
+EDGE_COLUMNS = ("drug", "atccode", "id", "source", "journal", "date")
+DEFAULT_SHARD_SIZE = 10_000
+
+# Per-process state of the matching workers, set by _init_worker
+_worker_state: dict = {}
+
+
+class PreparedPublication(NamedTuple):
+    """A publication normalized once: lowercased title and formatted date."""
+
+    id: str
+    # A MappedText for publications read with DataLoader(record_type="mmap")
+    title: str
+    title_lower: str
+    date: str
+    journal: str
+    source: str
+
+    @classmethod
+    def from_publication(cls, pub: Publication) -> "PreparedPublication":
+        return cls(
+            id=pub.id,
+            title=pub.title,
+            title_lower=pub.title.lower(),
+            date=pub.date.strftime("%Y-%m-%d"),
+            journal=pub.journal,
+            source=getattr(pub, "source", None),
+        )
+
+
+class PublicationSet:
+    """
+    Prepared publications partitioned by source.
+
+    ``ordered`` keeps every publication in input order (it drives the order of
+    the journals list), while ``pubmed`` and ``clinical_trials`` hold the
+    per-source buckets.
+    """
+
+    def __init__(self, publications: Iterable[PreparedPublication]):
+        self.ordered: List[PreparedPublication] = list(publications)
+        self.pubmed: List[PreparedPublication] = []
+        self.clinical_trials: List[PreparedPublication] = []
+        for pub in self.ordered:
+            if pub.source == "pubmed":
+                self.pubmed.append(pub)
+            elif pub.source == "clinical_trial":
+                self.clinical_trials.append(pub)
+
+    def __len__(self) -> int:
+        return len(self.ordered)
+
+    @classmethod
+    def from_publications(cls, publications: Iterable[Publication]) -> "PublicationSet":
+        """Prepare a mixed list of publications, keeping their order."""
+        return cls(PreparedPublication.from_publication(pub) for pub in publications)
+
+    @classmethod
+    def from_frame(cls, frame: PublicationFrame) -> "PublicationSet":
+        """Prepare a columnar PublicationFrame with vectorized lowercasing and dates."""
+        df = frame.df
+        with stage("transform.prepare", rows=len(df)):
+            return cls(
+                map(
+                    PreparedPublication._make,
+                    zip(
+                        df["id"],
+                        df["title"],
+                        df["title"].str.lower(),
+                        df["date"].dt.strftime("%Y-%m-%d"),
+                        df["journal"],
+                        df["source"],
+                    ),
+                )
+            )
+
+    @classmethod
+    def from_sources(
+        cls,
+        pubmed: Iterable[Publication] = (),
+        clinical_trials: Iterable[Publication] = (),
+    ) -> "PublicationSet":
+        """Prepare publications that are already split by source (pubmed first)."""
+        with stage("transform.prepare") as timing:
+            prepared = [PreparedPublication.from_publication(pub) for pub in pubmed]
+            prepared.extend(
+                PreparedPublication.from_publication(pub) for pub in clinical_trials
+            )
+            timing.add_rows(len(prepared))
+            return cls(prepared)
+
+
+def _token_hits(titles: List[str], drug_names: List[str]) -> List[Set[int]]:
+    """Return the drugs found as whole words in each title, aligned with titles."""
+    max_ngram = max((len(tokenize(name)) for name in drug_names), default=1)
+    index = TokenIndex(titles, max_ngram=max_ngram)
+
+    hits: List[Set[int]] = [set() for _ in titles]
+    for drug_index, name in enumerate(drug_names):
+        for position in index.lookup(name):
+            hits[position].add(drug_index)
+    return hits
+
+
+def _init_worker(match_mode: str, drug_set: Union[DrugMatcher, List[str]]) -> None:
+    """
+    Receive the drug set prepared by the parent process, once per worker:
+    a compiled DrugMatcher in substring mode, the drug names in token mode.
+    """
+    _worker_state["match_mode"] = match_mode
+    _worker_state["drug_set"] = drug_set
+
+
+def _match_shard(titles: List[str]) -> List[Set[int]]:
+    """Match a shard of lowercased titles in a worker process."""
+    drug_set = _worker_state["drug_set"]
+    if _worker_state["match_mode"] == "token":
+        return _token_hits(titles, drug_set)
+    return [drug_set.match_lower(title) for title in titles]
 
 
 class DataTransformer:
+    @staticmethod
+    def _iter_substring_hits(
+        drugs: List[Drug], publications: Iterable[PreparedPublication]
+    ) -> Iterator[Tuple[PreparedPublication, Set[int]]]:
+        """Yield each publication with the indexes of the drugs found in its title."""
+        matcher = DrugMatcher(drug.drug for drug in drugs)
+        for pub in publications:
+            yield pub, matcher.match_lower(pub.title_lower)
+
+    @staticmethod
+    def _iter_token_hits(
+        drugs: List[Drug], publications: Iterable[PreparedPublication]
+    ) -> Iterator[Tuple[PreparedPublication, Set[int]]]:
+        """Yield each publication with the drugs found as whole words in its title."""
+        # The index spans every title, so this mode needs all publications at once
+        publications = list(publications)
+        hits = _token_hits(
+            [pub.title_lower for pub in publications],
+            [drug.drug for drug in drugs],
+        )
+        return zip(publications, hits)
+
+    @staticmethod
+    def _iter_parallel_hits(
+        drugs: List[Drug],
+        publications: Iterable[PreparedPublication],
+        match_mode: str,
+        workers: int,
+        shard_size: int,
+    ) -> Iterator[Tuple[PreparedPublication, Set[int]]]:
+        """
+        Match contiguous shards of publications in a process pool.
+
+        Shards are matched independently against the drug set compiled once in
+        the parent, and results are consumed in shard order so the output is
+        the same as the serial path. Only a bounded number of shards is in
+        flight, so publications can be streamed from an iterator.
+        """
+        if match_mode == "substring":
+            drug_set = DrugMatcher(drug.drug for drug in drugs)
+        else:
+            drug_set = [drug.drug for drug in drugs]
+
+        publications = iter(publications)
+        pending = deque()
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(match_mode, drug_set),
+        ) as executor:
+            while True:
+                # Keep a couple of shards queued per worker
+                while len(pending) < workers * 2:
+                    shard = list(islice(publications, shard_size))
+                    if not shard:
+                        break
+                    titles = [pub.title_lower for pub in shard]
+                    pending.append((shard, executor.submit(_match_shard, titles)))
+                if not pending:
+                    return
+                shard, future = pending.popleft()
+                yield from zip(shard, future.result())
+
     @staticmethod
     def find_drug_mentions(
-        drugs: List[Drug], publications: List[Publication]
+        drugs: List[Drug],
+        publications: Union[Iterable[Publication], PublicationSet, PublicationFrame],
+        match_mode: str = "substring",
+        workers: int = 1,
+        shard_size: int = DEFAULT_SHARD_SIZE,
+        journal_dedup: str = "none",
     ) -> Dict[str, dict]:
-        mentions = {}
+        """
+        Find the publications mentioning each drug.
 
-        for drug in drugs:
-            drug_mentions = {
-                "mentions": {
-                    "pubmed": [
-                        {
-                            "id": pub.id,
-                            "title": pub.title,
-                            "date": pub.date.strftime("%Y-%m-%d"),
-                            "source": "pubmed",
-                        }
-                        for pub in publications
-                        if hasattr(pub, "source")
-                        and pub.source == "pubmed"
-                        and drug.drug.lower() in pub.title.lower()
-                    ],
-                    "clinical_trials": [
+        ``publications`` is either a PublicationSet prepared beforehand (see
+        PublicationSet.from_sources), a columnar PublicationFrame, or any
+        iterable of Publication objects, such as the DataLoader.iter_*
+        generators. Iterables are consumed one publication at a time, except in
+        token mode which indexes them all.
+
+        With match_mode="substring" (default) the drug list is compiled once into
+        a DrugMatcher and every title is scanned a single time. With
+        match_mode="token" titles are tokenized into an inverted index and drugs
+        only match whole words.
+
+        With workers > 1 publications are matched in shards of ``shard_size``
+        across a process pool; the result is identical to the serial run.
+
+        journal_dedup (see JOURNAL_DEDUP_MODES) drops repeated entries from each
+        drug's journals list, keeping the first one.
+        """
+        return dict(
+            DataTransformer.iter_drug_mentions(
+                drugs, publications, match_mode, workers, shard_size, journal_dedup
+            )
+        )
+
+    @staticmethod
+    def iter_drug_mentions(
+        drugs: List[Drug],
+        publications: Union[Iterable[Publication], PublicationSet, PublicationFrame],
+        match_mode: str = "substring",
+        workers: int = 1,
+        shard_size: int = DEFAULT_SHARD_SIZE,
+        journal_dedup: str = "none",
+    ) -> Iterator[Tuple[str, dict]]:
+        """
+        Same as find_drug_mentions, but yield (drug name, mentions) pairs one
+        drug at a time, e.g. to stream them into DataWriter.write_json.
+        """
+        prepared = DataTransformer.prepare(publications)
+        hits = DataTransformer.iter_hits(
+            drugs, prepared, match_mode, workers=workers, shard_size=shard_size
+        )
+        return DataTransformer.iter_mentions(drugs, hits, journal_dedup)
+
+    @staticmethod
+    def prepare(
+        publications: Union[Iterable[Publication], PublicationSet, PublicationFrame],
+    ) -> Iterable[PreparedPublication]:
+        """Return the publications as PreparedPublication, lazily for iterables."""
+        if isinstance(publications, PublicationFrame):
+            publications = PublicationSet.from_frame(publications)
+
+        if isinstance(publications, PublicationSet):
+            return publications.ordered
+        return (PreparedPublication.from_publication(pub) for pub in publications)
+
+    @staticmethod
+    def iter_hits(
+        drugs: List[Drug],
+        prepared: Iterable[PreparedPublication],
+        match_mode: str = "substring",
+        workers: int = 1,
+        shard_size: int = DEFAULT_SHARD_SIZE,
+    ) -> Iterator[Tuple[PreparedPublication, Set[int]]]:
+        """Yield each prepared publication with the indexes of the drugs it mentions."""
+        if match_mode not in MATCH_MODES:
+            raise ValueError(
+                f"Unknown match mode: {match_mode} (expected one of {MATCH_MODES})"
+            )
+        if workers < 1:
+            raise ValueError(f"workers must be at least 1, got {workers}")
+
+        if workers > 1:
+            hits = DataTransformer._iter_parallel_hits(
+                drugs, prepared, match_mode, workers, shard_size
+            )
+        elif match_mode == "substring":
+            hits = DataTransformer._iter_substring_hits(drugs, prepared)
+        else:
+            hits = DataTransformer._iter_token_hits(drugs, prepared)
+        return timed_iter("transform.match", hits)
+
+    @staticmethod
+    def iter_drug_edges(
+        drugs: List[Drug],
+        publications: Union[Iterable[Publication], PublicationSet, PublicationFrame],
+        match_mode: str = "substring",
+        workers: int = 1,
+        shard_size: int = DEFAULT_SHARD_SIZE,
+    ) -> Iterator[tuple]:
+        """
+        Yield one EDGE_COLUMNS row per (drug, publication) match, in publication
+        order: the normalized, columnar form of find_drug_mentions.
+        """
+        prepared = DataTransformer.prepare(publications)
+        hits = DataTransformer.iter_hits(
+            drugs, prepared, match_mode, workers=workers, shard_size=shard_size
+        )
+        return DataTransformer.iter_edges(drugs, hits)
+
+    @staticmethod
+    def iter_edges(
+        drugs: List[Drug], hits: Iterable[Tuple[PreparedPublication, Set[int]]]
+    ) -> Iterator[tuple]:
+        """Yield EDGE_COLUMNS rows from (publication, drug indexes) pairs."""
+        return timed_iter("transform.edges", DataTransformer._iter_edges(drugs, hits))
+
+    @staticmethod
+    def _iter_edges(
+        drugs: List[Drug], hits: Iterable[Tuple[PreparedPublication, Set[int]]]
+    ) -> Iterator[tuple]:
+        for pub, drug_indexes in hits:
+            for index in sorted(drug_indexes):
+                drug = drugs[index]
+                yield (
+                    drug.drug,
+                    drug.atccode,
+                    pub.id,
+                    pub.source,
+                    pub.journal,
+                    pub.date,
+                )
+
+    @staticmethod
+    def build_mentions(
+        drugs: List[Drug],
+        hits: Iterable[Tuple[PreparedPublication, Set[int]]],
+        journal_dedup: str = "none",
+    ) -> Dict[str, dict]:
+        """Assemble the output mapping from (publication, drug indexes) pairs."""
+        return dict(DataTransformer.iter_mentions(drugs, hits, journal_dedup))
+
+    @staticmethod
+    def iter_mentions(
+        drugs: List[Drug],
+        hits: Iterable[Tuple[PreparedPublication, Set[int]]],
+        journal_dedup: str = "none",
+    ) -> Iterator[Tuple[str, dict]]:
+        """
+        Yield (drug name, mentions) pairs, in drug order, from (publication,
+        drug indexes) pairs. Each drug's lists are released once yielded.
+
+        With journal_dedup="journal" or "journal_date", a journals entry is only
+        added the first time its key is seen for the drug (a set per drug).
+        """
+        if journal_dedup not in JOURNAL_DEDUP_MODES:
+            raise ValueError(
+                f"Unknown journal dedup mode: {journal_dedup} "
+                f"(expected one of {JOURNAL_DEDUP_MODES})"
+            )
+        return timed_iter(
+            "transform.assemble",
+            DataTransformer._iter_mentions(drugs, hits, journal_dedup),
+        )
+
+    @staticmethod
+    def _iter_mentions(
+        drugs: List[Drug],
+        hits: Iterable[Tuple[PreparedPublication, Set[int]]],
+        journal_dedup: str,
+    ) -> Iterator[Tuple[str, dict]]:
+        pubmed = [[] for _ in drugs]
+        clinical_trials = [[] for _ in drugs]
+        journals = [[] for _ in drugs]
+        seen_journals = None if journal_dedup == "none" else [set() for _ in drugs]
+
+        for pub, drug_indexes in hits:
+            if not drug_indexes:
+                continue
+            if pub.source == "pubmed":
+                by_source = pubmed
+            elif pub.source == "clinical_trial":
+                by_source = clinical_trials
+            else:
+                by_source = None
+            for index in drug_indexes:
+                if by_source is not None:
+                    by_source[index].append(
                         {
                             "id": pub.id,
-                            "title": pub.title,
-                            "date": pub.date.strftime("%Y-%m-%d"),
-                            "source": "clinical_trial",
+                            # Decodes titles left in a memory-mapped file
+                            "title": str(pub.title),
+                            "date": pub.date,
+                            "source": pub.source,
                         }
-                        for pub in publications
-                        if hasattr(pub, "source")
-                        and pub.source == "clinical_trial"
-                        and drug.drug.lower() in pub.title.lower()
-                    ],
-                    "journals": [
-                        {"name": pub.journal, "date": pub.date.strftime("%Y-%m-%d")}
-                        for pub in publications
-                        if drug.drug.lower() in pub.title.lower()
-                        and pub.journal is not None
-                    ],
+                    )
+                if pub.journal is not None:
+                    if seen_journals is not None:
+                        key = (
+                            pub.journal
+                            if journal_dedup == "journal"
+                            else (pub.journal, pub.date)
+                        )
+                        if key in seen_journals[index]:
+                            continue
+                        seen_journals[index].add(key)
+                    journals[index].append({"name": pub.journal, "date": pub.date})
+
+        # Drugs listed twice have the same mentions, only yield them once
+        seen = set()
+        for index, drug in enumerate(drugs):
+            drug_mentions = {
+                "mentions": {
+                    "pubmed": pubmed[index],
+                    "clinical_trials": clinical_trials[index],
+                    "journals": journals[index],
                 }
             }
+            pubmed[index] = clinical_trials[index] = journals[index] = None
+            if seen_journals is not None:
+                seen_journals[index] = None
 
             # Only add drugs that have mentions
-            if any(
+            if drug.drug not in seen and any(
                 len(mentions) > 0 for mentions in drug_mentions["mentions"].values()
             ):
-                mentions[drug.drug] = drug_mentions
-
-        return mentions
+                seen.add(drug.drug)
+                yield drug.drug, drug_mentions
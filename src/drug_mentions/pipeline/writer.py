@@ -1,23 +1,205 @@
 import json
+import os
+import secrets
+from itertools import islice
 from pathlib import Path
-from typing import Any, Dict
+from typing import IO, Any, Dict, Iterable, Tuple, Union
+
+from drug_mentions.instrumentation import stage
+from drug_mentions.pipeline.columnar import require_pyarrow
+from drug_mentions.pipeline.transformer import EDGE_COLUMNS
+
+WRITE_FORMATS = ("pretty", "compact", "ndjson")
+
+
+def _edge_schema(pa):
+    # Low-cardinality strings are dictionary-encoded, dates are typed
+    dictionary = pa.dictionary(pa.int32(), pa.string())
+    types = {"id": pa.string(), "date": pa.date32()}
+    return pa.schema([(name, types.get(name, dictionary)) for name in EDGE_COLUMNS])
+
+
+def _keep_mode(tmp_name: str, output_path: Path) -> None:
+    """Give the temporary file the mode of the file it replaces, if any."""
+    try:
+        mode = os.stat(output_path).st_mode & 0o777
+    except FileNotFoundError:
+        return
+    os.chmod(tmp_name, mode)
+
+
+def _atomic_temp(output_path: Path) -> Tuple[int, str]:
+    """
+    Create a temporary file next to ``output_path``, with the mode open()
+    gives new files (0o666 less the umask; mkstemp would make it 0o600).
+    """
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    while True:
+        tmp_name = str(
+            output_path.parent / f".{output_path.name}.{secrets.token_hex(4)}.tmp"
+        )
+        try:
+            flags = os.O_WRONLY | os.O_CREAT | os.O_EXCL
+            return os.open(tmp_name, flags, 0o666), tmp_name
+        except FileExistsError:
+            continue
+
+
+def _pretty(drug: str, entry: Any) -> str:
+    # Same layout as json.dump(data, f, indent=2), one top-level key at a time
+    value = json.dumps(entry, indent=2, default=str).replace("\n", "\n  ")
+    return f"  {json.dumps(drug)}: {value}"
+
+
+def _compact(drug: str, entry: Any) -> str:
+    value = json.dumps(entry, separators=(",", ":"), default=str)
+    return f"{json.dumps(drug)}:{value}"
+
+
+def _ndjson(drug: str, entry: Any) -> str:
+    # One DrugMention per line
+    return json.dumps({"drug": drug, **entry}, default=str)
+
+
+def _write_items(
+    f: IO[str], items: Iterable[Tuple[str, Any]], output_format: str
+) -> int:
+    count = 0
+    if output_format == "ndjson":
+        for drug, entry in items:
+            f.write(_ndjson(drug, entry))
+            f.write("\n")
+            count += 1
+        return count
+
+    render = _pretty if output_format == "pretty" else _compact
+    separator = ",\n" if output_format == "pretty" else ","
+    f.write("{")
+    for drug, entry in items:
+        if count:
+            f.write(separator)
+        elif output_format == "pretty":
+            f.write("\n")
+        f.write(render(drug, entry))
+        count += 1
+    if count and output_format == "pretty":
+        f.write("\n")
+    f.write("}")
+    return count
+
+
+def _write_batches(
+    pa, parquet_writer, schema, edges: Iterable[tuple], batch_size: int
+) -> int:
+    count = 0
+    edges = iter(edges)
+    while True:
+        rows = list(islice(edges, batch_size))
+        if not rows:
+            return count
+        columns = list(zip(*rows))
+        batch = pa.record_batch(
+            [
+                pa.array(column, pa.string()).cast(field.type)
+                for column, field in zip(columns, schema)
+            ],
+            schema=schema,
+        )
+        parquet_writer.write_batch(batch)
+        count += len(rows)
 
 
 class DataWriter:
     @staticmethod
-    def write_json(data: Dict[str, Any], output_path: Path) -> None:
+    def write_json(
+        data: Union[Dict[str, Any], Iterable[Tuple[str, Any]]],
+        output_path: Union[Path, IO[str]],
+        output_format: str = "pretty",
+    ) -> int:
         """
-        Write data to a JSON file.
+        Write data to a JSON file, one drug at a time.
 
         Args:
-            data: Dictionary containing the drug mentions data
-            output_path: Path where the JSON file will be written
+            data: Dictionary containing the drug mentions data, or an iterable of
+                (drug, mentions) pairs such as DataTransformer.iter_drug_mentions
+            output_path: Path where the JSON file will be written, or a text
+                file-like object (e.g. io.StringIO) to write to directly
+            output_format: "pretty" (indented, default), "compact" (no
+                whitespace) or "ndjson" (one {"drug": ..., "mentions": ...}
+                object per line)
+
+        Files are written to a temporary file next to output_path and renamed
+        once complete, so readers never see a partial file.
+        Returns the number of drugs written.
         """
-        # Create output directory
-        output_path.parent.mkdir(parents=True, exist_ok=True)
+        if output_format not in WRITE_FORMATS:
+            raise ValueError(
+                f"Unknown output format: {output_format} "
+                f"(expected one of {WRITE_FORMATS})"
+            )
+        items = data.items() if isinstance(data, dict) else data
+
+        if hasattr(output_path, "write"):
+            with stage("write.json") as timing:
+                count = _write_items(output_path, items, output_format)
+                timing.add_rows(count)
+            return count
+
+        fd, tmp_name = _atomic_temp(output_path)
+        try:
+            with stage("write.json") as timing, os.fdopen(fd, "w") as f:
+                count = _write_items(f, items, output_format)
+                timing.add_rows(count)
+            _keep_mode(tmp_name, output_path)
+            os.replace(tmp_name, output_path)
+        except Exception as e:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise Exception(f"Error writing to {output_path}: {str(e)}")
+        return count
+
+    @staticmethod
+    def write_parquet(
+        edges: Iterable[tuple],
+        output_path: Union[Path, IO[bytes]],
+        batch_size: int = 100_000,
+    ) -> int:
+        """
+        Write the drug -> publication edge table to a Parquet file.
+
+        Args:
+            edges: rows of EDGE_COLUMNS (drug, atccode, id, source, journal,
+                date), such as DataTransformer.iter_drug_edges
+            output_path: Path where the Parquet file will be written, or a
+                binary file-like object (e.g. io.BytesIO) to write to directly
+            batch_size: number of rows converted and written at a time
+
+        String columns other than the publication id are dictionary-encoded and
+        dates are stored as date32. Requires pyarrow. Files are written
+        atomically like write_json. Returns the number of rows written.
+        """
+        pa = require_pyarrow()
+        import pyarrow.parquet as pq
+
+        schema = _edge_schema(pa)
+        if hasattr(output_path, "write"):
+            with stage("write.parquet") as timing, pq.ParquetWriter(
+                output_path, schema
+            ) as parquet_writer:
+                count = _write_batches(pa, parquet_writer, schema, edges, batch_size)
+                timing.add_rows(count)
+            return count
 
+        fd, tmp_name = _atomic_temp(output_path)
+        os.close(fd)
         try:
-            with open(output_path, "w") as f:
-                json.dump(data, f, indent=2, default=str)
+            with stage("write.parquet") as timing, pq.ParquetWriter(
+                tmp_name, schema
+            ) as parquet_writer:
+                count = _write_batches(pa, parquet_writer, schema, edges, batch_size)
+                timing.add_rows(count)
+            _keep_mode(tmp_name, output_path)
+            os.replace(tmp_name, output_path)
         except Exception as e:
+            Path(tmp_name).unlink(missing_ok=True)
             raise Exception(f"Error writing to {output_path}: {str(e)}")
+        return count
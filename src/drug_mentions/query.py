@@ -0,0 +1,395 @@
+"""
+Read-only queries over the drug mentions output.
+
+MentionIndex loads the pipeline output once (the JSON/NDJSON mentions file or
+the Parquet edge table) and keeps, for each drug, journal and source, its rows
+sorted by date, so that date ranges are answered with two bisections instead of
+a scan. ``serve`` exposes the same queries as a local JSON HTTP endpoint.
+"""
+
+import calendar
+import json
+import re
+from bisect import bisect_left, bisect_right
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple, Union
+from urllib.parse import parse_qs, urlparse
+
+from drug_mentions.ids import IdTable
+from drug_mentions.models.schema import Drug
+from drug_mentions.pipeline.columnar import require_pyarrow
+from drug_mentions.pipeline.jsonstream import iter_json_records
+from drug_mentions.pipeline.transformer import PreparedPublication
+
+DateBound = Union[str, date, None]
+_PARTIAL_DATE = re.compile(r"(\d{4})(?:-(\d{2})(?:-(\d{2}))?)?")
+
+
+def _iso_date(value: DateBound) -> Optional[str]:
+    # Dates are kept as "%Y-%m-%d" strings, which sort like the dates themselves
+    if value is None or value == "":
+        return None
+    if isinstance(value, date):
+        return value.strftime("%Y-%m-%d")
+    return str(value)
+
+
+def _date_bound(value: DateBound, last: bool) -> Optional[str]:
+    """
+    A range bound as an ISO date. Partial dates ("2020", "2020-03") stand for
+    their whole period: its first day, or its ``last`` day for an end bound.
+    """
+    bound = _iso_date(value)
+    if bound is None or isinstance(value, date):
+        return bound
+    match = _PARTIAL_DATE.fullmatch(bound)
+    if match is None:
+        raise ValueError(
+            f"Invalid date bound: {bound!r} (expected YYYY, YYYY-MM or YYYY-MM-DD)"
+        )
+    year, month, day = match.groups()
+    if day is None:
+        if month is None:
+            month = "12" if last else "01"
+        day = calendar.monthrange(int(year), int(month))[1] if last else 1
+    try:
+        return date(int(year), int(month), int(day)).isoformat()
+    except ValueError as e:
+        raise ValueError(f"Invalid date bound: {bound!r} ({e})") from None
+
+
+def _year_range(year: Optional[int]) -> Tuple[Optional[str], Optional[str]]:
+    if year is None:
+        return None, None
+    return f"{int(year):04d}-01-01", f"{int(year):04d}-12-31"
+
+
+class _SortedRows:
+    """
+    Row numbers sorted by date, rows without a date last, with the dates
+    alongside for bisection.
+    """
+
+    __slots__ = ("dates", "rows")
+
+    def __init__(self, rows: List[int], dates: List[Optional[str]]):
+        self.rows = sorted(
+            rows, key=lambda row: (dates[row] is None, dates[row] or "", row)
+        )
+        self.dates = [dates[row] for row in self.rows if dates[row] is not None]
+
+    def between(self, start: Optional[str], end: Optional[str]) -> List[int]:
+        """The rows in the range; undated rows only when it is unbounded."""
+        if start is None and end is None:
+            return self.rows[:]
+        lo = 0 if start is None else bisect_left(self.dates, start)
+        hi = len(self.dates) if end is None else bisect_right(self.dates, end)
+        return self.rows[lo:hi]
+
+
+_NO_ROWS = _SortedRows([], [])
+
+
+def _columns(rows: Iterable[tuple], width: int) -> List[list]:
+    columns = [list(column) for column in zip(*rows)]
+    return columns or [[] for _ in range(width)]
+
+
+def _build(keys: List[str], dates: List[Optional[str]]) -> Dict[str, _SortedRows]:
+    grouped: Dict[str, List[int]] = {}
+    for row, key in enumerate(keys):
+        if key is not None:
+            grouped.setdefault(key.casefold(), []).append(row)
+    return {key: _SortedRows(rows, dates) for key, rows in grouped.items()}
+
+
+class MentionIndex:
+    """
+    In-memory indexes over drug mentions.
+
+    Two tables are kept, column by column: publication mentions (drug, id,
+    title, date, source) and journal mentions (drug, journal, date), each
+    indexed by date overall and per drug, source or journal. Drug and journal
+    names are matched case-insensitively. Dates are "%Y-%m-%d" strings and
+    date bounds are inclusive; partial bounds ("2020", "2020-03") cover their
+    whole period.
+    """
+
+    def __init__(
+        self,
+        publications: Iterable[Tuple[str, str, str, str, str]],
+        journals: Iterable[Tuple[str, str, str]],
+    ):
+        (
+            self._pub_drug,
+            self._pub_id,
+            self._pub_title,
+            self._pub_date,
+            self._pub_source,
+        ) = _columns(publications, 5)
+        # Ids are kept as codes into ``ids``, looked up when results are built
+        self.ids = IdTable()
+        self._pub_id = self.ids.encode(self._pub_id)
+        self._journal_drug, self._journal_name, self._journal_date = _columns(
+            journals, 3
+        )
+
+        all_pubs = range(len(self._pub_date))
+        self._pubs = _SortedRows(list(all_pubs), self._pub_date)
+        self._pubs_by_drug = _build(self._pub_drug, self._pub_date)
+        self._pubs_by_source = _build(self._pub_source, self._pub_date)
+
+        all_journals = range(len(self._journal_date))
+        self._journals = _SortedRows(list(all_journals), self._journal_date)
+        self._journals_by_drug = _build(self._journal_drug, self._journal_date)
+        self._journals_by_name = _build(self._journal_name, self._journal_date)
+
+    def __len__(self) -> int:
+        return len(self._pub_date)
+
+    @classmethod
+    def from_mentions(cls, mentions: Iterable[Tuple[str, dict]]) -> "MentionIndex":
+        """Index (drug, mentions) pairs, as in the drug mentions JSON."""
+        publications = []
+        journals = []
+        for drug, details in mentions:
+            entry = details.get("mentions", {})
+            for key in ("pubmed", "clinical_trials"):
+                for pub in entry.get(key, []):
+                    publications.append(
+                        (drug, pub["id"], pub["title"], pub["date"], pub["source"])
+                    )
+            for journal in entry.get("journals", []):
+                journals.append((drug, journal["name"], journal["date"]))
+        return cls(publications, journals)
+
+    @classmethod
+    def from_hits(
+        cls,
+        drugs: List[Drug],
+        hits: Iterable[Tuple[PreparedPublication, Set[int]]],
+    ) -> "MentionIndex":
+        """Index (publication, drug indexes) pairs from DataTransformer.iter_hits."""
+        publications = []
+        journals = []
+        for pub, drug_indexes in hits:
+            # Drugs listed twice are only indexed once, like in the JSON output
+            names = dict.fromkeys(drugs[index].drug for index in sorted(drug_indexes))
+            for name in names:
+                if pub.source in ("pubmed", "clinical_trial"):
+                    publications.append(
+                        (name, pub.id, str(pub.title), pub.date, pub.source)
+                    )
+                if pub.journal is not None:
+                    journals.append((name, pub.journal, pub.date))
+        return cls(publications, journals)
+
+    @classmethod
+    def from_edges(cls, edges: Iterable[tuple]) -> "MentionIndex":
+        """Index EDGE_COLUMNS rows; the edge table has no publication titles."""
+        publications = []
+        journals = []
+        for drug, _, pub_id, source, journal, pub_date in edges:
+            pub_date = _iso_date(pub_date)
+            if source in ("pubmed", "clinical_trial"):
+                publications.append((drug, pub_id, None, pub_date, source))
+            if journal is not None:
+                journals.append((drug, journal, pub_date))
+        return cls(publications, journals)
+
+    @classmethod
+    def load(cls, path: Path) -> "MentionIndex":
+        """
+        Load a pipeline output: the Parquet edge table, or the mentions JSON
+        in any of the write_json layouts (pretty, compact or NDJSON).
+        """
+        path = Path(path)
+        if path.suffix == ".parquet":
+            require_pyarrow()
+            import pyarrow.parquet as pq
+
+            table = pq.read_table(path)
+            return cls.from_edges(
+                zip(*(column.to_pylist() for column in table.columns))
+            )
+
+        def pairs():
+            for record in iter_json_records(path, encoding="utf-8"):
+                if set(record) == {"drug", "mentions"} and isinstance(
+                    record["drug"], str
+                ):
+                    # NDJSON layout, one drug per line
+                    yield record["drug"], record
+                else:
+                    yield from record.items()
+
+        return cls.from_mentions(pairs())
+
+    def publications(
+        self,
+        drug: Optional[str] = None,
+        source: Optional[str] = None,
+        start: DateBound = None,
+        end: DateBound = None,
+        year: Optional[int] = None,
+        limit: Optional[int] = None,
+    ) -> List[dict]:
+        """
+        Publications mentioning ``drug`` (any drug if None), optionally of one
+        ``source`` and within a date range (or a ``year``), sorted by date,
+        undated ones last.
+        """
+        start, end = self._range(start, end, year)
+        if drug is not None:
+            rows = self._lookup(self._pubs_by_drug, drug).between(start, end)
+            if source is not None:
+                # Case-insensitive, like the lookups by source
+                source = source.casefold()
+                rows = [
+                    row for row in rows if self._pub_source[row].casefold() == source
+                ]
+        elif source is not None:
+            rows = self._lookup(self._pubs_by_source, source).between(start, end)
+        else:
+            rows = self._pubs.between(start, end)
+        if limit is not None:
+            rows = rows[:limit]
+        return [
+            {
+                "drug": self._pub_drug[row],
+                "id": self.ids[self._pub_id[row]],
+                "title": self._pub_title[row],
+                "date": self._pub_date[row],
+                "source": self._pub_source[row],
+            }
+            for row in rows
+        ]
+
+    def drugs(
+        self,
+        journal: Optional[str] = None,
+        start: DateBound = None,
+        end: DateBound = None,
+        year: Optional[int] = None,
+    ) -> List[str]:
+        """Distinct drugs mentioned in ``journal`` (any journal if None) in a date range."""
+        start, end = self._range(start, end, year)
+        index = (
+            self._journals
+            if journal is None
+            else self._lookup(self._journals_by_name, journal)
+        )
+        return sorted({self._journal_drug[row] for row in index.between(start, end)})
+
+    def journals(
+        self,
+        drug: Optional[str] = None,
+        start: DateBound = None,
+        end: DateBound = None,
+        year: Optional[int] = None,
+    ) -> List[str]:
+        """Distinct journals mentioning ``drug`` (any drug if None) in a date range."""
+        start, end = self._range(start, end, year)
+        index = (
+            self._journals
+            if drug is None
+            else self._lookup(self._journals_by_drug, drug)
+        )
+        return sorted({self._journal_name[row] for row in index.between(start, end)})
+
+    @staticmethod
+    def _lookup(index: Dict[str, _SortedRows], key: str) -> _SortedRows:
+        return index.get(key.casefold(), _NO_ROWS)
+
+    @staticmethod
+    def _range(
+        start: DateBound, end: DateBound, year: Optional[int]
+    ) -> Tuple[Optional[str], Optional[str]]:
+        year_start, year_end = _year_range(year)
+        start, end = _date_bound(start, last=False), _date_bound(end, last=True)
+        if year_start is not None:
+            start = max(start, year_start) if start is not None else year_start
+            end = min(end, year_end) if end is not None else year_end
+        return start, end
+
+
+def _query_handler(index: MentionIndex):
+    class QueryHandler(BaseHTTPRequestHandler):
+        """
+        GET /publications?drug=&source=&start=&end=&year=&limit=
+        GET /drugs?journal=&start=&end=&year=
+        GET /journals?drug=&start=&end=&year=
+        """
+
+        # Keep-alive, every response has a Content-Length. Headers and body
+        # are sent separately, Nagle would hold the body until the next ACK
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+            try:
+                for key in ("year", "limit"):
+                    if key in params:
+                        params[key] = int(params[key])
+                if url.path == "/publications":
+                    allowed = {"drug", "source", "start", "end", "year", "limit"}
+                    query = index.publications
+                elif url.path == "/drugs":
+                    allowed = {"journal", "start", "end", "year"}
+                    query = index.drugs
+                elif url.path == "/journals":
+                    allowed = {"drug", "start", "end", "year"}
+                    query = index.journals
+                else:
+                    return self._send(404, {"error": f"Unknown path: {url.path}"})
+                unknown = set(params) - allowed
+                if unknown:
+                    raise ValueError(f"Unknown parameters: {sorted(unknown)}")
+                result = query(**params)
+            except ValueError as e:
+                return self._send(400, {"error": str(e)})
+            self._send(200, {"count": len(result), "results": result})
+
+        def _send(self, status: int, body: dict) -> None:
+            payload = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            # Keep the console quiet, one line per request is too much
+            pass
+
+    return QueryHandler
+
+
+def make_server(
+    index: MentionIndex, host: str = "127.0.0.1", port: int = 8765
+) -> ThreadingHTTPServer:
+    """HTTP server answering queries from ``index`` (port 0 picks a free port)."""
+    return ThreadingHTTPServer((host, port), _query_handler(index))
+
+
+def serve(
+    index: MentionIndex,
+    host: str = "127.0.0.1",
+    port: int = 8765,
+    on_start: Optional[Callable[[str], None]] = None,
+) -> None:
+    """
+    Serve queries from ``index`` until interrupted. ``on_start`` is called
+    with the server's URL once it listens.
+    """
+    with make_server(index, host, port) as server:
+        if on_start is not None:
+            on_start(f"http://{host}:{server.server_port}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
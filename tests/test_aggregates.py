@@ -0,0 +1,52 @@
+from pathlib import Path
+
+from drug_mentions.models.schema import Drug, Publication
+from drug_mentions.pipeline.aggregates import JournalIndex
+from drug_mentions.pipeline.transformer import DataTransformer
+from drug_mentions.pipeline.writer import DataWriter
+
+
+def test_journal_index_matches_output_scan(tmp_path: Path):
+    """
+    The index built during the transform pass ranks journals the same way as
+    a scan of the drug mentions output, and survives a save/load round trip.
+    """
+    drugs = [
+        Drug(atccode="A01", drug="Aspirin"),
+        Drug(atccode="B01", drug="Ibuprofen"),
+        Drug(atccode="C01", drug="Ethanol"),
+    ]
+    rows = [
+        ("1", "Aspirin and ibuprofen", "Journal A"),
+        ("2", "Ethanol study", "Journal A "),
+        ("3", "Aspirin only", "Journal B"),
+        ("4", "Aspirin again", "Journal B"),
+        ("5", "Nothing here", "Journal C"),
+        ("6", "Ibuprofen", ""),
+    ]
+    publications = [
+        Publication(id=id, title=title, date="2020-01-01", journal=journal)
+        for id, title, journal in rows
+    ]
+
+    index = JournalIndex()
+    hits = index.observe(
+        drugs,
+        DataTransformer.iter_hits(drugs, DataTransformer.prepare(publications)),
+    )
+    mentions = DataTransformer.build_mentions(drugs, hits)
+
+    assert index.ranking() == [("Journal A", 3), ("Journal B", 1)]
+    assert index.ranking() == JournalIndex.from_mentions(mentions).ranking()
+    assert index.top(1) == [
+        {
+            "journal": "Journal A",
+            "distinct_drugs": 3,
+            "drugs": ["Aspirin", "Ethanol", "Ibuprofen"],
+        }
+    ]
+
+    index_file = tmp_path / "journal_index.json"
+    DataWriter.write_json(index.to_dict(), index_file)
+    loaded = JournalIndex.load(index_file)
+    assert loaded.top(5) == index.top(5)
@@ -0,0 +1,49 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from drug_mentions.cache import ResultCache, content_key, pipeline_version
+
+
+def test_content_key_depends_on_kind_parts_and_version():
+    """Test that keys are stable, and differ with the kind or any part."""
+    key = content_key("input", "drugs", b"atccode,drug\n")
+    assert key == content_key("input", "drugs", b"atccode,drug\n")
+    assert key != content_key("results", "drugs", b"atccode,drug\n")
+    assert key != content_key("input", "drugs", b"atccode,drug\nA01,X\n")
+    # Parts are length-prefixed, so moving a boundary changes the key
+    assert content_key("k", "ab", "c") != content_key("k", "a", "bc")
+    assert len(pipeline_version()) == 64
+
+
+def test_result_cache_evicts_least_recently_used():
+    """Test the size cap: the least recently used entries are evicted first."""
+    cache = ResultCache(max_bytes=10)
+    cache.put("a", 1, size=4)
+    cache.put("b", 2, size=4)
+    assert cache.get("a") == 1  # "b" is now the least recently used
+    cache.put("c", 3, size=4)
+
+    assert "b" not in cache
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    assert cache.size == 8
+
+    cache.put("huge", 4, size=11)
+    assert "huge" not in cache
+    assert cache.stats()["evictions"] == 1
+
+
+def test_get_or_compute_computes_once():
+    """Test that concurrent misses on one key share a single computation."""
+    cache = ResultCache()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return "value"
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        values = list(
+            pool.map(lambda _: cache.get_or_compute("key", compute, size=len), range(8))
+        )
+    assert values == ["value"] * 8
+    assert len(calls) == 1
+    assert cache.size == len("value")
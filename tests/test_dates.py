@@ -0,0 +1,29 @@
+from datetime import datetime
+
+import pytest
+
+from drug_mentions.dates import DateParser, parse_date
+
+
+def test_date_parser_detects_and_remembers_format():
+    """Test that the first matching format is remembered for the next values."""
+    parser = DateParser()
+    assert parser.parse("1 January 2020") == datetime(2020, 1, 1)
+    assert parser.format == "%d %B %Y"
+    assert parser.parse(" 27 April 2020 ") == datetime(2020, 4, 27)
+
+    # A value in another format is still parsed, and becomes the detected one
+    assert parser.parse("25/05/2020") == datetime(2020, 5, 25)
+    assert parser.format == "%d/%m/%Y"
+
+
+def test_date_parser_caches_and_rejects_invalid_values():
+    """Test that parsed values are cached and invalid ones raise ValueError."""
+    parser = DateParser(cache_size=2)
+    first = parser.parse("2020-01-01")
+    assert parser.parse("2020-01-01") is first
+
+    with pytest.raises(ValueError):
+        parser.parse("not a date")
+    with pytest.raises(ValueError):
+        parse_date(20200101)
@@ -0,0 +1,110 @@
+import pytest
+
+from drug_mentions.graph import GROUPS, MAX_LABEL_LENGTH, build_graph
+
+
+def _pub(pub_id: str, title: str, source: str = "pubmed") -> dict:
+    return {"id": pub_id, "title": title, "date": "2020-01-01", "source": source}
+
+
+RESULTS = {
+    "ASPIRIN": {
+        "mentions": {
+            "pubmed": [_pub("1", "Aspirin and ethanol"), _pub("2", "Aspirin")],
+            "clinical_trials": [_pub("NCT1", "x" * 200, "clinical_trial")],
+            "journals": [
+                {"name": "Journal A", "date": "2020-01-01"},
+                {"name": "Journal A", "date": "2020-01-01"},
+                {"name": "Journal B", "date": "2020-01-01"},
+            ],
+        }
+    },
+    "ETHANOL": {
+        "mentions": {
+            "pubmed": [_pub("1", "Aspirin and ethanol")],
+            "clinical_trials": [],
+            "journals": [{"name": "Journal A", "date": "2020-01-01"}],
+        }
+    },
+    "UNUSED": {"mentions": {"pubmed": [], "clinical_trials": [], "journals": []}},
+}
+
+
+def _nodes(graph: dict) -> list:
+    nodes = graph["nodes"]
+    return [
+        (label, GROUPS[group], count)
+        for label, group, count in zip(nodes["label"], nodes["group"], nodes["count"])
+    ]
+
+
+def _links(graph: dict) -> set:
+    labels = graph["nodes"]["label"]
+    links = graph["links"]
+    return {
+        (labels[source], labels[target], weight)
+        for source, target, weight in zip(
+            links["source"], links["target"], links["weight"]
+        )
+    }
+
+
+def test_build_graph_collapses_publications_and_shares_journals():
+    """
+    Test the default level of detail: publications are counted per drug and
+    source, and journals are single nodes linked to every drug citing them.
+    """
+    graph = build_graph(RESULTS)
+
+    assert _nodes(graph) == [
+        ("ASPIRIN", "drug", 3),
+        ("2 pubmed", "pubmed", 2),
+        ("1 clinical_trials", "clinical_trials", 1),
+        ("ETHANOL", "drug", 1),
+        ("1 pubmed", "pubmed", 1),
+        ("UNUSED", "drug", 0),
+        ("Journal A", "journal", 3),
+        ("Journal B", "journal", 1),
+    ]
+    assert _links(graph) == {
+        ("ASPIRIN", "2 pubmed", 2),
+        ("ASPIRIN", "1 clinical_trials", 1),
+        ("ETHANOL", "1 pubmed", 1),
+        ("ASPIRIN", "Journal A", 2),
+        ("ETHANOL", "Journal A", 1),
+        ("ASPIRIN", "Journal B", 1),
+    }
+    assert set(graph["omitted"].values()) == {0}
+
+
+def test_build_graph_expands_drugs_with_shared_publications():
+    """Test that expanded drugs list their publications, one node each."""
+    graph = build_graph(RESULTS, expand=["ASPIRIN", "ETHANOL"])
+
+    labels = graph["nodes"]["label"]
+    assert not any(label[0].isdigit() for label in labels)
+    assert labels.count("Aspirin and ethanol") == 1
+    assert ("ETHANOL", "Aspirin and ethanol", 1) in _links(graph)
+    assert max(map(len, labels)) == MAX_LABEL_LENGTH
+
+
+def test_build_graph_respects_node_and_link_budgets():
+    """Test that detail is dropped by level once the budgets are reached."""
+    graph = build_graph(RESULTS, max_nodes=6, expand=["ASPIRIN"], max_links=2)
+
+    # Half of the nodes for drugs, half of the rest for publications
+    assert _nodes(graph) == [
+        ("ASPIRIN", "drug", 3),
+        ("1 clinical_trials", "clinical_trials", 1),
+        ("Aspirin and ethanol", "pubmed", 1),
+        ("Aspirin", "pubmed", 1),
+        ("Journal A", "journal", 2),
+    ]
+    assert graph["omitted"] == {"drugs": 2, "journals": 1, "links": 2}
+    assert _links(graph) == {
+        ("ASPIRIN", "Journal A", 2),
+        ("ASPIRIN", "1 clinical_trials", 1),
+    }
+
+    with pytest.raises(ValueError):
+        build_graph(RESULTS, max_nodes=-1)
@@ -0,0 +1,62 @@
+import math
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from drug_mentions.ids import IdTable, normalize_id, normalize_id_column
+from drug_mentions.pipeline.loader import DataLoader
+
+
+def test_normalize_id():
+    """Test that ints, floats and numeric strings get the same id."""
+    assert normalize_id(11) == normalize_id(11.0) == normalize_id(" 11 ") == "11"
+    assert normalize_id("NCT04189588") == "NCT04189588"
+    assert normalize_id("2.0") == normalize_id(" 2. ") == "2"
+    assert (normalize_id("2.5"), normalize_id("007")) == ("2.5", "007")
+    assert normalize_id(math.nan) == ""
+    with pytest.raises(ValueError, match="missing value for 'id'"):
+        normalize_id(None)
+
+    column = pd.Series([1.0, math.nan, 3.0])
+    assert normalize_id_column(column).tolist() == ["1", "", "3"]
+
+
+def test_id_table_interns_ids():
+    """Test that ids get dense codes in order of first appearance."""
+    ids = IdTable()
+    assert list(ids.encode([11, "11", "NCT01", " 12"])) == [0, 0, 1, 2]
+    assert len(ids) == 3
+    assert ids[1] == "NCT01"
+    assert "12" in ids
+    assert ids.encode_column(pd.Series(["12", "13", "12"])).tolist() == [2, 3, 2]
+    assert ids.decode([3, 0]) == ["13", "11"]
+    # Decimal forms are normalized too, whether or not they are strings
+    assert ids.intern("11.0") == ids.intern(11.0) == ids.intern("1.1e1") == 0
+    assert ids.intern("14.0") == ids.intern(14.0) == 4
+    assert len(ids) == 5
+
+
+@pytest.mark.parametrize("record_type", ["pydantic", "slots"])
+def test_ids_are_normalized_at_load_time(tmp_path: Path, record_type: str):
+    """
+    Test that a pubmed.csv id column read as floats (because of a missing id)
+    matches the int ids of pubmed.json, in every loader.
+    """
+    (tmp_path / "pubmed.csv").write_text(
+        "id,title,date,journal\n"
+        "1,Aspirin,2020-01-01,J\n"
+        ",Ibuprofen,2020-01-02,J\n",
+        encoding="utf-8",
+    )
+    (tmp_path / "pubmed.json").write_text(
+        '[{"id": 1, "title": "Again", "date": "2020-01-03", "journal": "J"}]',
+        encoding="utf-8",
+    )
+    (tmp_path / "clinical_trials.csv").write_text(
+        "id,scientific_title,date,journal\n", encoding="utf-8"
+    )
+    loader = DataLoader(tmp_path, record_type=record_type)
+
+    assert [pub.id for pub in loader.load_pubmed()] == ["1", ""]
+    assert loader.load_publications_frame().df["id"].tolist() == ["1", ""]
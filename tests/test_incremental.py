@@ -0,0 +1,50 @@
+from pathlib import Path
+
+from drug_mentions.models.schema import Drug, Publication
+from drug_mentions.pipeline.incremental import (
+    StateStore,
+    find_drug_mentions_incremental,
+)
+from drug_mentions.pipeline.transformer import DataTransformer
+
+
+def create_publication(id: str, title: str, source: str = "pubmed") -> Publication:
+    return Publication(
+        id=id, title=title, date="01/01/2020", journal="Journal A", source=source
+    )
+
+
+def test_incremental_run_matches_full_run(tmp_path: Path):
+    """
+    Test that a second incremental run only matches what changed and gives the
+    same result as a full run.
+    """
+    drugs = [Drug(atccode="D1", drug="Aspirin"), Drug(atccode="D2", drug="Ibuprofen")]
+    publications = [
+        create_publication("P1", "Aspirin study"),
+        create_publication("P2", "Ibuprofen study"),
+        create_publication("NCT1", "Aspirin trial", "clinical_trial"),
+    ]
+
+    with StateStore(tmp_path / "state.sqlite") as state:
+        mentions, stats = find_drug_mentions_incremental(drugs, publications, state)
+        assert mentions == DataTransformer.find_drug_mentions(drugs, publications)
+        assert stats.new_publications == 3
+        assert stats.full_rebuild
+
+    # P2 is modified, P3 is added, NCT1 is removed and a drug is added
+    drugs.append(Drug(atccode="D3", drug="Study"))
+    publications = [
+        publications[0],
+        create_publication("P2", "Ibuprofen and aspirin study"),
+        create_publication("P3", "Paracetamol study"),
+    ]
+
+    with StateStore(tmp_path / "state.sqlite") as state:
+        mentions, stats = find_drug_mentions_incremental(drugs, publications, state)
+
+    assert mentions == DataTransformer.find_drug_mentions(drugs, publications)
+    assert stats.new_publications == 2
+    assert stats.removed_publications == 2
+    assert stats.new_drugs == 1
+    assert not stats.full_rebuild
@@ -0,0 +1,55 @@
+import json
+from pathlib import Path
+
+from drug_mentions import instrumentation
+from drug_mentions.instrumentation import Instrumentation, activate, stage, timed_iter
+from drug_mentions.models.schema import Drug, Publication
+from drug_mentions.pipeline.transformer import DataTransformer
+from drug_mentions.pipeline.writer import DataWriter
+
+
+def test_stages_are_noops_when_inactive():
+    """Without an active Instrumentation, nothing is wrapped or recorded."""
+    items = [1, 2, 3]
+    assert timed_iter("stage", items) is items
+    with stage("stage") as timing:
+        timing.add_rows(3)
+    assert instrumentation.active() is None
+
+
+def test_instrumented_pipeline_report(tmp_path: Path):
+    """
+    Transformer and writer stages are reported with their rows, and nested
+    stages are subtracted from the self time of the enclosing one.
+    """
+    drugs = [Drug(atccode="A01", drug="Aspirin")]
+    publications = [
+        Publication(id=str(i), title=f"Aspirin {i}", date="2020-01-01", journal="J")
+        for i in range(10)
+    ]
+
+    run = Instrumentation(trace_alloc=True)
+    activate(run)
+    try:
+        mentions = DataTransformer.iter_drug_mentions(drugs, publications)
+        DataWriter.write_json(mentions, tmp_path / "drug_mentions.json")
+    finally:
+        activate(None)
+        run.close()
+
+    report = run.report()
+    stages = {stats["stage"]: stats for stats in report["stages"]}
+    assert list(stages) == ["transform.match", "transform.assemble", "write.json"]
+    assert stages["transform.match"]["rows"] == 10
+    assert stages["write.json"]["rows"] == 1
+    write = stages["write.json"]
+    assert write["self_seconds"] < write["seconds"]
+    assert write["alloc_peak_bytes"] >= 0
+
+    run.write_json(tmp_path / "report.json")
+    assert json.loads((tmp_path / "report.json").read_text())["stages"]
+
+    run.write_openmetrics(tmp_path / "metrics.txt")
+    lines = (tmp_path / "metrics.txt").read_text().splitlines()
+    assert lines[-1] == "# EOF"
+    assert 'drug_mentions_stage_rows{stage="transform.match"} 10' in lines
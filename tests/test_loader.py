@@ -1,9 +1,16 @@
+import io
+from functools import partial
+from itertools import chain
 from pathlib import Path
 
+import pandas as pd
 import pytest
 
+from drug_mentions.models.records import MappedText, validate_publications
 from drug_mentions.models.schema import Publication
-from drug_mentions.pipeline.loader import DataLoader, parse_date
+from drug_mentions.pipeline.jsonstream import JSONRecordError, iter_json_records
+from drug_mentions.pipeline.loader import LOAD_SOURCES, DataLoader, parse_date
+from drug_mentions.pipeline.mapped import iter_mapped_json
 
 
 # fixture to create a temporary data directory structure
@@ -52,3 +59,369 @@ def test_load_clinical_trials(temp_data_dir: Path):
         assert pub.title.strip() != ""
         # Also check that the date was parsed correctly as datetime
         assert isinstance(pub.date, type(parse_date("1 January 2020")))
+
+
+def test_iter_pubmed_streams_csv_and_json(temp_data_dir: Path):
+    """
+    Test that iter_pubmed reads the CSV in chunks and the JSON incrementally,
+    accepting a trailing comma in the JSON array.
+    """
+    (temp_data_dir / "pubmed.csv").write_text(
+        "id,title,date,journal\n"
+        '1,"Title one",01/01/2019,"Journal A"\n'
+        '2,"Title two",2020-01-01,"Journal B"\n'
+        '3,"Title three",1 January 2020,"Journal C"\n',
+        encoding="utf-8",
+    )
+    (temp_data_dir / "pubmed.json").write_text(
+        '[\n  {"id": 9, "title": "Json one", "date": "01/01/2020", "journal": "J"},\n'
+        '  {"id": "10", "title": "Json two", "date": "01/01/2020", "journal": "J"},\n]',
+        encoding="utf-8",
+    )
+
+    loader = DataLoader(str(temp_data_dir))
+    publications = list(loader.iter_pubmed(chunksize=2))
+
+    assert [pub.id for pub in publications] == ["1", "2", "3", "9", "10"]
+    assert all(pub.source == "pubmed" for pub in publications)
+    assert publications == loader.load_pubmed()
+
+
+def test_load_pubmed_dedups_ids_across_files(temp_data_dir: Path):
+    """
+    Test that a publication already read from pubmed.csv is skipped in
+    pubmed.json, while empty ids and repeats within one file are kept.
+    """
+    (temp_data_dir / "pubmed.csv").write_text(
+        "id,title,date,journal\n"
+        '1,"Csv one",01/01/2019,"Journal A"\n'
+        '2,"Csv two",01/01/2019,"Journal A"\n'
+        '2,"Csv two again",01/01/2019,"Journal A"\n',
+        encoding="utf-8",
+    )
+    (temp_data_dir / "pubmed.json").write_text(
+        '[{"id": 2, "title": "Json two", "date": "01/01/2020", "journal": "J"},\n'
+        ' {"id": "", "title": "No id", "date": "01/01/2020", "journal": "J"},\n'
+        ' {"id": " 1 ", "title": "Json one", "date": "01/01/2020", "journal": "J"},\n'
+        ' {"id": "3", "title": "Json three", "date": "01/01/2020", "journal": "J"}]',
+        encoding="utf-8",
+    )
+    (temp_data_dir / "clinical_trials.csv").write_text(
+        "id,scientific_title,date,journal\n", encoding="utf-8"
+    )
+
+    loader = DataLoader(str(temp_data_dir))
+    titles = [pub.title for pub in loader.load_pubmed()]
+    assert titles == ["Csv one", "Csv two", "Csv two again", "No id", "Json three"]
+    assert len(loader.load_pubmed(dedup_ids=False)) == 7
+
+    frame = loader.load_publications_frame()
+    assert list(frame.df["title"]) == titles
+
+
+def test_iter_json_records_ndjson(tmp_path: Path):
+    """Test that NDJSON files are read record by record, even with tiny buffers."""
+    path = tmp_path / "records.json"
+    path.write_text('{"id": 1}\n{"id": 22}\n\n{"id": 333}\n', encoding="utf-8")
+
+    assert list(iter_json_records(path, buffer_size=3)) == [
+        {"id": 1},
+        {"id": 22},
+        {"id": 333},
+    ]
+
+
+@pytest.mark.parametrize(
+    "read",
+    [
+        iter_json_records,
+        partial(iter_json_records, buffer_size=3),
+        iter_mapped_json,
+    ],
+)
+def test_iter_json_records_reports_and_skips_invalid_records(tmp_path: Path, read):
+    """
+    Test that an invalid record is reported with its line and column, and that
+    skip_invalid resumes at the next record, with either JSON reader.
+    """
+    path = tmp_path / "pubmed.json"
+    path.write_text(
+        "[\n"
+        '  {"id": 1},\n'
+        '  {"id": 2 "title": "x"},\n'
+        "  {\n"
+        '    "id": oops\n'
+        "  },\n"
+        '  {"id": 4},\n'
+        "]\n",
+        encoding="utf-8",
+    )
+
+    with pytest.raises(JSONRecordError, match="line 3, column 12") as error:
+        list(read(path))
+    assert (error.value.line, error.value.offset) == (3, 26)
+
+    errors = []
+    records = read(path, skip_invalid=True, on_error=errors.append)
+    assert list(records) == [{"id": 1}, {"id": 4}]
+    assert [(e.line, e.column) for e in errors] == [(3, 12), (5, 11)]
+
+
+def test_mmap_records_match_slots_records(temp_data_dir: Path):
+    """
+    Test that memory-mapped reading loads the same publications as the slots
+    records, with titles (quotes, escapes, newlines) decoded on use.
+    """
+    (temp_data_dir / "pubmed.csv").write_text(
+        "id,title,date,journal\n"
+        '1,"A ""quoted"" title, with a comma",01/01/2019,Journal A\n'
+        "\t\n"
+        '2,"A title on\ntwo lines",02/01/2019,"Journal B"\n',
+        encoding="utf-8",
+    )
+    (temp_data_dir / "pubmed.json").write_text(
+        '[\n  {"id": 3, "title": "\\u00c9t\\u00e9 \\"title\\"", "date": "2020-01-01",'
+        ' "journal": "J"},\n  {"id": 4, "title": "Nested", "date": "2020-01-02",'
+        ' "journal": "J", "tags": ["a"]},\n]\n',
+        encoding="utf-8",
+    )
+    (temp_data_dir / "clinical_trials.csv").write_text(
+        "id,scientific_title,date,journal\n"
+        "NCT1,Trial \xe9t\xe9,1 January 2020,Journal C\n",
+        encoding="latin1",
+    )
+    mapped = DataLoader(str(temp_data_dir), record_type="mmap")
+    records = DataLoader(str(temp_data_dir), record_type="slots")
+
+    publications = mapped.load_pubmed() + mapped.load_clinical_trials()
+    assert all(isinstance(pub.title, MappedText) for pub in publications)
+    assert [pub.to_model() for pub in publications] == [
+        pub.to_model() for pub in records.load_pubmed() + records.load_clinical_trials()
+    ]
+    assert [str(pub.title) for pub in publications] == [
+        'A "quoted" title, with a comma',
+        "A title on\ntwo lines",
+        '\u00c9t\u00e9 "title"',
+        "Nested",
+        "Trial \xe9t\xe9",
+    ]
+
+
+@pytest.mark.parametrize("record_type", ["slots", "mmap"])
+def test_csv_float_ids_match_pandas(temp_data_dir: Path, record_type: str):
+    """
+    Test that a CSV id written as 2.0 is read as "2" by every record type,
+    like pandas reads the float id column.
+    """
+    (temp_data_dir / "pubmed.csv").write_text(
+        "id,title,date,journal\n1,T1,01/01/2019,J\n2.0,T2,01/01/2019,J\n"
+    )
+    expected = [pub.id for pub in DataLoader(str(temp_data_dir)).load_pubmed()]
+    loader = DataLoader(str(temp_data_dir), record_type=record_type)
+
+    assert expected == ["1", "2"]
+    assert [pub.id for pub in loader.load_pubmed()] == expected
+
+
+@pytest.mark.parametrize("chunksize", [2, 10])
+def test_mmap_csv_types_match_pandas(temp_data_dir: Path, chunksize: int):
+    """
+    Test that memory-mapped CSV fields get the types pandas gives them (ints
+    with leading zeros, missing values, numbers), per chunk, so that the
+    publications and the ids deduplicated across files match the default
+    loader's.
+    """
+    (temp_data_dir / "pubmed.csv").write_text(
+        "id,title,date,journal\n"
+        "007,T1,01/01/2019,\n"
+        "8,NA,01/01/2019,9\n"
+        "9,T3,01/01/2019,null\n"
+        '"10",T4,01/01/2019,1e3\n'
+        ",T5,01/01/2019,J\n",
+        encoding="utf-8",
+    )
+    (temp_data_dir / "pubmed.json").write_text(
+        '[{"id": "007", "title": "T6", "date": "2020-01-01", "journal": "J"},\n'
+        ' {"id": "7", "title": "T7", "date": "2020-01-01", "journal": "J"}]\n',
+        encoding="utf-8",
+    )
+    (temp_data_dir / "clinical_trials.csv").write_text(
+        "id,scientific_title,date,journal\n"
+        "NCT1,,1 January 2020,Journal C\n"
+        "007,Trial,1 January 2020, \n",
+        encoding="utf-8",
+    )
+
+    def load(record_type: str) -> list:
+        loader = DataLoader(str(temp_data_dir), record_type=record_type)
+        publications = chain(
+            loader.iter_pubmed(chunksize), loader.iter_clinical_trials(chunksize)
+        )
+        return [
+            pub.to_model() if record_type != "pydantic" else pub for pub in publications
+        ]
+
+    expected = load("pydantic")
+    assert [(pub.id, pub.title, pub.journal) for pub in expected][:2] == [
+        ("7", "T1", "nan"),
+        ("8", "nan", "9.0" if chunksize == 2 else "9"),
+    ]
+    assert load("mmap") == expected
+    assert load("slots") == expected
+
+
+@pytest.mark.parametrize("record_type", ["slots", "mmap"])
+def test_load_from_buffers(temp_data_dir: Path, record_type: str):
+    """
+    Test that inputs given as bytes or binary streams load like the same
+    files read from a data directory.
+    """
+    contents = {
+        "drugs.csv": b"atccode,drug\nA01,ASPIRIN\n",
+        "pubmed.csv": b"id,title,date,journal\n1,Aspirin use,01/01/2019,Journal A\n",
+        "pubmed.json": b'[{"id": 2, "title": "T", "date": "2020-01-01", "journal": "J"}]',
+        "clinical_trials.csv": (
+            b"id,scientific_title,date,journal\nNCT1,Trial,1 January 2020,Journal C\n"
+        ),
+    }
+    for name, data in contents.items():
+        (temp_data_dir / name).write_bytes(data)
+    buffers = {
+        name: io.BytesIO(data) if name.endswith(".json") else data
+        for name, data in contents.items()
+    }
+    from_files = DataLoader(str(temp_data_dir), record_type=record_type)
+    from_buffers = DataLoader(buffers=buffers, record_type=record_type)
+
+    assert from_buffers.load_drugs() == from_files.load_drugs()
+    for load in ("load_pubmed", "load_clinical_trials"):
+        publications = getattr(from_buffers, load)()
+        assert [pub.to_model() for pub in publications] == [
+            pub.to_model() for pub in getattr(from_files, load)()
+        ]
+    assert len(from_buffers.load_pubmed()) == 2
+
+
+def test_buffers_and_data_dir_are_exclusive(temp_data_dir: Path):
+    """Test the DataLoader arguments, and a missing buffer."""
+    with pytest.raises(ValueError):
+        DataLoader()
+    with pytest.raises(ValueError):
+        DataLoader(str(temp_data_dir), buffers={})
+    with pytest.raises(FileNotFoundError):
+        DataLoader(buffers={"pubmed.csv": b"id,title,date,journal\n"}).load_drugs()
+
+
+def test_load_publications_frame(temp_data_dir: Path):
+    """
+    Test the columnar loader: scientific_title is used as title, sources are
+    tagged, and rows with an invalid date are reported instead of loaded.
+    """
+    (temp_data_dir / "pubmed.csv").write_text(
+        "id,title,date,journal\n"
+        '1,"Title one",01/01/2019,"Journal A"\n'
+        '2,"Title two",not a date,"Journal B"\n',
+        encoding="utf-8",
+    )
+    (temp_data_dir / "clinical_trials.csv").write_text(
+        "id,scientific_title,date,journal\n"
+        'NCT1,"Trial one","1 January 2020","Journal C"\n',
+        encoding="utf-8",
+    )
+    loader = DataLoader(str(temp_data_dir))
+
+    with pytest.raises(ValueError):
+        loader.load_publications_frame()
+
+    frame = loader.load_publications_frame(strict=False)
+    assert len(frame) == 2
+    assert list(frame.df["source"]) == ["pubmed", "clinical_trial"]
+    assert [(error.row, error.message) for error in frame.errors] == [
+        (1, "Unknown date format: not a date")
+    ]
+
+    publications = frame.to_publications()
+    assert publications[1].title == "Trial one"
+    assert publications[1].date == parse_date("1 January 2020")
+
+
+def test_slots_records_match_pydantic_models(temp_data_dir: Path):
+    """
+    Test that the lightweight record type loads the same values as the
+    pydantic models, and that bulk validation reports the invalid row.
+    """
+    (temp_data_dir / "drugs.csv").write_text(
+        "atccode,drug\nA04AD,DIPHENHYDRAMINE\n", encoding="utf-8"
+    )
+    (temp_data_dir / "clinical_trials.csv").write_text(
+        "id,scientific_title,date,journal\n"
+        'NCT1,"Trial one","1 January 2020","Journal A"\n'
+        'NCT2,"Trial two","25/05/2020","Journal B"\n',
+        encoding="utf-8",
+    )
+    models = DataLoader(str(temp_data_dir))
+    records = DataLoader(str(temp_data_dir), record_type="slots")
+
+    assert [r.to_model() for r in records.load_drugs()] == models.load_drugs()
+    assert [
+        r.to_model() for r in records.load_clinical_trials()
+    ] == models.load_clinical_trials()
+
+    publications, errors = validate_publications(
+        [
+            {"id": 9, "title": "T", "date": "01/01/2020", "journal": "J"},
+            {"id": 10, "title": "T", "date": "01/01/2020", "journal": None},
+        ],
+        file="pubmed.json",
+    )
+    assert publications[0].id == "9"
+    assert [(error.row, error.message) for error in errors] == [
+        (1, "missing value for 'journal'")
+    ]
+
+
+def test_load_parquet_inputs(temp_data_dir: Path):
+    """Test that Parquet inputs are loaded like their CSV equivalents."""
+    pytest.importorskip("pyarrow")
+    pd.DataFrame({"atccode": ["A04AD"], "drug": ["DIPHENHYDRAMINE"]}).to_parquet(
+        temp_data_dir / "drugs.parquet"
+    )
+    pd.DataFrame(
+        {
+            "id": ["1", "2"],
+            "title": ["Title one", "Title two"],
+            "date": pd.to_datetime(["2019-01-01", "2020-01-01"]).date,
+            "journal": ["Journal A", "Journal B"],
+        }
+    ).to_parquet(temp_data_dir / "pubmed.parquet")
+    pd.DataFrame(
+        {
+            "id": ["NCT1"],
+            "scientific_title": ["Trial one"],
+            "date": ["1 January 2020"],
+            "journal": ["Journal C"],
+        }
+    ).to_parquet(temp_data_dir / "clinical_trials.parquet")
+
+    loader = DataLoader(str(temp_data_dir))
+    assert loader.load_drugs()[0].drug == "DIPHENHYDRAMINE"
+
+    publications = loader.load_pubmed() + loader.load_clinical_trials()
+    assert [pub.id for pub in publications] == ["1", "2", "NCT1"]
+    assert publications[1].date == parse_date("2020-01-01")
+    assert publications[2].title == "Trial one"
+    assert loader.load_publications_frame().to_publications() == publications
+
+
+@pytest.mark.parametrize("executor", ["serial", "thread", "process"])
+def test_load_all_matches_sequential_loads(executor: str):
+    """Test that load_all returns what the sequential loaders return, with timings."""
+    loader = DataLoader(Path(__file__).parent.parent / "src" / "data" / "input")
+
+    inputs = loader.load_all(executor=executor)
+
+    assert inputs.drugs == loader.load_drugs()
+    assert inputs.pubmed == loader.load_pubmed()
+    assert inputs.clinical_trials == loader.load_clinical_trials()
+    assert set(inputs.timings) == set(LOAD_SOURCES)
+    assert inputs.rows["pubmed_json"] == 5
@@ -0,0 +1,23 @@
+from drug_mentions.pipeline.matcher import DrugMatcher
+
+
+def test_drug_matcher_matches_like_substring_check():
+    """
+    Test that the automaton finds the same drugs as the naive
+    'drug.lower() in title.lower()' check, including overlapping names.
+    """
+    patterns = ["ETHANOL", "Methanol", "NOL", "an", "Aspirin", "Ibuprofen"]
+    titles = [
+        "Methanol poisoning",
+        "Ethanol and aspirin",
+        "A study on Paracetamol",
+        "IBUPROFEN",
+        "",
+    ]
+
+    matcher = DrugMatcher(patterns)
+    for title in titles:
+        expected = {
+            i for i, pattern in enumerate(patterns) if pattern.lower() in title.lower()
+        }
+        assert matcher.match(title) == expected
@@ -0,0 +1,124 @@
+import json
+import threading
+from pathlib import Path
+from urllib.request import urlopen
+
+import pytest
+
+from drug_mentions.models.schema import Drug, Publication
+from drug_mentions.pipeline.transformer import DataTransformer
+from drug_mentions.pipeline.writer import DataWriter
+from drug_mentions.query import MentionIndex, make_server
+
+DRUGS = [
+    Drug(atccode="A01", drug="Aspirin"),
+    Drug(atccode="B01", drug="Ibuprofen"),
+]
+ROWS = [
+    ("1", "Aspirin and ibuprofen", "2019-06-01", "Journal A", "pubmed"),
+    ("NCT1", "Aspirin trial", "2020-03-01", "Journal B", "clinical_trial"),
+    ("2", "Ibuprofen dosage", "2020-11-30", "Journal A", "pubmed"),
+    ("3", "Unrelated", "2020-01-01", "Journal A", "pubmed"),
+]
+
+
+def sample_hits():
+    publications = [
+        Publication(id=id, title=title, date=date, journal=journal, source=source)
+        for id, title, date, journal, source in ROWS
+    ]
+    return DataTransformer.iter_hits(DRUGS, DataTransformer.prepare(publications))
+
+
+@pytest.mark.parametrize("output_format", ["pretty", "ndjson"])
+def test_mention_index_queries(tmp_path: Path, output_format: str):
+    """The index loaded from the JSON output answers the same as from the hits."""
+    output_file = tmp_path / "drug_mentions.json"
+    DataWriter.write_json(
+        DataTransformer.iter_mentions(DRUGS, sample_hits()),
+        output_file,
+        output_format=output_format,
+    )
+    index = MentionIndex.load(output_file)
+    from_hits = MentionIndex.from_hits(DRUGS, sample_hits())
+
+    for query in (index, from_hits):
+        assert [pub["id"] for pub in query.publications(drug="ASPIRIN")] == [
+            "1",
+            "NCT1",
+        ]
+        assert [
+            (pub["id"], pub["drug"]) for pub in query.publications(source="pubmed")
+        ] == [("1", "Aspirin"), ("1", "Ibuprofen"), ("2", "Ibuprofen")]
+        assert query.publications(drug="Aspirin", source="clinical_trial") == [
+            {
+                "drug": "Aspirin",
+                "id": "NCT1",
+                "title": "Aspirin trial",
+                "date": "2020-03-01",
+                "source": "clinical_trial",
+            }
+        ]
+        assert query.drugs(journal="journal a", year=2020) == ["Ibuprofen"]
+        assert query.drugs(journal="Journal A") == ["Aspirin", "Ibuprofen"]
+        assert query.journals(drug="Aspirin", start="2020-01-01") == ["Journal B"]
+        assert query.publications(start="2020-01-01", end="2020-03-01") == [
+            query.publications(drug="Aspirin", year=2020)[0]
+        ]
+        assert query.publications(drug="Unknown") == []
+        for drug in (None, "Aspirin"):
+            for source in ("pubmed", "clinical_trial"):
+                expected = query.publications(drug=drug, source=source)
+                assert expected
+                assert query.publications(drug=drug, source=source.upper()) == (
+                    expected
+                )
+
+
+def test_mention_index_date_bounds():
+    """
+    Partial date bounds cover their whole period, invalid ones are rejected,
+    and undated mentions sort last and only match unbounded ranges.
+    """
+    index = MentionIndex(
+        [
+            ("Aspirin", "4", "Undated", None, "pubmed"),
+            ("Aspirin", "1", "Old", "2019-06-01", "pubmed"),
+            ("Aspirin", "2", "Leap day", "2020-02-29", "pubmed"),
+            ("Aspirin", "3", "Year end", "2020-12-31", "pubmed"),
+        ],
+        [("Aspirin", "Journal A", None), ("Aspirin", "Journal B", "2020-02-29")],
+    )
+
+    def ids(**kwargs) -> list:
+        return [pub["id"] for pub in index.publications(**kwargs)]
+
+    assert ids() == ids(drug="aspirin") == ids(source="PubMed") == ["1", "2", "3", "4"]
+    assert ids(end="2020") == ["1", "2", "3"]
+    assert ids(start="2020", end="2020-02") == ids(year=2020, end="2020-02") == ["2"]
+    assert ids(start="2020-03") == ["3"]
+    assert index.journals(drug="Aspirin") == ["Journal A", "Journal B"]
+    assert index.journals(drug="Aspirin", end="2020") == ["Journal B"]
+    for bound in ("2020-13", "2020-02-30", "20", "01/01/2020"):
+        with pytest.raises(ValueError, match="Invalid date bound"):
+            index.publications(start=bound)
+
+
+def test_mention_index_http(tmp_path: Path):
+    """The HTTP endpoint returns the API results as JSON."""
+    index = MentionIndex.from_hits(DRUGS, sample_hits())
+    server = make_server(index, port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base = f"http://127.0.0.1:{server.server_port}"
+    try:
+        with urlopen(f"{base}/drugs?journal=Journal%20A&year=2020") as response:
+            assert json.load(response) == {"count": 1, "results": ["Ibuprofen"]}
+        with urlopen(f"{base}/publications?drug=aspirin&limit=1") as response:
+            body = json.load(response)
+        assert [pub["id"] for pub in body["results"]] == ["1"]
+        with pytest.raises(Exception, match="400"):
+            urlopen(f"{base}/publications?journal=Journal%20A")
+    finally:
+        server.shutdown()
+        server.server_close()
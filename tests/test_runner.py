@@ -0,0 +1,122 @@
+import threading
+import time
+
+import pytest
+
+from drug_mentions.pipeline import runner
+from drug_mentions.pipeline.runner import Pipeline, Stage, open_executor
+
+
+def split(text: str) -> list:
+    return text.split()
+
+
+def shout(word: str, suffix: str) -> str:
+    return word.upper() + suffix
+
+
+def join(words: list) -> str:
+    return " ".join(words)
+
+
+PIPELINE = Pipeline(
+    [
+        # Declared out of order: stages run once their inputs are available
+        Stage("joined", join, {"words": "shouted"}),
+        Stage("words", split, {"text": "text"}),
+        Stage(
+            "shouted",
+            shout,
+            {"word": "words", "suffix": "suffix"},
+            map_over="word",
+        ),
+    ]
+)
+
+
+@pytest.mark.parametrize("backend", ["serial", "thread", "process"])
+def test_pipeline_runs_on_every_backend(backend: str):
+    """Test that a definition gives the same values on every backend."""
+    values = PIPELINE.run(backend, max_workers=2, text="a b c", suffix="!")
+
+    assert PIPELINE.params() == {"text", "suffix"}
+    assert values["words"] == ["a", "b", "c"]
+    assert values["shouted"] == ["A!", "B!", "C!"]
+    assert values["joined"] == "A! B! C!"
+
+
+def test_pipeline_runs_on_dask():
+    """Test the dask backend on a local cluster."""
+    pytest.importorskip("dask.distributed")
+    values = PIPELINE.run("dask", max_workers=1, text="a b", suffix="?")
+
+    assert values["joined"] == "A? B?"
+
+
+def test_pipeline_starts_stages_when_their_inputs_are_ready():
+    """
+    Test that a stage starts once its own inputs are ready, without waiting
+    for the other stages submitted with its inputs.
+    """
+    released = threading.Event()
+
+    def slow() -> bool:
+        # Only returns True if "after_fast" ran while it was running
+        return released.wait(timeout=5)
+
+    pipeline = Pipeline(
+        [
+            Stage("slow", slow, {}),
+            Stage("fast", split, {"text": "text"}),
+            Stage("after_fast", lambda words: released.set(), {"words": "fast"}),
+        ]
+    )
+    values = pipeline.run("thread", max_workers=2, text="a")
+
+    assert values["slow"] is True
+
+
+def nap(seconds: float) -> float:
+    time.sleep(seconds)
+    return seconds
+
+
+def test_pipeline_waits_only_on_unfinished_tasks(monkeypatch):
+    """
+    Test that the runner waits on the tasks still running, instead of
+    spinning on those already done while a mapped stage finishes.
+    """
+    calls = []
+    wait = runner.wait
+
+    def counting_wait(futures, **kwargs):
+        calls.append(len(futures))
+        return wait(futures, **kwargs)
+
+    monkeypatch.setattr(runner, "wait", counting_wait)
+    pipeline = Pipeline([Stage("naps", nap, {"seconds": "seconds"}, "seconds")])
+    values = pipeline.run("thread", max_workers=4, seconds=[0, 0, 0, 0.3])
+
+    assert values["naps"] == [0, 0, 0, 0.3]
+    # At most one wait per task, each on unfinished tasks only
+    assert 0 < len(calls) <= 4 and all(calls)
+
+
+def test_pipeline_errors():
+    """Test the checks on definitions, parameters and backends."""
+    with pytest.raises(ValueError, match="Missing pipeline parameters"):
+        PIPELINE.run(text="a")
+    with pytest.raises(ValueError, match="Duplicate stage names"):
+        Pipeline([Stage("a", split, {}), Stage("a", split, {})])
+    with pytest.raises(ValueError, match="not one of its inputs"):
+        Pipeline([Stage("a", shout, {"word": "x"}, map_over="suffix")])
+    with pytest.raises(ValueError, match="waiting on each other"):
+        Pipeline(
+            [Stage("a", split, {"text": "b"}), Stage("b", split, {"text": "a"})]
+        ).run()
+    with pytest.raises(ValueError, match="Unknown backend"):
+        with open_executor("ray"):
+            pass
+    # Errors raised by a stage reach the caller
+    with pytest.raises(AttributeError):
+        PIPELINE.run(text=None, suffix="!")
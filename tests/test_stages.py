@@ -0,0 +1,76 @@
+import json
+import shutil
+from pathlib import Path
+
+import pytest
+
+from drug_mentions.pipeline.loader import DataLoader
+from drug_mentions.pipeline.stages import (
+    match_shard,
+    run_local,
+    stage_inputs,
+    write_results,
+)
+from drug_mentions.pipeline.transformer import DataTransformer
+
+pytest.importorskip("pyarrow")
+
+DATA_DIR = Path(__file__).parent.parent / "src" / "data" / "input"
+
+
+@pytest.mark.parametrize("backend", ["serial", "thread", "process"])
+def test_run_local_matches_transformer(tmp_path: Path, backend: str):
+    """Test that the staged, sharded pipeline writes the usual output."""
+    loader = DataLoader(DATA_DIR)
+    expected = DataTransformer.find_drug_mentions(
+        loader.load_drugs(), loader.load_publications_frame()
+    )
+
+    result = run_local(
+        DATA_DIR,
+        tmp_path / "staging",
+        tmp_path / "drug_mentions.json",
+        backend=backend,
+        shard_size=4,
+    )
+
+    assert result["count"] == len(expected)
+    assert json.loads((tmp_path / "drug_mentions.json").read_text()) == expected
+
+
+def test_stages_pass_manifests(tmp_path: Path):
+    """
+    Test that stages only exchange small JSON manifests, and that shards can
+    be matched in any order.
+    """
+    manifest = stage_inputs(DATA_DIR, tmp_path / "staging", shard_size=5)
+    rows = [shard["rows"] for shard in manifest["shards"]]
+    assert rows[:-1] == [5] * (len(rows) - 1) and sum(rows) == manifest["rows"]
+    assert json.loads((tmp_path / "staging" / "manifest.json").read_text()) == manifest
+
+    matched = [match_shard(manifest, shard) for shard in reversed(range(len(rows)))]
+    assert json.loads(json.dumps(matched)) == matched
+    with pytest.raises(ValueError, match="Shards not matched"):
+        write_results(manifest, matched[1:], tmp_path / "out.json")
+
+    result = write_results(manifest, matched, tmp_path / "out.parquet")
+    assert result["count"] == sum(entry["hits"] for entry in matched)
+
+
+def test_run_local_skips_invalid_json(tmp_path: Path):
+    """Test that skip_invalid_json reaches the loader of stage_inputs."""
+    data_dir = shutil.copytree(DATA_DIR, tmp_path / "input")
+    pubmed = data_dir / "pubmed.json"
+    pubmed.write_text(pubmed.read_text().replace("\n]", '\n  {"id": 99,\n]'))
+    expected = run_local(DATA_DIR, tmp_path / "expected", tmp_path / "expected.json")
+
+    with pytest.raises(Exception, match="pubmed.json"):
+        run_local(data_dir, tmp_path / "staging", tmp_path / "out.json")
+    result = run_local(
+        data_dir, tmp_path / "staging", tmp_path / "out.json", skip_invalid_json=True
+    )
+
+    assert result["count"] == expected["count"]
+    assert (tmp_path / "out.json").read_text() == (
+        tmp_path / "expected.json"
+    ).read_text()
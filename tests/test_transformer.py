@@ -3,7 +3,7 @@ from datetime import datetime
 import pytest
 
 from drug_mentions.models.schema import Drug, Publication
-from drug_mentions.pipeline.transformer import DataTransformer
+from drug_mentions.pipeline.transformer import DataTransformer, PublicationSet
 
 
 def create_publication(
@@ -72,3 +72,122 @@ def test_find_drug_mentions_default_source():
     # Verify journals are captured
     assert "Journal A" in [j["name"] for j in aspirin_mentions["journals"]]
     assert "Journal B" in [j["name"] for j in ibuprofen_mentions["journals"]]
+
+
+def test_find_drug_mentions_token_mode_matches_whole_words():
+    """
+    Test that the token match mode only matches whole words,
+    including multi-word drug names.
+    """
+    drugs = [
+        Drug(atccode="V03AB", drug="ETHANOL"),
+        Drug(atccode="X1", drug="Vitamin C"),
+    ]
+    publications = [
+        create_publication("P1", "Methanol poisoning", "01/01/2020", "Journal A"),
+        create_publication("P2", "Ethanol, and ethanol again", "02/01/2020", "J B"),
+        create_publication("P3", "High dose vitamin c therapy", "03/01/2020", "J C"),
+        create_publication("P4", "Vitamin cocktails", "04/01/2020", "J D"),
+    ]
+
+    result = DataTransformer.find_drug_mentions(drugs, publications, match_mode="token")
+
+    assert [p["id"] for p in result["ETHANOL"]["mentions"]["pubmed"]] == ["P2"]
+    assert [p["id"] for p in result["Vitamin C"]["mentions"]["pubmed"]] == ["P3"]
+
+    substring_result = DataTransformer.find_drug_mentions(drugs, publications)
+    assert len(substring_result["ETHANOL"]["mentions"]["pubmed"]) == 2
+
+
+def test_find_drug_mentions_unknown_match_mode():
+    """Test that an unknown match mode is rejected."""
+    with pytest.raises(ValueError):
+        DataTransformer.find_drug_mentions([], [], match_mode="fuzzy")
+
+
+def test_find_drug_mentions_with_publication_set():
+    """
+    Test that a prepared PublicationSet gives the same result as the
+    concatenated list of publications.
+    """
+    drugs = [Drug(atccode="D1", drug="Aspirin")]
+    pubmed = [create_publication("P1", "Aspirin", "01/01/2020", "Journal A")]
+    clinical_trials = [
+        create_publication(
+            "NCT1", "Aspirin trial", "2020-01-02", "Journal B", "clinical_trial"
+        )
+    ]
+
+    prepared = PublicationSet.from_sources(
+        pubmed=pubmed, clinical_trials=clinical_trials
+    )
+    assert len(prepared.pubmed) == 1
+    assert len(prepared.clinical_trials) == 1
+
+    result = DataTransformer.find_drug_mentions(drugs, prepared)
+    assert result == DataTransformer.find_drug_mentions(drugs, pubmed + clinical_trials)
+    assert result["Aspirin"]["mentions"]["clinical_trials"][0]["date"] == "2020-01-02"
+
+
+@pytest.mark.parametrize("match_mode", ["substring", "token"])
+def test_find_drug_mentions_parallel_matches_serial(match_mode: str):
+    """Test that sharding across worker processes keeps the serial output."""
+    drugs = [Drug(atccode="D1", drug="Aspirin"), Drug(atccode="D2", drug="Ibuprofen")]
+    publications = [
+        create_publication(
+            f"P{i}",
+            "Aspirin and Ibuprofen" if i % 3 == 0 else f"Aspirin study {i}",
+            "01/01/2020",
+            f"Journal {i % 4}",
+            "clinical_trial" if i % 2 else "pubmed",
+        )
+        for i in range(50)
+    ]
+
+    serial = DataTransformer.find_drug_mentions(
+        drugs, publications, match_mode=match_mode
+    )
+    parallel = DataTransformer.find_drug_mentions(
+        drugs, publications, match_mode=match_mode, workers=3, shard_size=7
+    )
+    assert parallel == serial
+
+
+def test_find_drug_mentions_from_iterator():
+    """Test that publications can be streamed from a generator."""
+    drugs = [Drug(atccode="D1", drug="Aspirin")]
+    publications = [
+        create_publication(f"P{i}", f"Aspirin {i}", "01/01/2020", "Journal A")
+        for i in range(5)
+    ]
+
+    result = DataTransformer.find_drug_mentions(drugs, (pub for pub in publications))
+    assert result == DataTransformer.find_drug_mentions(drugs, publications)
+
+
+@pytest.mark.parametrize(
+    "journal_dedup, expected",
+    [
+        ("none", [("J1", "2020-01-01"), ("J1", "2020-01-01"), ("J1", "2020-01-02")]),
+        ("journal", [("J1", "2020-01-01")]),
+        ("journal_date", [("J1", "2020-01-01"), ("J1", "2020-01-02")]),
+    ],
+)
+def test_find_drug_mentions_journal_dedup(journal_dedup: str, expected: list):
+    """Test that repeated journals entries are dropped per journal or journal+date."""
+    drugs = [Drug(atccode="D1", drug="Aspirin")]
+    publications = [
+        create_publication("P1", "Aspirin one", "01/01/2020", "J1"),
+        create_publication("P2", "Aspirin two", "01/01/2020", "J1"),
+        create_publication("P3", "Aspirin three", "02/01/2020", "J1"),
+    ]
+
+    result = DataTransformer.find_drug_mentions(
+        drugs, publications, journal_dedup=journal_dedup
+    )
+    mentions = result["Aspirin"]["mentions"]
+    assert [(j["name"], j["date"]) for j in mentions["journals"]] == expected
+    assert len(mentions["pubmed"]) == 3
+
+    with pytest.raises(ValueError):
+        DataTransformer.find_drug_mentions(drugs, publications, journal_dedup="x")
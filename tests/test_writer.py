@@ -1,8 +1,11 @@
+import io
 import json
+import os
 from pathlib import Path
 
 import pytest
 
+from drug_mentions.pipeline.transformer import EDGE_COLUMNS
 from drug_mentions.pipeline.writer import DataWriter
 
 
@@ -50,3 +53,96 @@ def test_write_json(tmp_path: Path):
     with open(output_path, "r") as f:
         loaded_data = json.load(f)
     assert loaded_data == data, "Written JSON data does not match expected data."
+
+
+@pytest.mark.parametrize("output_format", ["pretty", "compact"])
+def test_write_json_streams_pairs(tmp_path: Path, output_format: str):
+    """
+    Test that (drug, mentions) pairs from a generator are written like the
+    equivalent dictionary, and that no temporary file is left behind.
+    """
+    data = {
+        "drug1": {"mentions": {"pubmed": [{"id": "P1"}], "journals": []}},
+        "drug2": {"mentions": {"pubmed": [], "journals": [{"name": "J"}]}},
+    }
+    output_path = tmp_path / "mentions.json"
+
+    count = DataWriter.write_json(
+        (item for item in data.items()), output_path, output_format=output_format
+    )
+
+    assert count == 2
+    with open(output_path, "r") as f:
+        assert json.load(f) == data
+    assert [p.name for p in tmp_path.iterdir()] == ["mentions.json"]
+
+
+def test_write_json_to_stream(tmp_path: Path):
+    """Test that writing to a text stream gives the same content as a file."""
+    data = {"drug1": {"mentions": {"pubmed": [{"id": "P1"}], "journals": []}}}
+    output_path = tmp_path / "mentions.json"
+    stream = io.StringIO()
+
+    assert DataWriter.write_json(data, stream) == 1
+    DataWriter.write_json(data, output_path)
+
+    assert stream.getvalue() == output_path.read_text()
+    assert not stream.closed
+
+
+def test_write_json_ndjson(tmp_path: Path):
+    """Test that NDJSON output has one drug object per line."""
+    data = {"drug1": {"mentions": {"pubmed": []}}, "drug2": {"mentions": {}}}
+    output_path = tmp_path / "mentions.ndjson"
+
+    DataWriter.write_json(data, output_path, output_format="ndjson")
+
+    lines = output_path.read_text().splitlines()
+    assert [json.loads(line) for line in lines] == [
+        {"drug": "drug1", "mentions": {"pubmed": []}},
+        {"drug": "drug2", "mentions": {}},
+    ]
+
+
+def test_write_parquet_edge_table(tmp_path: Path):
+    """Test that the edge table is written with dictionary-encoded strings."""
+    pq = pytest.importorskip("pyarrow.parquet")
+    edges = [
+        ("ASPIRIN", "A1", "P1", "pubmed", "Journal A", "2020-01-01"),
+        ("ASPIRIN", "A1", "NCT1", "clinical_trial", None, "2020-01-02"),
+    ]
+    output_path = tmp_path / "mentions.parquet"
+
+    assert DataWriter.write_parquet(iter(edges), output_path, batch_size=1) == 2
+
+    table = pq.read_table(output_path)
+    assert table.column_names == list(EDGE_COLUMNS)
+    assert str(table.schema.field("journal").type).startswith("dictionary")
+    assert table.column("journal").to_pylist() == ["Journal A", None]
+    assert str(table.column("date")[1]) == "2020-01-02"
+
+    stream = io.BytesIO()
+    DataWriter.write_parquet(iter(edges), stream)
+    assert pq.read_table(io.BytesIO(stream.getvalue())).to_pylist() == table.to_pylist()
+
+
+def test_write_json_file_modes(tmp_path: Path):
+    """
+    Test that new files get the mode open() gives them under the umask, and
+    replaced files keep theirs.
+    """
+    output_path = tmp_path / "mentions.json"
+    for umask, mode in ((0o022, 0o644), (0o077, 0o600)):
+        previous = os.umask(umask)
+        try:
+            output_path.unlink(missing_ok=True)
+            DataWriter.write_json({}, output_path)
+        finally:
+            os.umask(previous)
+        assert output_path.stat().st_mode & 0o777 == mode
+
+    output_path.chmod(0o640)
+    DataWriter.write_json({"drug1": {}}, output_path)
+    assert output_path.stat().st_mode & 0o777 == 0o640
+    assert json.loads(output_path.read_text()) == {"drug1": {}}
+    assert [path.name for path in tmp_path.iterdir()] == ["mentions.json"]
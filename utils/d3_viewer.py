@@ -1,11 +1,28 @@
 import json
+from typing import Iterable
 
 import streamlit.components.v1 as components
 
+from drug_mentions.graph import DEFAULT_MAX_NODES, build_graph
 
-def d3_viewer(data: dict, height: int = 800):
-    """Render a D3.js network graph in Streamlit using the provided data."""
-    json_data = json.dumps(data, ensure_ascii=False)
+
+def d3_viewer(
+    data: dict,
+    height: int = 800,
+    max_nodes: int = DEFAULT_MAX_NODES,
+    expand: Iterable[str] = (),
+):
+    """
+    Render a D3.js network graph in Streamlit using the provided data.
+
+    The graph is built in Python (see drug_mentions.graph): publications are
+    shown as counts per drug unless the drug is in ``expand``, and at most
+    ``max_nodes`` nodes are sent to the browser.
+    """
+    graph = build_graph(data, max_nodes=max_nodes, expand=expand)
+    # Compact, and safe to inline in a <script> element
+    json_data = json.dumps(graph, ensure_ascii=False, separators=(",", ":"))
+    json_data = json_data.replace("</", "<\\/")
 
     html_code = f"""
     <html>
@@ -71,44 +88,36 @@ def d3_viewer(data: dict, height: int = 800):
         <div id="graph"></div>
 
         <script>
-          // The pipeline data from Python:
-          const data = {json_data};
-
-          let nodes = [];
-          let links = [];
-          let added = new Set();
-
-          function addNode(id, label, group) {{
-            if (!added.has(id)) {{
-              nodes.push({{ id, label, group }});
-              added.add(id);
-            }}
+          // The graph built in Python, as columns
+          const graph = {json_data};
+          const colors = {{
+            drug: "#1f77b4",
+            pubmed: "#ff7f0e",
+            clinical_trials: "#2ca02c",
+            journal: "#d62728",
+          }};
+
+          const nodes = graph.nodes.label.map((label, i) => ({{
+            label,
+            group: graph.groups[graph.nodes.group[i]],
+            count: graph.nodes.count[i],
+          }}));
+          const links = graph.links.source.map((source, i) => ({{
+            source,
+            target: graph.links.target[i],
+            weight: graph.links.weight[i],
+          }}));
+
+          const omitted = Object.entries(graph.omitted)
+            .filter(([, count]) => count > 0)
+            .map(([kind, count]) => count + " " + kind);
+          if (omitted.length) {{
+            const note = document.createElement("div");
+            note.className = "legend-item";
+            note.textContent = "Not shown: " + omitted.join(", ");
+            document.getElementById("legend").appendChild(note);
           }}
 
-          // Build nodes/links from your JSON
-          Object.keys(data).forEach(drug => {{
-            addNode(drug, drug, "drug");
-            const mentions = data[drug].mentions || {{}};
-            // PubMed
-            (mentions.pubmed || []).forEach(pub => {{
-              let pubId = drug + "_pub_" + (pub.id || Math.random().toString(36).substring(2,7));
-              addNode(pubId, pub.title, "pubmed");
-              links.push({{ source: drug, target: pubId, label: "pubmed" }});
-            }});
-            // Clinical Trials
-            (mentions.clinical_trials || []).forEach(ct => {{
-              let ctId = drug + "_ct_" + (ct.id || Math.random().toString(36).substring(2,7));
-              addNode(ctId, ct.title, "clinical");
-              links.push({{ source: drug, target: ctId, label: "clinical_trial" }});
-            }});
-            // Journals
-            (mentions.journals || []).forEach(j => {{
-              let jid = drug + "_journal_" + j.name.replace(/\\s+/g, "_").toLowerCase();
-              addNode(jid, j.name, "journal");
-              links.push({{ source: drug, target: jid, label: "journal" }});
-            }});
-          }});
-
           // Dimensions
           const width = window.innerWidth;
           const height = window.innerHeight;
@@ -117,10 +126,13 @@ def d3_viewer(data: dict, height: int = 800):
             .attr("width", width)
             .attr("height", height);
 
+          const radius = d => 5 + 2 * Math.sqrt(d.count);
+
           const simulation = d3.forceSimulation(nodes)
-            .force("link", d3.forceLink(links).id(d => d.id).distance(150))
-            .force("charge", d3.forceManyBody().strength(-300))
+            .force("link", d3.forceLink(links).distance(80))
+            .force("charge", d3.forceManyBody().strength(-200).distanceMax(400))
             .force("center", d3.forceCenter(width / 2, height / 2))
+            .alphaDecay(0.05)
             .on("tick", ticked);
 
           const link = svg.append("g")
@@ -129,7 +141,7 @@ def d3_viewer(data: dict, height: int = 800):
             .selectAll("line")
             .data(links)
             .enter().append("line")
-            .attr("stroke-width", 1);
+            .attr("stroke-width", d => Math.min(1 + Math.log2(d.weight), 6));
 
           const node = svg.append("g")
             .attr("stroke", "#fff")
@@ -137,22 +149,19 @@ def d3_viewer(data: dict, height: int = 800):
             .selectAll("circle")
             .data(nodes)
             .enter().append("circle")
-            .attr("r", 8)
-            .attr("fill", d => {{
-              if(d.group === "drug") return "#1f77b4";
-              if(d.group === "pubmed") return "#ff7f0e";
-              if(d.group === "clinical") return "#2ca02c";
-              if(d.group === "journal") return "#d62728";
-              return "#ccc";
-            }})
+            .attr("r", radius)
+            .attr("fill", d => colors[d.group] || "#ccc")
             .call(d3.drag()
               .on("start", dragstarted)
               .on("drag", dragged)
               .on("end", dragended));
 
+          node.append("title").text(d => d.label);
+
+          // Publication titles are only shown on hover
           const labels = svg.append("g")
             .selectAll("text")
-            .data(nodes)
+            .data(nodes.filter(d => d.group === "drug" || d.group === "journal" || d.count > 1))
             .enter().append("text")
             .text(d => d.label)
             .attr("font-size", 10)
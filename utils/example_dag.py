@@ -1,51 +1,44 @@
 """
-Exemple de DAG Airflow orchestrant 3 tâches :
-- load_data : Chargement via DataLoader
-- transform_data : Transformation via DataTransformer
-- write_data : Écriture via DataWriter
+Exemple de DAG Airflow construit à partir de drug_mentions.pipeline.stages.PIPELINE,
+une tâche par étape :
+- manifest : Chargement des entrées et écriture en fichiers Parquet
+- shards : Liste des lots de publications
+- matched : Recherche des mentions, une tâche mappée par lot de publications
+- result : Écriture du fichier de sortie à partir des lots
+
+Les tâches n'échangent par XCom que des chemins et des manifestes (quelques
+centaines d'octets), les données restent dans le répertoire de staging.
+La même définition s'exécute sans Airflow avec stages.run_local, sur un
+backend local (serial, thread, process ou dask).
 """
 
+import shutil
 from datetime import datetime, timedelta
-from pathlib import Path
 
 from airflow import DAG
-from airflow.operators.python import PythonOperator
-
-from drug_mentions.pipeline.loader import DataLoader
-from drug_mentions.pipeline.transformer import DataTransformer
-from drug_mentions.pipeline.writer import DataWriter
-
+from airflow.decorators import task
 
-def load_data(**kwargs):
-    """Load the data from the input directory."""
-    input_dir = Path("/input")
-    loader = DataLoader(str(input_dir))
-    drugs = loader.load_drugs()
-    pubs = loader.load_pubmed() + loader.load_clinical_trials()
-    return {"drugs": [d.dict() for d in drugs], "pubs": [p.dict() for p in pubs]}
+from drug_mentions.pipeline import stages
 
-
-def transform_data(**kwargs):
-    """Transform the loaded data to find drug mentions."""
-    ti = kwargs["ti"]
-    data = ti.xcom_pull(task_ids="load_data")
-    from drug_mentions.models.schema import Drug, Publication
-
-    drugs = [Drug.parse_obj(d) for d in data["drugs"]]
-    pubs = [Publication.parse_obj(p) for p in data["pubs"]]
-    transformer = DataTransformer()
-    return transformer.find_drug_mentions(drugs, pubs)
+# Values of the pipeline parameters, rendered as templates by Airflow
+PARAMS = {
+    "data_dir": "/input",
+    # Must be shared by the workers running the tasks
+    "staging_dir": "/staging/{{ run_id }}",
+    "shard_size": 50_000,
+    "skip_invalid_json": False,
+    "match_mode": "substring",
+    "output_file": "/output/drug_mentions.json",
+    "output_format": "pretty",
+    "journal_dedup": "none",
+    "index_file": "/output/journal_index.json",
+}
 
 
-def write_data(**kwargs):
-    """Write the transformed data to a JSON file Ou BigQuery."""
-    ti = kwargs["ti"]
-    mentions = ti.xcom_pull(task_ids="transform_data")
-    output_dir = Path("/output")
-    output_dir.mkdir(parents=True, exist_ok=True)
-    output_file = output_dir / "drug_mentions.json"
-    DataWriter().write_json(mentions, output_file)
-    return str(output_file)
+@task(trigger_rule="all_done")
+def cleanup(manifest: dict) -> None:
+    """Remove the run's staging dir, whether the run succeeded or not."""
+    shutil.rmtree(manifest["staging_dir"], ignore_errors=True)
 
 
 default_args = {
@@ -61,20 +54,17 @@ with DAG(
     schedule_interval="@daily",
     catchup=False,
 ) as dag:
-    load_task = PythonOperator(
-        task_id="load_data",
-        python_callable=load_data,
-        provide_context=True,
-    )
-    transform_task = PythonOperator(
-        task_id="transform_data",
-        python_callable=transform_data,
-        provide_context=True,
-    )
-    write_task = PythonOperator(
-        task_id="write_data",
-        python_callable=write_data,
-        provide_context=True,
-    )
+    # Stages are declared in dependency order
+    values = dict(PARAMS)
+    for stage in stages.PIPELINE.stages:
+        kwargs = {arg: values[name] for arg, name in stage.inputs.items()}
+        stage_task = task(stage.func, task_id=stage.name)
+        if stage.map_over is None:
+            values[stage.name] = stage_task(**kwargs)
+        else:
+            items = kwargs.pop(stage.map_over)
+            values[stage.name] = stage_task.partial(**kwargs).expand(
+                **{stage.map_over: items}
+            )
 
-    load_task >> transform_task >> write_task
+    values["result"] >> cleanup(values["manifest"])